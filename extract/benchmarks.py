@@ -0,0 +1,146 @@
+"""A file to benchmark the extraction steps on recorded fixtures."""
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+import tracemalloc
+from io import StringIO
+import pandas as pd
+from bs4 import BeautifulSoup
+from extract import CHUNK_SIZE, write_chunks, stream_html_table_to_csv
+from rawg_api_extract import flatten_page_results
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+FIXTURES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RAWG_PAGE_FIXTURE = os.path.join(FIXTURES_FOLDER, "rawg_games_page.json")
+WCD_SHEET_FIXTURE = os.path.join(FIXTURES_FOLDER, "wcd_sheet.html")
+
+
+def load_rawg_page_fixture(fixture_path: str = RAWG_PAGE_FIXTURE, page_size: int = 40) -> list[dict]:
+    """Loads the results of a recorded RAWG page, repeated up to page_size games."""
+    with open(fixture_path, "r", encoding="UTF-8") as f:
+        results = json.load(f)["results"]
+    return [results[i % len(results)] for i in range(page_size)]
+
+
+def filter_page_loop(results: list[dict]) -> list[dict]:
+    """Filters a page of RAWG results one game at a time, as rawg_api_extract used to."""
+    page_games = []
+    for game in results:
+        release_year = game.get(
+            "released", "N/A")[:4] if game.get("released") else "N/A"
+        rawg_rating = game.get("rating", 0.0)
+        metacritic_rating = game.get("metacritic", None)
+
+        if (release_year and release_year != "N/A" and
+                (rawg_rating > 0.0 or (metacritic_rating is not None and metacritic_rating > 0))):
+            page_games.append({
+                "Name": game.get("name"),
+                "Release Year": release_year,
+                "RAWG Rating": rawg_rating,
+                "Metacritic Rating": metacritic_rating
+            })
+        else:
+            LOGGER.info("Excluding game: %s (Release Year: %s, RAWG Rating: %s, Metacritic: %s)",
+                        game.get("name"), release_year, rawg_rating, metacritic_rating)
+    return page_games
+
+
+def time_per_call(func, argument, repeats: int) -> float:
+    """Returns the mean seconds per call of func(argument)."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(argument)
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_page_flattening(page_sizes=(40, 4000), repeats: int = 50) -> pd.DataFrame:
+    """Compares filtering RAWG pages game by game against flatten_page_results."""
+    rows = []
+    for page_size in page_sizes:
+        results = load_rawg_page_fixture(page_size=page_size)
+        rows.append({
+            "page_size": page_size,
+            "loop_ms": time_per_call(filter_page_loop, results, repeats) * 1e3,
+            "vectorised_ms": time_per_call(flatten_page_results, results, repeats) * 1e3,
+        })
+    return pd.DataFrame(rows)
+
+
+def make_large_sheet_html(fixture_path: str = WCD_SHEET_FIXTURE, repeats: int = 1000) -> str:
+    """Repeats the body rows of a saved Google Sheets HTML page to make a larger page."""
+    with open(fixture_path, "r", encoding="UTF-8") as f:
+        html = f.read()
+    body_start = html.index("<tbody>") + len("<tbody>")
+    body_end = html.index("</tbody>")
+    rows = html[body_start:body_end]
+    return html[:body_start] + re.sub(r"\s+", " ", rows) * repeats + html[body_end:]
+
+
+def soup_html_to_csv(html_path: str, csv_file_path: str) -> None:
+    """Converts a saved sheet page to a CSV the way extract.download_woke_csv used to."""
+    with open(html_path, "r", encoding="UTF-8") as f:
+        soup = BeautifulSoup(f.read(), "html.parser")
+    table = soup.find("table")
+    pd.read_html(StringIO(str(table)))[0].to_csv(csv_file_path, index=False)
+
+
+def stream_html_file_to_csv(html_path: str, csv_file_path: str) -> None:
+    """Converts a saved sheet page to a CSV with the streaming table parser."""
+    with open(html_path, "rb") as f:
+        stream_html_table_to_csv(f, csv_file_path)
+
+
+def stream_csv_file(csv_path: str, csv_file_path: str) -> None:
+    """Copies a saved CSV export in chunks, as the CSV export download does."""
+    with open(csv_path, "rb") as f:
+        write_chunks(iter(lambda: f.read(CHUNK_SIZE), b""), csv_file_path)
+
+
+def measure_file_conversion(func, source_path: str, csv_file_path: str) -> dict:
+    """Times a conversion, then runs it again under tracemalloc to measure its peak allocations."""
+    start = time.perf_counter()
+    func(source_path, csv_file_path)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(source_path, csv_file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1e6}
+
+
+def benchmark_sheet_download(repeats: int = 1000) -> pd.DataFrame:
+    """Compares the old BeautifulSoup path with the CSV export stream and the streaming HTML parser."""
+    with tempfile.TemporaryDirectory() as temp_folder:
+        html_path = os.path.join(temp_folder, "sheet.html")
+        csv_path = os.path.join(temp_folder, "export.csv")
+        output_path = os.path.join(temp_folder, "output.csv")
+        with open(html_path, "w", encoding="UTF-8") as f:
+            f.write(make_large_sheet_html(repeats=repeats))
+        stream_html_file_to_csv(html_path, csv_path)
+
+        results = pd.DataFrame({
+            "BeautifulSoup + read_html": measure_file_conversion(soup_html_to_csv, html_path,
+                                                                 output_path),
+            "CSV export stream": measure_file_conversion(stream_csv_file, csv_path, output_path),
+            "lxml streaming parser": measure_file_conversion(stream_html_file_to_csv, html_path,
+                                                             output_path),
+        }).T
+        results["input_mb"] = [os.path.getsize(html_path) / 1e6, os.path.getsize(csv_path) / 1e6,
+                               os.path.getsize(html_path) / 1e6]
+    return results
+
+
+if __name__ == "__main__":
+    logger_setup("benchmarks_log.log", "logs")
+
+    print("RAWG page filtering (logging to file, as in production):")
+    print(benchmark_page_flattening().to_string(index=False))
+
+    print("Woke Content Detector sheet download (saved HTML fixture x1000):")
+    print(benchmark_sheet_download())
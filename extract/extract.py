@@ -1,22 +1,96 @@
-"""A file to extract a portion (first 100 rows) of the Woke Content Detector List and save it locally as a CSV."""
+"""A file to extract the Woke Content Detector List and save it locally as a CSV without the Google Sheets API."""
 
-from io import StringIO
-import pandas as pd
+import os
+import re
+import csv
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 
+WCD_CSV_FILEPATH = "woke_content_detector.csv"
+CHUNK_SIZE = 1 << 16
 
-def download_woke_csv(url: str):
-    """Downloads the Woke Content Detector list as a CSV."""
 
-    response = requests.get(url, timeout=10)
-    soup = BeautifulSoup(response.text, "html.parser")
-    table = soup.find("table")
+def csv_export_url(url: str) -> str:
+    """Builds the CSV export URL of a Google Sheet from its URL."""
 
-    df = pd.read_html(StringIO(str(table)))[0]
+    sheet_id = re.search(r"/spreadsheets/d/([\w-]+)", url)
+    if not sheet_id:
+        return f"{url.rstrip('/')}/export?format=csv"
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id.group(1)}/export?format=csv"
 
-    csv_file_path = "woke_content_detector.csv"
-    df.to_csv(csv_file_path, index=False)
+
+def write_chunks(chunks, csv_file_path: str) -> None:
+    """Writes chunks of bytes to a temporary file, then renames it to csv_file_path."""
+
+    temp_path = f"{csv_file_path}.tmp"
+    with open(temp_path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temp_path, csv_file_path)
+
+
+def download_csv_export(url: str, csv_file_path: str) -> bool:
+    """Streams the sheet's CSV export straight to disk. Returns False if the export is unavailable."""
+
+    with requests.get(csv_export_url(url), stream=True, timeout=10) as response:
+        if (response.status_code != 200 or
+                "text/csv" not in response.headers.get("Content-Type", "")):
+            print(f"CSV export unavailable (Status Code: {response.status_code})")
+            return False
+
+        write_chunks(response.iter_content(chunk_size=CHUNK_SIZE), csv_file_path)
+    return True
+
+
+def stream_html_table_to_csv(html_source, csv_file_path: str) -> int:
+    """Parses the first table of an HTML file-like object row by row and writes it as a CSV.
+
+    Only the data cells are written, so the sheet's row numbers and A, B, C... column headers
+    are left out and the CSV matches the sheet's CSV export. Each row is cleared once written,
+    so memory does not grow with the size of the table. Returns the number of rows written, and
+    raises a ValueError without touching csv_file_path if there is no table or it has no rows.
+    """
+
+    temp_path = f"{csv_file_path}.tmp"
+    row_count = 0
+    table_found = False
+    with open(temp_path, "w", encoding="UTF-8", newline="") as f:
+        writer = csv.writer(f)
+        for _, element in etree.iterparse(html_source, events=("end",),
+                                          tag=("tr", "table"), html=True):
+            if element.tag == "table":
+                table_found = True
+                break
+
+            cells = ["".join(cell.itertext()) for cell in element if cell.tag == "td"]
+            if cells:
+                writer.writerow(cells)
+                row_count += 1
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    if not table_found or not row_count:
+        os.remove(temp_path)
+        raise ValueError("No table rows found in the sheet's HTML" if table_found
+                         else "No table found in the sheet's HTML")
+    os.replace(temp_path, csv_file_path)
+    return row_count
+
+
+def download_woke_csv(url: str, csv_file_path: str = WCD_CSV_FILEPATH):
+    """Downloads the Woke Content Detector list as a CSV.
+
+    The sheet's CSV export is used when available, otherwise its HTML table is parsed as it streams in.
+    Raises an HTTPError or ValueError, leaving any existing CSV in place, if neither works.
+    """
+
+    if not download_csv_export(url, csv_file_path):
+        with requests.get(url, stream=True, timeout=10) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            stream_html_table_to_csv(response.raw, csv_file_path)
 
     print(f"CSV file downloaded successfully and saved to {csv_file_path}")
 
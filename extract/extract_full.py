@@ -1,8 +1,10 @@
 """A file to extract the entire Woke Content Detector list and other datasets to CSVs."""
 
 import os
+import json
+import shutil
+import hashlib
 from os import environ as ENV
-from os import rename
 import logging
 
 import gspread
@@ -13,19 +15,26 @@ from oauth2client.service_account import ServiceAccountCredentials
 import kagglehub
 
 from utils.logging_config import logger_setup
+from snapshot_store import record_snapshot
 
 
 LOGGER = logging.getLogger(__name__)
 
 WCD_GOOGLE_SHEET = "https://docs.google.com/spreadsheets/d/1AVTZPJij5PQmlWAkYdDahBrxDiwqWMGsWEcEnpdKTa4/edit?gid=0"
 WCD_CSV_FILEPATH = "woke_content_detector_full.csv"
+WCD_SNAPSHOT_DIR = "wcd_snapshots"
 
 VG_DATASET_NAME = "gregorut/videogamesales"
+VG_DATASET_FILE = "vgsales.csv"
 VG_CSV_FILEPATH = "videogame_sales.csv"
+KAGGLE_MANIFEST_FILEPATH = "kaggle_manifest.json"
 
 
-def download_wcd_google_sheet(sheet_url, csv_file_path):
-    """Download the Woke Content Detector data from a Google Sheet and save it as CSV."""
+def download_wcd_google_sheet(sheet_url, csv_file_path, snapshot_dir=None):
+    """Download the Woke Content Detector data from a Google Sheet and save it as CSV.
+
+    If a snapshot_dir is given, the changes since the last download are also recorded there.
+    """
 
     if not sheet_url:
         LOGGER.error(
@@ -56,6 +65,9 @@ def download_wcd_google_sheet(sheet_url, csv_file_path):
         LOGGER.info(
             "CSV file downloaded successfully and saved to %s", csv_file_path)
 
+        if snapshot_dir:
+            record_snapshot(df, snapshot_dir)
+
     except SpreadsheetNotFound:
         LOGGER.error(
             "Google Sheet not found. Please check the URL and try again.")
@@ -63,11 +75,52 @@ def download_wcd_google_sheet(sheet_url, csv_file_path):
         LOGGER.error("Error with credentials file: %s", e)
 
 
-def download_vg_sales_kaggle(dataset_name: str, download_path: str):
-    """Download data from a Kaggle dataset and save it as a CSV."""
+def file_sha256(file_path: str) -> str:
+    """Calculate the SHA-256 checksum of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_kaggle_manifest(manifest_path: str) -> dict:
+    """Read the manifest of Kaggle datasets that have been saved, keyed by dataset name."""
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def write_kaggle_manifest(manifest: dict, manifest_path: str):
+    """Write the manifest of Kaggle datasets, replacing the old one in one step."""
+    with open(f"{manifest_path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def link_file(source_path: str, download_path: str):
+    """Expose a cached file at download_path with a hard link, copying it if linking is not possible."""
+    temp_path = f"{download_path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
     try:
-        dataset_folder_path = kagglehub.dataset_download(
-            dataset_name, force_download=True)
+        os.link(source_path, temp_path)
+    except OSError:
+        shutil.copy2(source_path, temp_path)
+    os.replace(temp_path, download_path)
+
+
+def download_vg_sales_kaggle(dataset_name: str, download_path: str, file_name: str = VG_DATASET_FILE,
+                             manifest_path: str = KAGGLE_MANIFEST_FILEPATH):
+    """Download data from a Kaggle dataset and save it as a CSV.
+
+    kagglehub keeps a cached copy of each dataset version and only downloads a version it does not
+    have, so the cached file is linked to download_path rather than moved out of the cache.
+    The version and checksum of the file are recorded in a manifest to detect a corrupted cache.
+    """
+    try:
+        dataset_folder_path = kagglehub.dataset_download(dataset_name)
         files = os.listdir(dataset_folder_path)
 
         if not files:
@@ -75,8 +128,35 @@ def download_vg_sales_kaggle(dataset_name: str, download_path: str):
                 "Kaggle dataset folder is empty - No files to process.")
             return
 
-        downloaded_file_path = os.path.join(dataset_folder_path, files[0])
-        rename(downloaded_file_path, download_path)
+        if file_name not in files:
+            LOGGER.error("File %s not found in Kaggle dataset %s (found: %s)",
+                         file_name, dataset_name, files)
+            return
+
+        version = os.path.basename(os.path.normpath(dataset_folder_path))
+        manifest = read_kaggle_manifest(manifest_path)
+        saved_entry = manifest.get(dataset_name, {})
+        downloaded_file_path = os.path.join(dataset_folder_path, file_name)
+        checksum = file_sha256(downloaded_file_path)
+
+        if saved_entry.get("version") == version and saved_entry.get("sha256") != checksum:
+            LOGGER.warning("Cached Kaggle dataset %s does not match its checksum - downloading again.",
+                           dataset_name)
+            dataset_folder_path = kagglehub.dataset_download(
+                dataset_name, force_download=True)
+            downloaded_file_path = os.path.join(dataset_folder_path, file_name)
+            checksum = file_sha256(downloaded_file_path)
+
+        manifest[dataset_name] = {"version": version, "file": file_name, "sha256": checksum}
+
+        if os.path.exists(download_path) and file_sha256(download_path) == checksum:
+            write_kaggle_manifest(manifest, manifest_path)
+            LOGGER.info("Dataset %s is up to date at %s",
+                        dataset_name, download_path)
+            return
+
+        link_file(downloaded_file_path, download_path)
+        write_kaggle_manifest(manifest, manifest_path)
         LOGGER.info("Dataset downloaded and saved to %s", download_path)
 
     except FileNotFoundError:
@@ -91,6 +171,6 @@ if __name__ == "__main__":
     LOGGER.info("Loading environment variables from .env file.")
 
     LOGGER.info("Starting data extraction process.")
-    download_wcd_google_sheet(WCD_GOOGLE_SHEET, WCD_CSV_FILEPATH)
+    download_wcd_google_sheet(WCD_GOOGLE_SHEET, WCD_CSV_FILEPATH, WCD_SNAPSHOT_DIR)
     download_vg_sales_kaggle(VG_DATASET_NAME, VG_CSV_FILEPATH)
     LOGGER.info("Data extraction process completed.")
@@ -1,10 +1,14 @@
 "A file to extract games data from the RAWG API."
 
+import os
+import json
 from os import environ as ENV
 import random
+import shutil
 import logging
 import requests
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -13,18 +17,71 @@ from utils.logging_config import logger_setup
 
 LOGGER = logging.getLogger(__name__)
 
+GAME_DTYPES = {
+    "Name": "object",
+    "Release Year": "object",
+    "RAWG Rating": "float64",
+    "Metacritic Rating": "float64",
+}
+PAGE_PLAN_FILE = "pages.json"
 
-def fetch_sampled_games(api_key: str, max_pages: int):
-    """Fetch a random sample of games from the RAWG API."""
+
+def flatten_page_results(results: list[dict]) -> tuple:
+    """Flatten a page of RAWG results into a DataFrame of games with a release year and a rating.
+
+    Only the needed fields are pulled out of the (deeply nested) results, into one array per
+    field, and the filter is applied to whole arrays at once.
+    Returns the games and the number of games that were excluded.
+    """
+
+    names = np.array([game.get("name") for game in results], dtype=object)
+    release_years = np.array([game.get("released") or "" for game in results],
+                             dtype=str).astype("<U4")
+    rawg_ratings = np.nan_to_num(
+        np.array([game.get("rating") for game in results], dtype=float))
+    metacritic_ratings = np.array(
+        [game.get("metacritic") for game in results], dtype=float)
+
+    keep = (release_years != "") & (
+        (rawg_ratings > 0.0) | (metacritic_ratings > 0))
+    games = pd.DataFrame({
+        "Name": names[keep],
+        "Release Year": release_years[keep].astype(object),
+        "RAWG Rating": rawg_ratings[keep],
+        "Metacritic Rating": metacritic_ratings[keep],
+    })
+
+    return games, int((~keep).sum())
+
+
+def concat_games(pages: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate pages of games, giving an empty DataFrame of games if there are none."""
+
+    if not pages:
+        return pd.DataFrame(columns=list(GAME_DTYPES)).astype(GAME_DTYPES)
+    return pd.concat(pages, ignore_index=True)
+
+
+def sample_pages(max_pages: int) -> list[int]:
+    """Pick a random sample of up to 100 page numbers to fetch."""
+
+    return random.sample(range(1, max_pages + 1), k=min(max_pages, 100))
+
+
+def fetch_game_pages(api_key: str, max_pages: int, pages_to_fetch: list[int] = None):
+    """Fetch a random sample of games from the RAWG API, yielding each page number and a
+    DataFrame of its games.
+
+    pages_to_fetch replaces the random sample of pages, e.g. to finish an interrupted crawl.
+    """
 
     url = "https://api.rawg.io/api/games"
-    all_games = []
 
     ordering_options = [None, "rating", "-rating", "-released", "released"]
     random.shuffle(ordering_options)
 
-    pages_to_fetch = random.sample(
-        range(1, max_pages + 1), k=min(max_pages, 100))
+    if pages_to_fetch is None:
+        pages_to_fetch = sample_pages(max_pages)
     LOGGER.info("Fetching pages: %s", pages_to_fetch)
 
     for page in pages_to_fetch:
@@ -49,26 +106,17 @@ def fetch_sampled_games(api_key: str, max_pages: int):
             LOGGER.info("No more games found.")
             break
 
-        for game in results:
-            release_year = game.get(
-                "released", "N/A")[:4] if game.get("released") else "N/A"
-            rawg_rating = game.get("rating", 0.0)
-            metacritic_rating = game.get("metacritic", None)
+        page_games, excluded_count = flatten_page_results(results)
+        LOGGER.info("Excluded %s of %s games on page %s (no release year or ratings)",
+                    excluded_count, len(results), page)
 
-            if (release_year and release_year != "N/A" and
-                    (rawg_rating > 0.0 or (metacritic_rating is not None and metacritic_rating > 0))):
+        yield page, page_games
 
-                all_games.append({
-                    "Name": game.get("name"),
-                    "Release Year": release_year,
-                    "RAWG Rating": rawg_rating,
-                    "Metacritic Rating": metacritic_rating
-                })
-            else:
-                LOGGER.info("Excluding game: %s (Release Year: %s, RAWG Rating: %s, Metacritic: %s)",
-                            game.get("name"), release_year, rawg_rating, metacritic_rating)
 
-    return all_games
+def fetch_sampled_games(api_key: str, max_pages: int):
+    """Fetch a random sample of games from the RAWG API."""
+
+    return concat_games([page_games for _, page_games in fetch_game_pages(api_key, max_pages)])
 
 
 def save_to_csv(games_data, filename='rawg_video_games.csv'):
@@ -79,6 +127,130 @@ def save_to_csv(games_data, filename='rawg_video_games.csv'):
     LOGGER.info("Data saved to %s", filename)
 
 
+def write_part(games_data: list[pd.DataFrame], part_path: str, file_format: str = "csv"):
+    """Write a batch of pages of games to a part file, renaming it into place once it is complete."""
+
+    df = concat_games(games_data)
+    temp_path = f"{part_path}.tmp"
+    if file_format == "parquet":
+        df.to_parquet(temp_path, index=False)
+    else:
+        df.to_csv(temp_path, index=False)
+    os.replace(temp_path, part_path)
+
+
+def combine_parts(part_paths: list[str], filename: str, file_format: str = "csv"):
+    """Combine part files into one file, one part at a time, renaming it into place at the end."""
+
+    temp_path = f"{filename}.tmp"
+    if file_format == "parquet":
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        schema = pq.read_schema(part_paths[0])
+        with pq.ParquetWriter(temp_path, schema) as writer:
+            for part_path in part_paths:
+                writer.write_table(pq.read_table(part_path, schema=schema))
+    else:
+        with open(temp_path, "wb") as combined:
+            for i, part_path in enumerate(part_paths):
+                with open(part_path, "rb") as part:
+                    header = part.readline()
+                    if i == 0:
+                        combined.write(header)
+                    shutil.copyfileobj(part, combined)
+    os.replace(temp_path, filename)
+
+
+def parts_folder_of(filename: str) -> str:
+    """Name the folder that holds the part files of a crawl saved to filename."""
+
+    return f"{filename}.parts"
+
+
+def write_page_plan(parts_folder: str, pages: list[int]):
+    """Record the pages a crawl still has to fetch, replacing the previous record once written."""
+
+    plan_path = os.path.join(parts_folder, PAGE_PLAN_FILE)
+    with open(f"{plan_path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump({"remaining": pages}, f)
+    os.replace(f"{plan_path}.tmp", plan_path)
+
+
+def load_page_plan(filename: str, max_pages: int) -> list[int]:
+    """Load the pages an interrupted crawl to filename still has to fetch.
+
+    If there is no interrupted crawl, a new random sample of pages is planned and recorded.
+    """
+
+    parts_folder = parts_folder_of(filename)
+    plan_path = os.path.join(parts_folder, PAGE_PLAN_FILE)
+    if os.path.exists(plan_path):
+        with open(plan_path, "r", encoding="UTF-8") as f:
+            pages = json.load(f)["remaining"]
+        LOGGER.info("Resuming crawl with %s pages left", len(pages))
+        return pages
+
+    os.makedirs(parts_folder, exist_ok=True)
+    pages = sample_pages(max_pages)
+    write_page_plan(parts_folder, pages)
+    return pages
+
+
+def save_in_batches(game_pages, filename='rawg_video_games.csv', batch_size=400,
+                    file_format="csv") -> int:
+    """Save (page number, games) pairs to a file, writing a part file every batch_size games.
+
+    Parts are kept in a '<filename>.parts' folder until every page has been written, so an
+    interrupted crawl keeps its progress and the next run includes it. If the folder records
+    the pages still to fetch (see load_page_plan), the pages of each part are removed from it
+    once the part is written, so the next run fetches only the rest.
+    Returns the number of games written by this run.
+    """
+
+    parts_folder = parts_folder_of(filename)
+    os.makedirs(parts_folder, exist_ok=True)
+    plan_path = os.path.join(parts_folder, PAGE_PLAN_FILE)
+    remaining = None
+    if os.path.exists(plan_path):
+        with open(plan_path, "r", encoding="UTF-8") as f:
+            remaining = json.load(f)["remaining"]
+    part_number = len([part for part in os.listdir(parts_folder)
+                       if part.startswith("part-") and not part.endswith(".tmp")])
+
+    games_written = 0
+    batch = []
+    batch_pages = []
+    batch_games = 0
+    for page, page_games in game_pages:
+        batch.append(page_games)
+        batch_pages.append(page)
+        batch_games += len(page_games)
+        if batch_games >= batch_size:
+            write_part(batch, os.path.join(
+                parts_folder, f"part-{part_number:05d}.{file_format}"), file_format)
+            if remaining is not None:
+                remaining = [page for page in remaining if page not in batch_pages]
+                write_page_plan(parts_folder, remaining)
+            LOGGER.info("Saved batch of %s games", batch_games)
+            games_written += batch_games
+            part_number += 1
+            batch = []
+            batch_pages = []
+            batch_games = 0
+
+    if batch or not part_number:
+        write_part(batch, os.path.join(
+            parts_folder, f"part-{part_number:05d}.{file_format}"), file_format)
+        games_written += batch_games
+
+    part_paths = sorted(os.path.join(parts_folder, part) for part in os.listdir(parts_folder)
+                        if part.startswith("part-") and not part.endswith(".tmp"))
+    combine_parts(part_paths, filename, file_format)
+    shutil.rmtree(parts_folder)
+    LOGGER.info("Data saved to %s", filename)
+    return games_written
+
+
 if __name__ == "__main__":
 
     logger_setup("rawg_api_extract_log.log", "logs")
@@ -87,5 +259,4 @@ if __name__ == "__main__":
 
     API_KEY = ENV["RAWG_KEY"]
 
-    sampled_rawg_games = fetch_sampled_games(API_KEY, 100)
-    save_to_csv(sampled_rawg_games)
+    save_in_batches(fetch_game_pages(API_KEY, 100, load_page_plan("rawg_video_games.csv", 100)))
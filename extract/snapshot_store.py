@@ -0,0 +1,214 @@
+"""A file to keep the history of the Woke Content Detector sheet as row-level deltas between extractions.
+
+Each distinct row is stored once in rows.jsonl, keyed by the hash of its contents. Each snapshot
+stores only the keys of the rows added and removed since the previous snapshot, with the row
+ordinal of each added row, and manifest.json lists the snapshots in order, so storage grows with
+the amount of change rather than the number of runs. A snapshot that reorders unchanged rows also
+stores the full row order.
+"""
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+ROWS_FILE = "rows.jsonl"
+MANIFEST_FILE = "manifest.json"
+DELTAS_FOLDER = "deltas"
+
+
+def row_hash(row: dict) -> str:
+    """Hashes the column names and values of a row."""
+    return hashlib.sha256(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def row_keys(rows: list[dict]) -> list[str]:
+    """Keys each row by its hash plus its occurrence, so repeated rows are kept apart."""
+    seen = {}
+    keys = []
+    for row in rows:
+        content_hash = row_hash(row)
+        keys.append(f"{content_hash}:{seen.get(content_hash, 0)}")
+        seen[content_hash] = seen.get(content_hash, 0) + 1
+    return keys
+
+
+def read_manifest(store_dir: str) -> list[dict]:
+    """Reads the list of snapshots, oldest first, or an empty list for a new store."""
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, "r", encoding="UTF-8") as f:
+        return json.load(f)["snapshots"]
+
+
+def write_json(data, path: str) -> None:
+    """Writes JSON to a temporary file, then renames it to path."""
+    with open(f"{path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_rows(store_dir: str) -> dict:
+    """Reads every stored row by its hash, skipping a last line left incomplete by a crash."""
+    rows = {}
+    rows_path = os.path.join(store_dir, ROWS_FILE)
+    if not os.path.exists(rows_path):
+        return rows
+
+    with open(rows_path, "r", encoding="UTF-8") as f:
+        for line in f:
+            try:
+                stored = json.loads(line)
+            except json.JSONDecodeError:
+                LOGGER.warning("Skipping incomplete row in %s", rows_path)
+                continue
+            rows[stored["hash"]] = stored["row"]
+    return rows
+
+
+def trim_incomplete_line(rows_path: str) -> None:
+    """Cuts off a last line left without a newline by a crash, so new rows start on their own line."""
+    if not os.path.exists(rows_path):
+        return
+    with open(rows_path, "rb+") as f:
+        contents = f.read()
+        if contents and not contents.endswith(b"\n"):
+            f.truncate(contents.rfind(b"\n") + 1)
+
+
+def read_delta(store_dir: str, snapshot: dict) -> dict:
+    """Reads the keys of the rows added and removed by a snapshot."""
+    with open(os.path.join(store_dir, DELTAS_FOLDER, f"{snapshot['id']}.json"), "r",
+              encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def insert_rows(kept: list[str], added: list[str], ordinals: list[int]) -> list[str]:
+    """Places added keys at their row ordinals among the kept keys, which keep their order."""
+    added_at = dict(zip(ordinals, added))
+    remaining = iter(kept)
+    return [added_at[ordinal] if ordinal in added_at else next(remaining)
+            for ordinal in range(len(kept) + len(added))]
+
+
+def replay(store_dir: str, snapshots: list[dict]) -> list[str]:
+    """Applies the deltas of snapshots in order, returning the keys of the rows that remain.
+
+    Keys are in the row order of the last snapshot.
+    """
+    keys = []
+    for snapshot in snapshots:
+        delta = read_delta(store_dir, snapshot)
+        if "order" in delta:
+            keys = delta["order"]
+            continue
+        removed = set(delta["removed"])
+        keys = insert_rows([key for key in keys if key not in removed], delta["added"],
+                           delta["ordinals"])
+    return keys
+
+
+def record_snapshot(df: pd.DataFrame, store_dir: str, timestamp: str = None) -> str:
+    """Records the rows of an extraction as a delta against the latest snapshot.
+
+    Returns the new snapshot's id, or None if nothing changed since the latest snapshot.
+    """
+    os.makedirs(os.path.join(store_dir, DELTAS_FOLDER), exist_ok=True)
+    snapshots = read_manifest(store_dir)
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    keys = row_keys(rows)
+
+    previous_order = replay(store_dir, snapshots)
+    previous_keys = set(previous_order)
+    current_keys = set(keys)
+    ordinals = [ordinal for ordinal, key in enumerate(keys) if key not in previous_keys]
+    added = [keys[ordinal] for ordinal in ordinals]
+    removed = sorted(previous_keys - current_keys)
+    delta = {"added": added, "ordinals": ordinals, "removed": removed}
+    kept = [key for key in previous_order if key in current_keys]
+    if insert_rows(kept, added, ordinals) != keys:
+        delta["order"] = keys
+    elif snapshots and not added and not removed:
+        LOGGER.info("WCD sheet unchanged since snapshot %s", snapshots[-1]["id"])
+        return None
+
+    # Rows are written first and the manifest last, so a crash never leaves a snapshot
+    # that refers to rows or a delta that were not saved
+    stored = read_rows(store_dir)
+    rows_path = os.path.join(store_dir, ROWS_FILE)
+    trim_incomplete_line(rows_path)
+    with open(rows_path, "a", encoding="UTF-8") as f:
+        for key, row in zip(keys, rows):
+            content_hash = key.split(":")[0]
+            if content_hash not in stored:
+                f.write(json.dumps({"hash": content_hash, "row": row}, default=str) + "\n")
+                stored[content_hash] = row
+        f.flush()
+        os.fsync(f.fileno())
+
+    snapshot = {"id": f"{len(snapshots) + 1:06d}",
+                "timestamp": timestamp or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "rows": len(keys), "added": len(added), "removed": len(removed)}
+    write_json(delta, os.path.join(store_dir, DELTAS_FOLDER, f"{snapshot['id']}.json"))
+    write_json({"snapshots": [*snapshots, snapshot]}, os.path.join(store_dir, MANIFEST_FILE))
+
+    LOGGER.info("Recorded snapshot %s: %s rows added, %s removed",
+                snapshot["id"], len(added), len(removed))
+    return snapshot["id"]
+
+
+def parse_timestamp(timestamp) -> pd.Timestamp:
+    """Parses a timestamp, treating timestamps without a time zone as UTC."""
+    parsed = pd.Timestamp(timestamp)
+    return parsed.tz_localize("UTC") if parsed.tzinfo is None else parsed
+
+
+def snapshot_as_of(store_dir: str, timestamp) -> pd.DataFrame:
+    """Rebuilds the sheet as it was at the latest snapshot taken at or before timestamp.
+
+    Rows are in the sheet's order at that snapshot. Returns an empty DataFrame if there was no
+    snapshot by then.
+    """
+    as_of = parse_timestamp(timestamp)
+    snapshots = [snapshot for snapshot in read_manifest(store_dir)
+                 if parse_timestamp(snapshot["timestamp"]) <= as_of]
+    if not snapshots:
+        LOGGER.warning("No WCD snapshot at or before %s", timestamp)
+        return pd.DataFrame()
+
+    stored = read_rows(store_dir)
+    return pd.DataFrame([stored[key.split(":")[0]] for key in replay(store_dir, snapshots)])
+
+
+def rating_history(store_dir: str, game: str, game_column: str = "Game",
+                   rating_column: str = "Rating") -> pd.DataFrame:
+    """Lists each snapshot in which the rating of a game changed, with the rating from then on.
+
+    The rating is None for snapshots in which the game was removed from the sheet.
+    """
+    stored = read_rows(store_dir)
+    game_hashes = {content_hash for content_hash, row in stored.items()
+                   if row.get(game_column) == game}
+
+    history = []
+    keys = {}
+    for snapshot in read_manifest(store_dir):
+        delta = read_delta(store_dir, snapshot)
+        for key in delta["removed"]:
+            keys.pop(key, None)
+        keys.update(dict.fromkeys(key for key in delta["added"]
+                                  if key.split(":")[0] in game_hashes))
+
+        ratings = [stored[key.split(":")[0]].get(rating_column) for key in keys]
+        rating = ratings[0] if ratings else None
+        if not history or history[-1]["Rating"] != rating:
+            history.append({"Snapshot": snapshot["id"], "Timestamp": snapshot["timestamp"],
+                            "Rating": rating})
+
+    if history and history[0]["Rating"] is None:
+        history = history[1:]
+    return pd.DataFrame(history, columns=["Snapshot", "Timestamp", "Rating"])
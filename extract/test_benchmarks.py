@@ -0,0 +1,62 @@
+"""Tests for benchmarks.py."""
+# pylint: skip-file
+import pandas as pd
+from benchmarks import (load_rawg_page_fixture, filter_page_loop, benchmark_page_flattening,
+                        make_large_sheet_html, soup_html_to_csv, stream_html_file_to_csv,
+                        benchmark_sheet_download)
+from rawg_api_extract import flatten_page_results
+
+
+def test_load_rawg_page_fixture_repeats_to_page_size():
+    """Tests the recorded page is repeated up to the requested size."""
+    results = load_rawg_page_fixture(page_size=20)
+
+    assert len(results) == 20
+    assert results[0] == results[8]
+
+
+def test_filter_page_loop_matches_flatten_page_results():
+    """Tests the old loop and the vectorised flattening keep the same games."""
+    results = load_rawg_page_fixture(page_size=40)
+
+    games, _ = flatten_page_results(results)
+
+    assert [game["Name"] for game in filter_page_loop(results)] == games["Name"].tolist()
+
+
+def test_benchmark_page_flattening():
+    """Tests every page size is benchmarked."""
+    result = benchmark_page_flattening(page_sizes=(10, 20), repeats=1)
+
+    assert result["page_size"].tolist() == [10, 20]
+    assert list(result.columns) == ["page_size", "loop_ms", "vectorised_ms"]
+
+
+def test_make_large_sheet_html_repeats_rows():
+    """Tests the body rows of the saved page are repeated."""
+    html = make_large_sheet_html(repeats=3)
+
+    assert html.count("Bloons TD 6") == 3
+    assert html.count("<table") == 1
+
+
+def test_soup_and_streaming_paths_give_the_same_csv(tmp_path):
+    """Tests the streaming parser gives the old BeautifulSoup path's table without its headers."""
+    soup_csv = str(tmp_path / "soup.csv")
+    stream_csv = str(tmp_path / "stream.csv")
+
+    soup_html_to_csv("fixtures/wcd_sheet.html", soup_csv)
+    stream_html_file_to_csv("fixtures/wcd_sheet.html", stream_csv)
+
+    # The old path also wrote the sheet's row numbers and A, B, C... column headers
+    soup_table = pd.read_csv(soup_csv, header=None).iloc[1:, 1:].reset_index(drop=True)
+    soup_table.columns = range(soup_table.shape[1])
+    pd.testing.assert_frame_equal(soup_table, pd.read_csv(stream_csv, header=None))
+
+
+def test_benchmark_sheet_download():
+    """Tests every download path is benchmarked."""
+    result = benchmark_sheet_download(repeats=2)
+
+    assert list(result.index) == ["BeautifulSoup + read_html", "CSV export stream",
+                                  "lxml streaming parser"]
@@ -1,27 +1,143 @@
 """Tests for extract.py."""
 # pylint: skip-file
+import io
+import pytest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-from extract import download_woke_csv
+import requests
+from extract import (download_woke_csv, csv_export_url, download_csv_export,
+                     stream_html_table_to_csv, write_chunks)
+
+
+@pytest.fixture
+def html_response():
+    """Mocks a streamed response of a saved Google Sheets HTML page."""
+    response = MagicMock()
+    response.raw = open("fixtures/wcd_sheet.html", "rb")
+    response.__enter__.return_value = response
+    yield response
+    response.raw.close()
+
+
+@pytest.fixture
+def csv_response():
+    """Mocks a streamed response of a Google Sheets CSV export."""
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"Content-Type": "text/csv"}
+    response.iter_content.return_value = [b"Game,Rating\n", b"Game1,Recommended\n"]
+    response.__enter__.return_value = response
+    return response
+
+
+def test_csv_export_url():
+    """Tests the export URL is built from the sheet ID."""
+    expected = "https://docs.google.com/spreadsheets/d/abc-123/export?format=csv"
+
+    assert csv_export_url(
+        "https://docs.google.com/spreadsheets/d/abc-123") == expected
+    assert csv_export_url(
+        "https://docs.google.com/spreadsheets/d/abc-123/edit?gid=0#gid=0") == expected
+
+
+def test_write_chunks(tmp_path):
+    """Tests chunks are written to the file."""
+    csv_file_path = str(tmp_path / "output.csv")
+
+    write_chunks(iter([b"a,b\n", b"1,2\n"]), csv_file_path)
+
+    with open(csv_file_path, "rb") as f:
+        assert f.read() == b"a,b\n1,2\n"
 
 
 @patch("extract.requests.get")
-@patch("extract.BeautifulSoup")
-@patch("extract.pd.read_html")
-@patch("extract.pd.DataFrame.to_csv")
-def test_download_woke_csv_valid(mock_to_csv, mock_read_html, mock_beautiful_soup, mock_requests):
+def test_download_csv_export_valid(mock_requests, csv_response, tmp_path):
+    """Tests the CSV export is streamed to disk."""
+    mock_requests.return_value = csv_response
+    csv_file_path = str(tmp_path / "output.csv")
+
+    assert download_csv_export("https://test.com", csv_file_path)
+
+    mock_requests.assert_called_once_with("https://test.com/export?format=csv",
+                                          stream=True, timeout=10)
+    assert pd.read_csv(csv_file_path)["Game"].tolist() == ["Game1"]
+
+
+@patch("extract.requests.get")
+def test_download_csv_export_unavailable(mock_requests, csv_response, tmp_path):
+    """Tests False is returned when the export responds with HTML instead of a CSV."""
+    csv_response.headers = {"Content-Type": "text/html"}
+    mock_requests.return_value = csv_response
+
+    assert not download_csv_export("https://test.com", str(tmp_path / "output.csv"))
+    assert not (tmp_path / "output.csv").exists()
+
+
+def test_stream_html_table_to_csv(tmp_path):
+    """Tests the first table of a saved sheet page is converted to a CSV."""
+    csv_file_path = str(tmp_path / "output.csv")
+
+    with open("fixtures/wcd_sheet.html", "rb") as f:
+        row_count = stream_html_table_to_csv(f, csv_file_path)
+
+    result = pd.read_csv(csv_file_path)
+    assert row_count == 8
+    assert len(result.columns) == 6
+    assert result.columns[1] == "👉"
+    assert result.iloc[0].tolist() == ["Game", "Release Year", "Developer", "Publisher",
+                                       "Rating", "Review"]
+    assert result.iloc[2, 5] == "Contains subtly pro-DEI messaging & character customisation."
+
+
+@pytest.mark.parametrize("html", [b"<html><body><p>Error 404</p></body></html>",
+                                  b"<html><body><table><tr><th>A</th></tr></table></body></html>"])
+def test_stream_html_table_to_csv_without_rows(html, tmp_path):
+    """Tests a page without table rows raises and leaves the existing CSV untouched."""
+    csv_file_path = tmp_path / "output.csv"
+    csv_file_path.write_text("Game\nGame1\n")
+
+    with pytest.raises(ValueError):
+        stream_html_table_to_csv(io.BytesIO(html), str(csv_file_path))
+
+    assert csv_file_path.read_text() == "Game\nGame1\n"
+    assert not (tmp_path / "output.csv.tmp").exists()
+
+
+@patch("extract.requests.get")
+def test_download_woke_csv_valid(mock_requests, csv_response, tmp_path):
     """Tests that the CSV is downloaded and saved successfully."""
-    mock_requests.return_value.text = "<html><table><tr><td>Data</td></tr></table></html>"
-    mock_soup = MagicMock()
-    mock_soup.find.return_value = "<table><tr><td>Data</td></tr></table>"
-    mock_beautiful_soup.return_value = mock_soup
+    mock_requests.return_value = csv_response
+    csv_file_path = str(tmp_path / "woke_content_detector.csv")
 
-    mock_df = pd.DataFrame({"Column": ["Data"]})
-    mock_read_html.return_value = [mock_df]
+    download_woke_csv("https://test.com", csv_file_path)
+
+    mock_requests.assert_called_once_with("https://test.com/export?format=csv",
+                                          stream=True, timeout=10)
+    assert pd.read_csv(csv_file_path)["Rating"].tolist() == ["Recommended"]
+
+
+@patch("extract.requests.get")
+def test_download_woke_csv_falls_back_to_html(mock_requests, csv_response, html_response,
+                                              tmp_path):
+    """Tests the HTML table is parsed when the CSV export is unavailable."""
+    csv_response.status_code = 403
+    mock_requests.side_effect = [csv_response, html_response]
+    csv_file_path = str(tmp_path / "woke_content_detector.csv")
+
+    download_woke_csv("https://test.com", csv_file_path)
+
+    mock_requests.assert_called_with("https://test.com", stream=True, timeout=10)
+    assert len(pd.read_csv(csv_file_path)) == 7
+
+
+@patch("extract.requests.get")
+def test_download_woke_csv_html_error(mock_requests, csv_response, html_response, tmp_path):
+    """Tests an error response to the HTML fallback raises instead of overwriting the CSV."""
+    csv_response.status_code = 403
+    html_response.raise_for_status.side_effect = requests.HTTPError("500 Server Error")
+    mock_requests.side_effect = [csv_response, html_response]
 
-    download_woke_csv("https://test.com")
+    with pytest.raises(requests.HTTPError):
+        download_woke_csv("https://test.com", str(tmp_path / "woke_content_detector.csv"))
 
-    mock_requests.assert_called_once_with("https://test.com", timeout=10)
-    mock_beautiful_soup.assert_called_once()
-    mock_to_csv.assert_called_once_with(
-        "woke_content_detector.csv", index=False)
+    assert not (tmp_path / "woke_content_detector.csv").exists()
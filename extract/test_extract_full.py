@@ -3,7 +3,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from gspread.exceptions import SpreadsheetNotFound
-from extract_full import download_wcd_google_sheet, download_vg_sales_kaggle
+import os
+from extract_full import (download_wcd_google_sheet, download_vg_sales_kaggle,
+                          file_sha256, read_kaggle_manifest, link_file)
+from snapshot_store import snapshot_as_of
 
 
 @pytest.fixture
@@ -31,7 +34,7 @@ def mock_sheet1(mock_open_by_url):
 @patch.dict("extract_full.ENV", {"GOOGLE_SHEET_PATH": "test_creds.json"})
 @patch("extract_full.ServiceAccountCredentials.from_json_keyfile_name")
 @patch("extract_full.gspread.authorize")
-def test_download_wcd_google_sheet_valid(mock_authorize, mock_credentials):
+def test_download_wcd_google_sheet_valid(mock_authorize, mock_credentials, tmp_path):
     """Tests a google sheet is downloaded successfully and saved as a CSV file."""
 
     mock_gspread_client = MagicMock()
@@ -43,7 +46,7 @@ def test_download_wcd_google_sheet_valid(mock_authorize, mock_credentials):
     mock_gspread_client.open_by_url.return_value.sheet1 = mock_sheet
     mock_authorize.return_value = mock_gspread_client
 
-    csv_file_path = "test_output.csv"
+    csv_file_path = str(tmp_path / "test_output.csv")
     download_wcd_google_sheet("https://fake-url", csv_file_path)
 
     with open(csv_file_path, "r") as f:
@@ -52,6 +55,25 @@ def test_download_wcd_google_sheet_valid(mock_authorize, mock_credentials):
     assert "game1,1999,Ubisoft" in content
 
 
+@patch.dict("extract_full.ENV", {"GOOGLE_SHEET_PATH": "test_creds.json"})
+@patch("extract_full.ServiceAccountCredentials.from_json_keyfile_name")
+@patch("extract_full.gspread.authorize")
+def test_download_wcd_google_sheet_records_snapshot(mock_authorize, mock_credentials, tmp_path):
+    """Tests the downloaded sheet is recorded in the snapshot store when one is given."""
+
+    mock_sheet = MagicMock()
+    mock_sheet.get_all_values.return_value = [
+        ["Game", "Release Year", "Rating"],
+        ["game1", "1999", "Recommended"],
+    ]
+    mock_authorize.return_value.open_by_url.return_value.sheet1 = mock_sheet
+
+    snapshot_dir = str(tmp_path / "snapshots")
+    download_wcd_google_sheet("https://fake-url", str(tmp_path / "wcd.csv"), snapshot_dir)
+
+    assert snapshot_as_of(snapshot_dir, "2100-01-01")["Game"].tolist() == ["game1"]
+
+
 @patch.dict("extract_full.ENV", {"GOOGLE_SHEET_PATH": "test_creds.json"})
 @patch("extract_full.ServiceAccountCredentials.from_json_keyfile_name")
 @patch("extract_full.gspread.authorize")
@@ -117,38 +139,103 @@ def test_download_wcd_google_sheet_no_data_rows(mock_logging, mock_authorize, mo
     )
 
 
+@pytest.fixture
+def kaggle_cache(tmp_path):
+    """Mocks a kagglehub cache folder of a dataset version."""
+    version_folder = tmp_path / "cache" / "versions" / "2"
+    version_folder.mkdir(parents=True)
+    (version_folder / "readme.txt").write_text("Video game sales")
+    (version_folder / "vgsales.csv").write_text("Name,Global_Sales\nGame1,1.0\n")
+    return version_folder
+
+
 @patch("extract_full.kagglehub.dataset_download")
-@patch("extract_full.os.listdir")
-@patch("extract_full.os.path.join")
-@patch("extract_full.rename")
 @patch("extract_full.LOGGER.info")
-def test_download_vg_sales_kaggle_valid(mock_logging, mock_dataset, mock_listdir, mock_path_join, mock_rename):
+def test_download_vg_sales_kaggle_valid(mock_logging, mock_dataset, kaggle_cache, tmp_path):
     """Tests a kaggle dataset is downloaded successfully and saved as a CSV file."""
-    mock_dataset.return_value = "/fake/path"
-    mock_listdir.return_value = ["dataset.csv"]
-    mock_path_join.return_value = "/fake/path/dataset.csv"
+    mock_dataset.return_value = str(kaggle_cache)
+    download_path = str(tmp_path / "test_output.csv")
+    manifest_path = str(tmp_path / "manifest.json")
 
-    dataset_name = "vg_sales_dataset"
-    download_path = "test_output.csv"
-    download_vg_sales_kaggle(dataset_name, download_path)
+    download_vg_sales_kaggle("vg_sales_dataset", download_path,
+                             manifest_path=manifest_path)
 
-    mock_dataset.assert_called_with(
-        ["dataset.csv"], "test_output.csv")
+    mock_dataset.assert_called_once_with("vg_sales_dataset")
     mock_logging.assert_called_once_with(
         "Dataset downloaded and saved to %s", download_path)
+    with open(download_path, encoding="UTF-8") as f:
+        assert f.read() == "Name,Global_Sales\nGame1,1.0\n"
+    assert (kaggle_cache / "vgsales.csv").exists()
+    assert os.path.samefile(download_path, kaggle_cache / "vgsales.csv")
+    assert read_kaggle_manifest(manifest_path)["vg_sales_dataset"] == {
+        "version": "2", "file": "vgsales.csv",
+        "sha256": file_sha256(str(kaggle_cache / "vgsales.csv"))}
+
+
+@patch("extract_full.kagglehub.dataset_download")
+@patch("extract_full.LOGGER.info")
+def test_download_vg_sales_kaggle_up_to_date(mock_logging, mock_dataset, kaggle_cache, tmp_path):
+    """Tests the CSV is left alone when it already matches the cached dataset."""
+    mock_dataset.return_value = str(kaggle_cache)
+    download_path = str(tmp_path / "test_output.csv")
+    manifest_path = str(tmp_path / "manifest.json")
+    download_vg_sales_kaggle("vg_sales_dataset", download_path,
+                             manifest_path=manifest_path)
+
+    download_vg_sales_kaggle("vg_sales_dataset", download_path,
+                             manifest_path=manifest_path)
+
+    mock_logging.assert_called_with(
+        "Dataset %s is up to date at %s", "vg_sales_dataset", download_path)
+
+
+@patch("extract_full.kagglehub.dataset_download")
+@patch("extract_full.LOGGER.warning")
+def test_download_vg_sales_kaggle_corrupted_cache(mock_logging, mock_dataset, kaggle_cache,
+                                                  tmp_path):
+    """Tests the dataset is downloaded again when the cached file no longer matches its checksum."""
+    mock_dataset.return_value = str(kaggle_cache)
+    manifest_path = str(tmp_path / "manifest.json")
+    download_path = str(tmp_path / "test_output.csv")
+    download_vg_sales_kaggle("vg_sales_dataset", download_path,
+                             manifest_path=manifest_path)
+    os.remove(download_path)
+    (kaggle_cache / "vgsales.csv").write_text("corrupted")
+
+    download_vg_sales_kaggle("vg_sales_dataset", download_path,
+                             manifest_path=manifest_path)
+
+    mock_dataset.assert_called_with("vg_sales_dataset", force_download=True)
+    mock_logging.assert_called_once_with(
+        "Cached Kaggle dataset %s does not match its checksum - downloading again.",
+        "vg_sales_dataset")
+
+
+@patch("extract_full.kagglehub.dataset_download")
+@patch("extract_full.LOGGER.error")
+def test_download_vg_sales_kaggle_missing_file(mock_logging, mock_dataset, kaggle_cache, tmp_path):
+    """Tests an error is logged when the dataset does not contain the expected file."""
+    mock_dataset.return_value = str(kaggle_cache)
+
+    download_vg_sales_kaggle("vg_sales_dataset", str(tmp_path / "test_output.csv"),
+                             file_name="missing.csv")
+
+    mock_logging.assert_called_once_with(
+        "File %s not found in Kaggle dataset %s (found: %s)", "missing.csv",
+        "vg_sales_dataset", os.listdir(kaggle_cache))
 
 
 @patch("extract_full.kagglehub.dataset_download")
 @patch("extract_full.LOGGER.error")
-def test_download_vg_sales_kaggle_invalid(mock_logging, mock_dataset):
+def test_download_vg_sales_kaggle_invalid(mock_logging, mock_dataset, tmp_path):
     """Tests error is raised when kaggle dataset is not found."""
     mock_dataset.side_effect = FileNotFoundError()
 
     dataset_name = "invalid_dataset"
-    download_path = "./test_output.csv"
+    download_path = str(tmp_path / "test_output.csv")
     download_vg_sales_kaggle(dataset_name, download_path)
 
-    mock_dataset.assert_called_once_with(dataset_name, force_download=True)
+    mock_dataset.assert_called_once_with(dataset_name)
     mock_logging.assert_called_once_with(
         "The specified Kaggle dataset could not be found: %s", dataset_name
     )
@@ -157,14 +244,28 @@ def test_download_vg_sales_kaggle_invalid(mock_logging, mock_dataset):
 @patch("extract_full.kagglehub.dataset_download")
 @patch("extract_full.os.listdir")
 @patch("extract_full.LOGGER.warning")
-def test_download_vg_sales_kaggle_empty_folder(mock_logging, mock_listdir, mock_dataset):
+def test_download_vg_sales_kaggle_empty_folder(mock_logging, mock_listdir, mock_dataset,
+                                               tmp_path):
     """Tests warning is logged when Kaggle dataset folder is empty."""
     mock_dataset.return_value = "/fake/path"
     mock_listdir.return_value = []
 
     dataset_name = "vg_sales_dataset"
-    download_vg_sales_kaggle(dataset_name, "test_output.csv")
+    download_vg_sales_kaggle(dataset_name, str(tmp_path / "test_output.csv"))
 
     mock_logging.assert_called_once_with(
         "Kaggle dataset folder is empty - No files to process."
     )
+
+
+def test_link_file_replaces_existing_file(tmp_path):
+    """Tests an existing file is replaced by a link to the cached file."""
+    source_path = tmp_path / "source.csv"
+    source_path.write_text("new")
+    download_path = tmp_path / "output.csv"
+    download_path.write_text("old")
+
+    link_file(str(source_path), str(download_path))
+
+    assert download_path.read_text() == "new"
+    assert source_path.exists()
@@ -0,0 +1,214 @@
+"""Tests for rawg_api_extract.py."""
+# pylint: skip-file
+import os
+import pytest
+import pandas as pd
+from unittest.mock import patch, MagicMock, ANY
+import json
+from rawg_api_extract import (fetch_game_pages, fetch_sampled_games,
+                              save_in_batches, write_part, combine_parts,
+                              flatten_page_results, load_page_plan, PAGE_PLAN_FILE)
+
+
+def make_page(name, metacritic_rating=78):
+    """Makes the games of a page of one game, as yielded by fetch_game_pages."""
+    return pd.DataFrame({"Name": [name], "Release Year": ["2016"], "RAWG Rating": [3.5],
+                         "Metacritic Rating": [metacritic_rating]}).astype({"Metacritic Rating": float})
+
+
+@pytest.fixture
+def rawg_response():
+    """Mocks a page of results from the RAWG API."""
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"results": [
+        {"name": "Game1", "released": "2016-01-01",
+            "rating": 3.5, "metacritic": 78},
+        {"name": "Game2", "released": None, "rating": 4.0, "metacritic": 80},
+        {"name": "Game3", "released": "2020-05-05",
+            "rating": 0.0, "metacritic": None},
+        {"name": "Game4", "released": "2021-05-05",
+            "rating": 0.0, "metacritic": 90},
+    ]}
+    return response
+
+
+@patch("rawg_api_extract.requests.get")
+@patch("rawg_api_extract.LOGGER.info")
+def test_fetch_game_pages_yields_filtered_pages(mock_logging, mock_get, rawg_response):
+    """Tests each page is yielded with games lacking a year or ratings filtered out."""
+    mock_get.return_value = rawg_response
+
+    pages = list(fetch_game_pages("fake_key", 2))
+
+    assert len(pages) == 2
+    assert sorted(page for page, _ in pages) == [1, 2]
+    assert pages[0][1].to_dict("records") == [
+        {"Name": "Game1", "Release Year": "2016",
+            "RAWG Rating": 3.5, "Metacritic Rating": 78.0},
+        {"Name": "Game4", "Release Year": "2021",
+            "RAWG Rating": 0.0, "Metacritic Rating": 90.0},
+    ]
+    mock_logging.assert_called_with(
+        "Excluded %s of %s games on page %s (no release year or ratings)", 2, 4, ANY)
+
+
+def test_flatten_page_results_recorded_page():
+    """Tests a recorded RAWG page is flattened and filtered."""
+    with open("fixtures/rawg_games_page.json", encoding="UTF-8") as f:
+        results = json.load(f)["results"]
+
+    games, excluded_count = flatten_page_results(results)
+
+    assert excluded_count == 3
+    assert games["Name"].tolist() == ["The Witcher 3: Wild Hunt", "Portal 2",
+                                      "Starfield", "VVVVVV", "Disco Elysium"]
+    assert games["Release Year"].tolist() == [
+        "2015", "2011", "2023", "2010", "2019"]
+    assert games["Metacritic Rating"].isna().tolist() == [
+        False, False, False, True, False]
+
+
+def test_flatten_page_results_missing_fields():
+    """Tests missing or null fields are treated as having no year or rating."""
+    games, excluded_count = flatten_page_results([
+        {"name": "Game1"},
+        {"name": "Game2", "released": "2020-01-01", "rating": None},
+        {"name": "Game3", "released": "2020-01-01", "metacritic": 50},
+    ])
+
+    assert excluded_count == 2
+    assert games["Name"].tolist() == ["Game3"]
+    assert games["RAWG Rating"].tolist() == [0.0]
+
+
+def test_flatten_page_results_empty():
+    """Tests an empty page gives an empty DataFrame of games."""
+    games, excluded_count = flatten_page_results([])
+
+    assert games.empty
+    assert list(games.columns) == ["Name", "Release Year",
+                                   "RAWG Rating", "Metacritic Rating"]
+    assert excluded_count == 0
+
+
+@patch("rawg_api_extract.requests.get")
+def test_fetch_sampled_games_flattens_pages(mock_get, rawg_response):
+    """Tests the games of every page are returned as one list."""
+    mock_get.return_value = rawg_response
+
+    assert len(fetch_sampled_games("fake_key", 3)) == 6
+
+
+@patch("rawg_api_extract.requests.get")
+@patch("rawg_api_extract.LOGGER.warning")
+def test_fetch_game_pages_skips_failed_pages(mock_logging, mock_get):
+    """Tests pages that fail to download are skipped."""
+    mock_get.return_value.status_code = 500
+
+    assert list(fetch_game_pages("fake_key", 1)) == []
+    mock_logging.assert_called_with(
+        "Failed to fetch page %s (Status Code: %s)", 1, 500)
+
+
+def test_save_in_batches_csv(tmp_path):
+    """Tests pages are saved in batches and combined into one CSV."""
+    filename = str(tmp_path / "rawg.csv")
+    pages = iter([
+        (1, make_page("Game1", metacritic_rating=78)),
+        (2, make_page("Game2", metacritic_rating=None)),
+        (3, make_page("Game3", metacritic_rating=60)),
+    ])
+
+    assert save_in_batches(pages, filename, batch_size=2) == 3
+
+    result = pd.read_csv(filename)
+    assert result["Name"].tolist() == ["Game1", "Game2", "Game3"]
+    assert result["Metacritic Rating"].isna().tolist() == [False, True, False]
+    assert not os.path.exists(f"{filename}.parts")
+
+
+def test_save_in_batches_keeps_parts_on_failure(tmp_path):
+    """Tests completed batches stay on disk when the crawl fails, and are included next run."""
+    filename = str(tmp_path / "rawg.csv")
+
+    def failing_pages():
+        yield 1, make_page("Game1")
+        raise ConnectionError("Lost connection")
+
+    with pytest.raises(ConnectionError):
+        save_in_batches(failing_pages(), filename, batch_size=1)
+
+    assert os.listdir(f"{filename}.parts") == ["part-00000.csv"]
+    assert not os.path.exists(filename)
+
+    save_in_batches(iter([(2, make_page("Game2"))]), filename, batch_size=1)
+    assert pd.read_csv(filename)["Name"].tolist() == ["Game1", "Game2"]
+
+
+@patch("rawg_api_extract.requests.get")
+@patch("rawg_api_extract.LOGGER.info")
+def test_interrupted_crawl_fetches_only_remaining_pages(mock_logging, mock_get, tmp_path):
+    """Tests a resumed crawl fetches only the planned pages that were not saved yet."""
+    filename = str(tmp_path / "rawg.csv")
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"results": [
+        {"name": "Game", "released": "2016-01-01", "rating": 3.5, "metacritic": 78}]}
+    mock_get.return_value = response
+    pages = load_page_plan(filename, 5)
+
+    def interrupted_pages():
+        pages_iter = fetch_game_pages("fake_key", 5, pages)
+        yield next(pages_iter)
+        raise ConnectionError("Lost connection")
+
+    with pytest.raises(ConnectionError):
+        save_in_batches(interrupted_pages(), filename, batch_size=1)
+
+    with open(os.path.join(f"{filename}.parts", PAGE_PLAN_FILE), encoding="UTF-8") as f:
+        assert json.load(f)["remaining"] == pages[1:]
+    remaining = load_page_plan(filename, 5)
+    assert remaining == pages[1:]
+
+    mock_get.reset_mock()
+    assert save_in_batches(fetch_game_pages("fake_key", 5, remaining), filename,
+                           batch_size=1) == 4
+    fetched = [call.kwargs["params"]["page"] for call in mock_get.call_args_list]
+    assert fetched == pages[1:]
+    assert len(pd.read_csv(filename)) == 5
+    assert not os.path.exists(f"{filename}.parts")
+
+
+def test_save_in_batches_parquet(tmp_path):
+    """Tests pages can be saved as Parquet."""
+    filename = str(tmp_path / "rawg.parquet")
+    pages = iter([(i, make_page(f"Game{i}", metacritic_rating=None))
+                  for i in range(3)])
+
+    save_in_batches(pages, filename, batch_size=2, file_format="parquet")
+
+    result = pd.read_parquet(filename)
+    assert result["Name"].tolist() == ["Game0", "Game1", "Game2"]
+    assert result["Metacritic Rating"].dtype == "float64"
+
+
+def test_save_in_batches_no_games(tmp_path):
+    """Tests a file with only a header is written when there are no games."""
+    filename = str(tmp_path / "rawg.csv")
+
+    assert save_in_batches(iter([]), filename) == 0
+    assert list(pd.read_csv(filename).columns) == [
+        "Name", "Release Year", "RAWG Rating", "Metacritic Rating"]
+
+
+def test_write_part_and_combine_parts(tmp_path):
+    """Tests part files are written whole and combined with a single header."""
+    part_paths = [str(tmp_path / f"part-{i}.csv") for i in range(2)]
+    for i, part_path in enumerate(part_paths):
+        write_part([make_page(f"Game{i}")], part_path)
+
+    combine_parts(part_paths, str(tmp_path / "combined.csv"))
+
+    with open(tmp_path / "combined.csv", encoding="UTF-8") as f:
+        assert f.read().count("Name,Release Year") == 1
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
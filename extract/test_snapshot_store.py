@@ -0,0 +1,96 @@
+"""Tests functions for snapshot_store.py."""
+# pylint: skip-file
+import os
+import pandas as pd
+from snapshot_store import (row_keys, record_snapshot, read_manifest, read_rows,
+                            snapshot_as_of, rating_history, ROWS_FILE)
+
+
+def sheet(*rows):
+    return pd.DataFrame(list(rows), columns=["Game", "Release Year", "Rating"])
+
+
+def test_row_keys_count_repeated_rows():
+    """Tests identical rows share a hash but get different occurrences."""
+    keys = row_keys([{"Game": "A"}, {"Game": "B"}, {"Game": "A"}])
+
+    assert keys[0].split(":")[0] == keys[2].split(":")[0]
+    assert [key.split(":")[1] for key in keys] == ["0", "0", "1"]
+
+
+def test_record_snapshot_stores_only_changes(tmp_path):
+    """Tests each snapshot stores new rows once and unchanged sheets add no snapshot."""
+    store_dir = str(tmp_path / "snapshots")
+    first = sheet(["Game1", "2020", "Recommended"], ["Game2", "2021", "Informational"])
+    assert record_snapshot(first, store_dir, "2024-01-01T00:00:00+00:00") == "000001"
+    assert record_snapshot(first, store_dir, "2024-01-02T00:00:00+00:00") is None
+
+    second = sheet(["Game1", "2020", "Not Recommended"], ["Game2", "2021", "Informational"])
+    assert record_snapshot(second, store_dir, "2024-02-01T00:00:00+00:00") == "000002"
+
+    manifest = read_manifest(store_dir)
+    assert [(s["added"], s["removed"]) for s in manifest] == [(2, 0), (1, 1)]
+    assert len(read_rows(store_dir)) == 3
+
+
+def test_snapshot_as_of(tmp_path):
+    """Tests the sheet is rebuilt as it was at the latest snapshot before a date."""
+    store_dir = str(tmp_path / "snapshots")
+    first = sheet(["Game1", "2020", "Recommended"], ["Game2", "2021", "Informational"])
+    second = sheet(["Game2", "2021", "Informational"], ["Game3", "2022", "Recommended"])
+    record_snapshot(first, store_dir, "2024-01-01T00:00:00+00:00")
+    record_snapshot(second, store_dir, "2024-02-01T00:00:00+00:00")
+
+    assert snapshot_as_of(store_dir, "2023-12-31").empty
+    pd.testing.assert_frame_equal(snapshot_as_of(store_dir, "2024-01-15"), first)
+    assert snapshot_as_of(store_dir, "2024-03-01")["Game"].tolist() == ["Game2", "Game3"]
+
+
+def test_snapshot_as_of_keeps_row_order(tmp_path):
+    """Tests changed, inserted and reordered rows are rebuilt in the sheet's order."""
+    store_dir = str(tmp_path / "snapshots")
+    first = sheet(["Header", "", ""], ["Game1", "2020", "Recommended"],
+                  ["Game2", "2021", "Informational"])
+    second = sheet(["Header", "", ""], ["Game0", "2019", "Recommended"],
+                   ["Game1", "2020", "Not Recommended"], ["Game2", "2021", "Informational"])
+    third = sheet(["Header", "", ""], ["Game2", "2021", "Informational"],
+                  ["Game0", "2019", "Recommended"], ["Game1", "2020", "Not Recommended"])
+    record_snapshot(first, store_dir, "2024-01-01T00:00:00+00:00")
+    record_snapshot(second, store_dir, "2024-02-01T00:00:00+00:00")
+    assert record_snapshot(third, store_dir, "2024-03-01T00:00:00+00:00") == "000003"
+
+    pd.testing.assert_frame_equal(snapshot_as_of(store_dir, "2024-02-15"), second)
+    pd.testing.assert_frame_equal(snapshot_as_of(store_dir, "2024-03-15"), third)
+    assert [(s["added"], s["removed"]) for s in read_manifest(store_dir)] == [
+        (3, 0), (2, 1), (0, 0)]
+
+
+def test_rating_history(tmp_path):
+    """Tests only snapshots that change a game's rating are listed, including its removal."""
+    store_dir = str(tmp_path / "snapshots")
+    record_snapshot(sheet(["Game2", "2021", "Informational"]), store_dir, "2024-01-01")
+    record_snapshot(sheet(["Game2", "2021", "Informational"], ["Game1", "2020", "Recommended"]),
+                    store_dir, "2024-02-01")
+    record_snapshot(sheet(["Game2", "2021", "Informational"], ["Game1", "2020", "Not Recommended"]),
+                    store_dir, "2024-03-01")
+    record_snapshot(sheet(["Game2", "2020", "Informational"]), store_dir, "2024-04-01")
+
+    history = rating_history(store_dir, "Game1")
+
+    assert history["Snapshot"].tolist() == ["000002", "000003", "000004"]
+    assert history["Rating"].tolist() == ["Recommended", "Not Recommended", None]
+    assert rating_history(store_dir, "Unknown").empty
+
+
+def test_record_snapshot_after_interrupted_write(tmp_path):
+    """Tests a row cut off by a crash is dropped and stored again by the next snapshot."""
+    store_dir = str(tmp_path / "snapshots")
+    record_snapshot(sheet(["Game1", "2020", "Recommended"]), store_dir, "2024-01-01")
+    with open(os.path.join(store_dir, ROWS_FILE), "a", encoding="UTF-8") as f:
+        f.write('{"hash": "abc", "row": {"Ga')
+
+    record_snapshot(sheet(["Game1", "2020", "Recommended"], ["Game2", "2021", "Recommended"]),
+                    store_dir, "2024-02-01")
+
+    assert snapshot_as_of(store_dir, "2024-02-01")["Game"].tolist() == ["Game1", "Game2"]
+    assert len(read_rows(store_dir)) == 2
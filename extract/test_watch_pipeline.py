@@ -0,0 +1,149 @@
+"""Tests for watch_pipeline.py."""
+# pylint: skip-file
+import os
+import sys
+import tempfile
+import subprocess
+import pytest
+from unittest.mock import patch, MagicMock
+from watch_pipeline import (read_watch_state, write_watch_state, changed_signals, plan_stages,
+                            poll_once, watch, rawg_count, kaggle_version, subprocess_signal,
+                            publish_file, EXTRACT_FOLDER, TRANSFORM_STAGES, PUBLISH_VG_SALES)
+
+
+def test_import_is_lightweight():
+    """Tests importing the watcher does not import the heavy extraction modules."""
+    code = ("import sys, watch_pipeline; "
+            "print(sorted({'pandas', 'gspread', 'kagglehub', 'requests'} & set(sys.modules)))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=EXTRACT_FOLDER,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_polling_with_default_signals_stays_lightweight():
+    """Tests the default signals are checked in other processes, so nothing heavy gets imported."""
+    code = ("import sys, json; from unittest.mock import patch, MagicMock; import watch_pipeline; "
+            "result = MagicMock(stdout='\"v1\"\\n'); "
+            "patch('watch_pipeline.subprocess.run', return_value=result).start(); "
+            "watch_pipeline.poll_once({n: watch_pipeline.subprocess_signal(n) "
+            "for n in watch_pipeline.SIGNALS}, sys.argv[1]); "
+            "print(sorted({'pandas', 'gspread', 'kagglehub', 'requests'} & set(sys.modules)))")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        result = subprocess.run([sys.executable, "-c", code, os.path.join(temp_dir, "state.json")],
+                                cwd=EXTRACT_FOLDER, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+@patch("watch_pipeline.subprocess.run")
+def test_subprocess_signal(mock_run):
+    """Tests a signal is checked by running the watcher with --signal and reading its JSON."""
+    mock_run.return_value.stdout = "12345\n"
+
+    assert subprocess_signal("rawg")() == 12345
+    assert mock_run.call_args.args[0][1:] == ["watch_pipeline.py", "--signal", "rawg"]
+
+
+def test_watch_state_round_trip(tmp_path):
+    """Tests a missing state is empty and a written state is read back."""
+    state_path = str(tmp_path / "state.json")
+    assert read_watch_state(state_path) == {}
+
+    write_watch_state({"rawg": 10}, state_path)
+    assert read_watch_state(state_path) == {"rawg": 10}
+
+
+def test_changed_signals():
+    """Tests new and changed signal values are reported."""
+    assert changed_signals({"sheet": "b", "kaggle": "1", "rawg": 5},
+                           {"sheet": "a", "kaggle": "1"}) == ["sheet", "rawg"]
+
+
+def test_plan_stages():
+    """Tests each extract stage runs once, then the transform, and nothing if unchanged."""
+    stages = plan_stages(["sheet", "kaggle"])
+
+    assert stages == [(EXTRACT_FOLDER, "extract_full.py"), PUBLISH_VG_SALES, *TRANSFORM_STAGES]
+    assert plan_stages([]) == []
+
+
+@patch("watch_pipeline.run_stage")
+def test_poll_once_runs_stages_only_on_change(mock_run_stage, tmp_path):
+    """Tests stages run when a signal changes and not when nothing changed."""
+    state_path = str(tmp_path / "state.json")
+    signals = {"rawg": lambda: 100}
+
+    assert poll_once(signals, state_path) == ["rawg"]
+    assert mock_run_stage.call_count == 1 + len(TRANSFORM_STAGES)
+
+    assert poll_once(signals, state_path) == []
+    assert mock_run_stage.call_count == 1 + len(TRANSFORM_STAGES)
+
+
+@patch("watch_pipeline.run_stage")
+def test_kaggle_change_publishes_the_sales_data(mock_run_stage, tmp_path):
+    """Tests the fresh sales data is copied to the transform folder before the transform runs."""
+    poll_once({"kaggle": lambda: "2"}, str(tmp_path / "state.json"))
+
+    stages = [call.args for call in mock_run_stage.call_args_list]
+    assert stages.index(PUBLISH_VG_SALES) < stages.index(TRANSFORM_STAGES[0])
+
+
+def test_publish_file(tmp_path):
+    """Tests an extracted file is copied over the transform folder's stale copy."""
+    (tmp_path / "extract").mkdir()
+    (tmp_path / "transform").mkdir()
+    (tmp_path / "extract" / "sales.csv").write_text("new")
+    (tmp_path / "transform" / "sales.csv").write_text("old")
+
+    publish_file("sales.csv", str(tmp_path / "extract"), str(tmp_path / "transform"))
+
+    assert (tmp_path / "transform" / "sales.csv").read_text() == "new"
+    assert sorted(os.listdir(tmp_path / "transform")) == ["sales.csv"]
+
+
+@patch("watch_pipeline.run_stage", side_effect=subprocess.CalledProcessError(1, "script"))
+def test_poll_once_keeps_state_when_a_stage_fails(mock_run_stage, tmp_path):
+    """Tests a failed stage leaves the state unchanged, so the next poll retries it."""
+    state_path = str(tmp_path / "state.json")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        poll_once({"rawg": lambda: 100}, state_path)
+
+    assert read_watch_state(state_path) == {}
+
+
+def test_watch_backs_off_after_failures(tmp_path):
+    """Tests the wait doubles up to the maximum after failures and resets after a success."""
+    results = iter([RuntimeError("offline"), RuntimeError("offline"), RuntimeError("offline"), 1])
+
+    def signal():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    sleep = MagicMock()
+    with patch("watch_pipeline.run_stage"):
+        watch({"rawg": signal}, str(tmp_path / "state.json"), interval=10, max_backoff=30,
+              max_polls=4, sleep=sleep)
+
+    assert [call.args[0] for call in sleep.call_args_list] == [20, 30, 30]
+
+
+@patch.dict("watch_pipeline.ENV", {"RAWG_KEY": "key"})
+@patch("watch_pipeline.get_json", return_value={"count": 12345})
+def test_rawg_count(mock_get_json):
+    """Tests the RAWG game count is read from a one-game page."""
+    assert rawg_count() == 12345
+    assert mock_get_json.call_args.args[0].endswith("?key=key&page_size=1")
+
+
+@patch.dict("watch_pipeline.ENV", {"KAGGLE_USERNAME": "user", "KAGGLE_KEY": "key"})
+@patch("watch_pipeline.get_json", return_value={"currentVersionNumber": 3})
+def test_kaggle_version_reads_metadata(mock_get_json):
+    """Tests the Kaggle version is read from the dataset's metadata with basic authentication."""
+    assert kaggle_version("owner/dataset") == "3"
+    assert mock_get_json.call_args.args[0].endswith("/datasets/view/owner/dataset")
+    assert mock_get_json.call_args.args[1]["Authorization"] == "Basic dXNlcjprZXk="
@@ -0,0 +1,216 @@
+"""A file to watch the upstream data sources and rerun the pipeline only when one of them changes.
+
+Each poll checks cheap change signals: the sheet's last update time, the latest Kaggle dataset
+version and the RAWG game count, each read from metadata rather than the data itself. Every check
+and every stage runs in its own short-lived process, so the idle watcher never keeps the Google,
+Kaggle or pipeline modules loaded.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import logging
+import argparse
+import subprocess
+import urllib.parse
+import urllib.request
+from os import environ as ENV
+
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+EXTRACT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+TRANSFORM_FOLDER = os.path.join(EXTRACT_FOLDER, "..", "transform")
+
+WATCH_STATE_FILEPATH = "watch_state.json"
+POLL_INTERVAL_SECONDS = 3600
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+WCD_GOOGLE_SHEET = "https://docs.google.com/spreadsheets/d/1AVTZPJij5PQmlWAkYdDahBrxDiwqWMGsWEcEnpdKTa4/edit?gid=0"
+VG_DATASET_NAME = "gregorut/videogamesales"
+RAWG_GAMES_URL = "https://api.rawg.io/api/games"
+KAGGLE_DATASET_URL = "https://www.kaggle.com/api/v1/datasets/view/{dataset_name}"
+SIGNAL_TIMEOUT_SECONDS = 120
+
+# extract_full.py saves the sales data in this folder, but the transform reads it from its own
+VG_SALES_FILE = "videogame_sales.csv"
+PUBLISH_VG_SALES = (EXTRACT_FOLDER, "watch_pipeline.py", "--publish", VG_SALES_FILE)
+
+# The stages each signal triggers, as (folder, script, *arguments), in the order they must run
+EXTRACT_STAGES = {
+    "sheet": [(EXTRACT_FOLDER, "extract_full.py"), PUBLISH_VG_SALES],
+    "kaggle": [(EXTRACT_FOLDER, "extract_full.py"), PUBLISH_VG_SALES],
+    "rawg": [(EXTRACT_FOLDER, "rawg_api_extract.py")],
+}
+TRANSFORM_STAGES = [(TRANSFORM_FOLDER, "clean_csvs.py"), (TRANSFORM_FOLDER, "fuzzy_matching.py")]
+
+
+def sheet_revision(sheet_url: str = WCD_GOOGLE_SHEET) -> str:
+    """Gets the time the Google Sheet was last updated."""
+    import gspread  # pylint: disable=import-outside-toplevel
+    from oauth2client.service_account import ServiceAccountCredentials  # pylint: disable=import-outside-toplevel
+
+    scope = ["https://spreadsheets.google.com/feeds",
+             "https://www.googleapis.com/auth/drive"]
+    creds = ServiceAccountCredentials.from_json_keyfile_name(ENV["GOOGLE_SHEET_PATH"], scope)
+    return gspread.authorize(creds).open_by_url(sheet_url).get_lastUpdateTime()
+
+
+def get_json(url: str, headers: dict = None):
+    """Gets a JSON response. Raises an HTTPError for error statuses."""
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)
+
+
+def kaggle_version(dataset_name: str = VG_DATASET_NAME) -> str:
+    """Gets the latest version number of a Kaggle dataset from its metadata, without downloading it."""
+    credentials = f"{ENV['KAGGLE_USERNAME']}:{ENV['KAGGLE_KEY']}".encode("utf-8")
+    metadata = get_json(KAGGLE_DATASET_URL.format(dataset_name=dataset_name),
+                        {"Authorization": f"Basic {base64.b64encode(credentials).decode('ascii')}"})
+    return str(metadata["currentVersionNumber"])
+
+
+def rawg_count(api_key: str = None) -> int:
+    """Gets the number of games RAWG has, requesting a single game per page."""
+    query = urllib.parse.urlencode({"key": api_key or ENV["RAWG_KEY"], "page_size": 1})
+    return get_json(f"{RAWG_GAMES_URL}?{query}")["count"]
+
+
+SIGNALS = {"sheet": sheet_revision, "kaggle": kaggle_version, "rawg": rawg_count}
+
+
+def subprocess_signal(name: str):
+    """Makes a signal that checks SIGNALS[name] in its own process and returns its value."""
+    def signal():
+        result = subprocess.run([sys.executable, "watch_pipeline.py", "--signal", name],
+                                cwd=EXTRACT_FOLDER, capture_output=True, text=True, check=True,
+                                timeout=SIGNAL_TIMEOUT_SECONDS)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    return signal
+
+
+def publish_file(file_name: str, source_folder: str = EXTRACT_FOLDER,
+                 destination_folder: str = TRANSFORM_FOLDER) -> None:
+    """Copies an extracted file to the transform folder through a temporary file."""
+    destination_path = os.path.join(destination_folder, file_name)
+    shutil.copy2(os.path.join(source_folder, file_name), f"{destination_path}.tmp")
+    os.replace(f"{destination_path}.tmp", destination_path)
+    LOGGER.info("Published %s to %s", file_name, destination_folder)
+
+
+def read_watch_state(state_path: str) -> dict:
+    """Reads the signal values the pipeline last ran with, or an empty dict if it never ran."""
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def write_watch_state(state: dict, state_path: str) -> None:
+    """Writes the signal values to a temporary file, then renames it to state_path."""
+    with open(f"{state_path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump(state, f)
+    os.replace(f"{state_path}.tmp", state_path)
+
+
+def check_signals(signals: dict) -> dict:
+    """Gets the current value of every signal. Raises if any signal cannot be checked."""
+    return {name: signal() for name, signal in signals.items()}
+
+
+def changed_signals(current: dict, previous: dict) -> list[str]:
+    """Lists the signals whose value differs from the previous run."""
+    return [name for name, value in current.items() if previous.get(name) != value]
+
+
+def plan_stages(changed: list[str]) -> list[tuple]:
+    """Lists the stages to run for the changed signals, each once, followed by the transform."""
+    stages = []
+    for name in changed:
+        for stage in EXTRACT_STAGES.get(name, []):
+            if stage not in stages:
+                stages.append(stage)
+    return [*stages, *TRANSFORM_STAGES] if stages else []
+
+
+def run_stage(folder: str, script: str, *arguments: str) -> None:
+    """Runs a pipeline script in its own process. Raises CalledProcessError if it fails."""
+    LOGGER.info("Running %s", " ".join([script, *arguments]))
+    subprocess.run([sys.executable, script, *arguments], cwd=folder, check=True)
+
+
+def poll_once(signals: dict, state_path: str) -> list[str]:
+    """Checks the signals and runs the stages for any that changed. Returns the changed signals.
+
+    The new signal values are only saved once every stage has succeeded, so a failed run is
+    retried on the next poll.
+    """
+    current = check_signals(signals)
+    previous = read_watch_state(state_path)
+    changed = changed_signals(current, previous)
+    if not changed:
+        LOGGER.info("No upstream changes")
+        return []
+
+    LOGGER.info("Upstream changes in: %s", ", ".join(changed))
+    for stage in plan_stages(changed):
+        run_stage(*stage)
+    write_watch_state({**previous, **current}, state_path)
+    return changed
+
+
+def watch(signals: dict = None, state_path: str = WATCH_STATE_FILEPATH,
+          interval: float = POLL_INTERVAL_SECONDS, max_backoff: float = MAX_BACKOFF_SECONDS,
+          max_polls: int = None, sleep=time.sleep) -> None:
+    """Polls the signals every interval seconds, running the pipeline when they change.
+
+    After a failed poll the wait doubles, up to max_backoff, until a poll succeeds again. By
+    default every signal in SIGNALS is checked in its own process.
+    """
+    signals = signals or {name: subprocess_signal(name) for name in SIGNALS}
+    wait = interval
+    polls = 0
+    while max_polls is None or polls < max_polls:
+        polls += 1
+        try:
+            poll_once(signals, state_path)
+            wait = interval
+        except Exception as e:  # pylint: disable=broad-except
+            wait = min(wait * 2, max_backoff)
+            LOGGER.error("Poll failed, retrying in %s seconds: %s", wait, e)
+
+        if max_polls is None or polls < max_polls:
+            sleep(wait)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_SECONDS,
+                        help="seconds between polls")
+    parser.add_argument("--max-backoff", type=float, default=MAX_BACKOFF_SECONDS,
+                        help="longest wait in seconds after failed polls")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    parser.add_argument("--signal", choices=SIGNALS,
+                        help="print the current value of one signal as JSON and exit")
+    parser.add_argument("--publish", metavar="FILE",
+                        help="copy an extracted file to the transform folder and exit")
+    args = parser.parse_args()
+
+    logger_setup("watch_pipeline_log.log", "logs")
+    from dotenv import load_dotenv  # pylint: disable=import-outside-toplevel
+    load_dotenv()
+
+    if args.signal:
+        print(json.dumps(SIGNALS[args.signal]()))
+        sys.exit(0)
+    if args.publish:
+        publish_file(args.publish)
+        sys.exit(0)
+
+    LOGGER.info("Starting pipeline watcher")
+    watch(interval=args.interval, max_backoff=args.max_backoff,
+          max_polls=1 if args.once else None)
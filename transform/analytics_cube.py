@@ -0,0 +1,165 @@
+"""A file to precompute a cube of sales and review scores per WCD Rating, release year and publisher."""
+import os
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from partitioned_store import read_output
+from year_index import UNKNOWN_YEAR, parse_years
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+CUBE_FILE = "analytics_cube.parquet"
+CUBE_ROWS_FILE = "analytics_cube_rows.parquet"
+CUBE_DIMENSIONS = ["WCD Rating", "Release Year", "Publisher"]
+CUBE_MEASURES = ["North American Sales", "European Sales", "Japanese Sales", "Other Sales",
+                 "Global Sales", "RAWG Rating", "Metacritic Rating"]
+UNKNOWN = "Unknown"
+ROWS_DIGEST_KEY = b"rows_digest"
+
+
+def cube_rows(combined_data: pd.DataFrame) -> pd.DataFrame:
+    """Selects the dimension and measure columns of the combined data with consistent types.
+
+    Rows are indexed by their hash and occurrence, so unchanged rows keep the same index.
+    """
+    rows = pd.DataFrame(index=range(len(combined_data)))
+    for dimension in ["WCD Rating", "Publisher"]:
+        rows[dimension] = (combined_data[dimension].fillna(UNKNOWN).astype(str).to_numpy()
+                           if dimension in combined_data.columns else UNKNOWN)
+    rows.insert(1, "Release Year", parse_years(combined_data["Release Year"])
+                if "Release Year" in combined_data.columns else UNKNOWN_YEAR)
+    for measure in CUBE_MEASURES:
+        rows[measure] = (pd.to_numeric(combined_data[measure], errors="coerce").to_numpy()
+                         if measure in combined_data.columns else np.nan)
+
+    row_hashes = pd.util.hash_pandas_object(rows, index=False)
+    occurrences = row_hashes.groupby(row_hashes.to_numpy()).cumcount()
+    rows.index = pd.MultiIndex.from_arrays([row_hashes.to_numpy(), occurrences.to_numpy()],
+                                           names=["Row Hash", "Occurrence"])
+    return rows
+
+
+def aggregate_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    """Aggregates rows into a count of games plus the sum and non-null count of every measure."""
+    grouped = rows.groupby(CUBE_DIMENSIONS, sort=True)
+    sums = grouped[CUBE_MEASURES].sum(min_count=0).add_suffix(" Sum")
+    counts = grouped[CUBE_MEASURES].count().add_suffix(" Count")
+    partial = pd.concat([grouped.size().rename("Games"), sums, counts], axis=1)
+    return partial.astype({column: np.int64 for column in partial.columns
+                           if column == "Games" or column.endswith(" Count")})
+
+
+def add_means(cube: pd.DataFrame) -> pd.DataFrame:
+    """Adds the mean of every measure, left empty where the measure has no values."""
+    cube = cube.copy()
+    for measure in CUBE_MEASURES:
+        counts = cube[f"{measure} Count"]
+        cube[f"{measure} Mean"] = (cube[f"{measure} Sum"] / counts).where(counts > 0)
+    return cube
+
+
+def apply_delta(cube: pd.DataFrame, rows: pd.DataFrame, added: pd.DataFrame,
+                removed: pd.DataFrame) -> pd.DataFrame:
+    """Recalculates the cells of a cube that rows were added to or removed from.
+
+    Touched cells are aggregated again from the current rows rather than adjusted by the
+    delta, so their sums do not drift from repeated float additions and subtractions.
+    """
+    touched = pd.MultiIndex.from_frame(pd.concat([added, removed])[CUBE_DIMENSIONS]).unique()
+    totals = cube.drop(columns=[f"{measure} Mean" for measure in CUBE_MEASURES])
+    totals = totals[~totals.index.isin(touched)]
+    touched_rows = rows[pd.MultiIndex.from_frame(rows[CUBE_DIMENSIONS]).isin(touched)]
+    totals = pd.concat([totals, aggregate_rows(touched_rows)])
+    return add_means(totals.sort_index())
+
+
+def build_cube(combined_data: pd.DataFrame) -> pd.DataFrame:
+    """Builds the cube of the combined data from scratch."""
+    return add_means(aggregate_rows(cube_rows(combined_data)))
+
+
+def rows_digest(rows: pd.DataFrame) -> str:
+    """Identifies the set of rows a cube was built from."""
+    return hashlib.sha256(np.sort(rows.index.get_level_values("Row Hash").to_numpy(
+        dtype=np.uint64)).tobytes()).hexdigest()
+
+
+def write_parquet(df: pd.DataFrame, parquet_file: str, metadata: dict = None) -> None:
+    """Writes a DataFrame to a temporary Parquet file, then renames it to parquet_file."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    table = table.replace_schema_metadata({**table.schema.metadata, **(metadata or {})})
+    temp_path = f"{parquet_file}.tmp"
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, parquet_file)
+
+
+def read_cube_digest(cube_file: str) -> str:
+    """Reads the digest of the rows a saved cube was built from."""
+    return pq.read_schema(cube_file).metadata.get(ROWS_DIGEST_KEY, b"").decode("utf-8")
+
+
+def load_cube(cube_file: str = CUBE_FILE) -> pd.DataFrame:
+    """Loads a saved cube, indexed and sorted by its dimensions."""
+    if not os.path.exists(cube_file):
+        LOGGER.error("Cube not found: %s", cube_file)
+        raise FileNotFoundError(f"Cube not found: {cube_file}")
+    return pd.read_parquet(cube_file).sort_index()
+
+
+def refresh_cube(combined_data: pd.DataFrame, cube_file: str = CUBE_FILE,
+                 rows_file: str = CUBE_ROWS_FILE) -> pd.DataFrame:
+    """Updates the saved cube with the rows added to and removed from the combined data.
+
+    The rows the cube was built from are saved in rows_file. If either file is missing, or they
+    do not belong together, the cube is built from scratch.
+    """
+    rows = cube_rows(combined_data)
+    previous_rows = (pd.read_parquet(rows_file)
+                     if os.path.exists(cube_file) and os.path.exists(rows_file) else None)
+
+    if previous_rows is not None and read_cube_digest(cube_file) == rows_digest(previous_rows):
+        added = rows[~rows.index.isin(previous_rows.index)]
+        removed = previous_rows[~previous_rows.index.isin(rows.index)]
+        LOGGER.info("Refreshing cube with %s added and %s removed rows",
+                    len(added), len(removed))
+        cube = apply_delta(load_cube(cube_file), rows, added, removed)
+    else:
+        LOGGER.info("Building cube from %s rows", len(rows))
+        cube = add_means(aggregate_rows(rows))
+
+    # The cube records which rows it was built from, so if the rows file is not replaced after it
+    # the mismatch is caught next time instead of the delta being applied twice
+    write_parquet(cube, cube_file, {ROWS_DIGEST_KEY: rows_digest(rows).encode("utf-8")})
+    write_parquet(rows, rows_file)
+    LOGGER.info("Saved cube of %s cells to %s", len(cube), cube_file)
+    return cube
+
+
+def query_cube(cube: pd.DataFrame, rating: str = None, year: int = None,
+               publisher: str = None) -> pd.DataFrame:
+    """Selects the cells of a cube matching the given dimension values; None matches every value."""
+    selection = tuple(slice(None) if value is None else [value]
+                      for value in (rating, year, publisher))
+    try:
+        return cube.loc[selection, :]
+    except KeyError:
+        return cube.iloc[0:0]
+
+
+def rollup(cube: pd.DataFrame, dimensions: list[str]) -> pd.DataFrame:
+    """Combines the cells of a cube over the dimensions that are not listed."""
+    totals = cube.drop(columns=[f"{measure} Mean" for measure in CUBE_MEASURES])
+    return add_means(totals.groupby(level=dimensions, sort=True).sum())
+
+
+if __name__ == "__main__":
+    logger_setup("analytics_cube_log.log", "logs")
+    LOGGER.info("Starting analytics cube refresh")
+
+    refresh_cube(read_output("combined_video_game_data.csv"))
+
+    LOGGER.info("Analytics cube refresh completed")
@@ -0,0 +1,269 @@
+"""A file to benchmark the transformation steps on synthetic video game data."""
+import os
+import logging
+import random
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from fuzzy_matching import match_row, build_combined_frame, match_positions, OUTPUT_COLUMNS
+from lsh_index import build_lsh_index
+from name_store import (CHUNKS_PER_PROCESS, write_name_store, store_match_positions,
+                        pool_match_positions)
+from partitioned_store import write_partitioned, read_partitioned
+from year_index import build_year_index, year_candidates, year_groups
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+TITLE_WORDS = ["Dark", "Souls", "Legend", "Quest", "Shadow", "Dragon", "Star", "War",
+               "Fantasy", "Final", "Knight", "Blood", "City", "Racer", "Hunter", "Wild",
+               "Mystery", "Tales", "Kingdom", "Hearts", "Space", "Empire", "Zero", "Rising"]
+
+
+def make_titles(count: int, seed: int = 0) -> list[str]:
+    """Generates random video game titles."""
+    rng = random.Random(seed)
+    return [f"{' '.join(rng.sample(TITLE_WORDS, rng.randint(2, 4)))} {rng.randint(1, 9)}"
+            for _ in range(count)]
+
+
+def make_synthetic_data(wcd_rows: int, target_rows: int, seed: int = 0) -> tuple:
+    """Generates WCD, video game sales and RAWG DataFrames where about half of the WCD games match."""
+    rng = np.random.default_rng(seed)
+    target_titles = make_titles(target_rows, seed)
+    wcd_titles = [title if i % 2 == 0 else title.upper() + " Remake"
+                  for i, title in enumerate(rng.choice(target_titles, wcd_rows))]
+
+    wcd_data = pd.DataFrame({
+        "Game": wcd_titles,
+        "Release Year": rng.integers(1990, 2025, wcd_rows).astype(str),
+        "Developer": "Developer",
+        "Publisher": "Publisher",
+        "Rating": rng.choice(["Recommended", "Informational", "Not Recommended"], wcd_rows),
+        "Review": "Review text",
+    })
+    vg_sales_data = pd.DataFrame({"Name": target_titles} | {
+        column: rng.random(target_rows).round(2)
+        for column in ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales", "Global_Sales"]
+    })
+    rawg_data = pd.DataFrame({
+        "Name": target_titles,
+        "Release Year": rng.integers(1990, 2025, target_rows),
+        "RAWG Rating": rng.random(target_rows).round(2) * 5,
+        "Metacritic Rating": rng.integers(40, 100, target_rows).astype(float),
+    })
+    return wcd_data, vg_sales_data, rawg_data
+
+
+def measure(func, *args, **kwargs) -> dict:
+    """Times a function, then runs it again under tracemalloc to measure its peak allocations."""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_mb": peak / 1e6}
+
+
+def benchmark_combined_frame(wcd_rows: int = 10000, target_rows: int = 2000) -> pd.DataFrame:
+    """Compares building the combined data with apply(match_row) against build_combined_frame."""
+    wcd_data, vg_sales_data, rawg_data = make_synthetic_data(wcd_rows, target_rows)
+    return pd.DataFrame({
+        "apply(match_row)": measure(wcd_data.apply, match_row, axis=1,
+                                    args=(vg_sales_data, rawg_data)),
+        "build_combined_frame": measure(build_combined_frame, wcd_data,
+                                        vg_sales_data, rawg_data),
+    }).T
+
+
+def benchmark_lsh_matching(source_rows: int = 1000, target_rows: int = 20000,
+                           settings: tuple = ((128, 32), (128, 16), (64, 8))) -> pd.DataFrame:
+    """Compares exact matching with LSH matching for each (num_perm, bands) setting.
+
+    Recall is the share of the exact matches that LSH matching also finds.
+    """
+    target_names = make_titles(target_rows)
+    rng = random.Random(1)
+    source_names = [name.replace(" ", "  ", 1) if i % 2 else name
+                    for i, name in enumerate(rng.sample(target_names, source_rows))]
+
+    start = time.perf_counter()
+    exact = match_positions(source_names, target_names)
+    results = {"exact": {"seconds": time.perf_counter() - start, "recall": 1.0}}
+
+    for num_perm, bands in settings:
+        start = time.perf_counter()
+        lsh_index = build_lsh_index(target_names, num_perm, bands)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        approximate = match_positions(source_names, target_names, lsh_index=lsh_index)
+        matched = exact >= 0
+        results[f"lsh num_perm={num_perm} bands={bands}"] = {
+            "seconds": time.perf_counter() - start,
+            "build_seconds": build_seconds,
+            "recall": float((approximate[matched] == exact[matched]).mean()) if matched.any()
+            else 1.0,
+        }
+
+    return pd.DataFrame(results).T
+
+
+def benchmark_thread_scaling(source_rows: int = 2000, target_rows: int = 20000,
+                             worker_counts: tuple = (1, 2, 4)) -> pd.DataFrame:
+    """Compares matching through a name store on threads (rapidfuzz workers) with a process pool.
+
+    Both split the source names into the same length chunks and score the same length-pruned
+    targets, so only the kind of worker differs.
+    """
+    target_names = make_titles(target_rows)
+    source_names = make_titles(source_rows, seed=1)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as store_dir:
+        write_name_store(pd.Series(target_names, dtype=object), store_dir)
+        for workers in worker_counts:
+            start = time.perf_counter()
+            store_match_positions(source_names, store_dir, threads=workers,
+                                  chunk_count=workers * CHUNKS_PER_PROCESS)
+            results[f"threads={workers}"] = {"seconds": time.perf_counter() - start}
+
+            start = time.perf_counter()
+            pool_match_positions(source_names, store_dir, workers)
+            results[f"processes={workers}"] = {"seconds": time.perf_counter() - start}
+
+    return pd.DataFrame(results).T
+
+
+def benchmark_year_index(source_rows: int = 2000, target_rows: int = 20000,
+                         tolerances: tuple = (0, 1, 2), match_threshold: int = 80) -> pd.DataFrame:
+    """Compares exact matching with matching within a release year window, for each tolerance.
+
+    Most source titles are released within a year of their match, and one in ten (re-releases)
+    five years later. Recall is the share of the exact matches the year window also finds.
+    """
+    rng = np.random.default_rng(1)
+    target_names = make_titles(target_rows)
+    target_years = rng.integers(1990, 2025, target_rows)
+    picked = rng.choice(target_rows, source_rows, replace=False)
+    source_names = [target_names[i].replace(" ", "  ", 1) for i in picked]
+    shifts = np.where(rng.random(source_rows) < 0.1, 5, rng.integers(-1, 2, source_rows))
+    source_years = target_years[picked] + shifts
+
+    start = time.perf_counter()
+    exact = match_positions(source_names, target_names, match_threshold)
+    results = {"exact": {"seconds": time.perf_counter() - start,
+                         "comparisons": source_rows * target_rows, "recall": 1.0}}
+
+    matched = exact >= 0
+    for tolerance in tolerances:
+        year_index = build_year_index(target_names, target_years, tolerance)
+        start = time.perf_counter()
+        windowed = match_positions(source_names, target_names, match_threshold,
+                                   year_index=year_index, source_years=source_years)
+        seconds = time.perf_counter() - start
+        lengths = np.array([len(name) for name in source_names])
+        comparisons = sum(len(group) * len(year_candidates(year_index, year, lengths[group].min(),
+                                                           lengths[group].max(), match_threshold))
+                          for year, group in year_groups(source_years).items())
+        # Titles can repeat, so a match counts if it has the same name as the exact match
+        found = [windowed[i] >= 0 and target_names[windowed[i]] == target_names[exact[i]]
+                 for i in np.flatnonzero(matched)]
+        results[f"year tolerance={tolerance}"] = {
+            "seconds": seconds,
+            "comparisons": comparisons,
+            "recall": float(np.mean(found)) if found else 1.0,
+        }
+
+    return pd.DataFrame(results).T
+
+
+def make_combined_data(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Generates combined video game data, with a few rows missing their release year."""
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1990, 2025, rows).astype(str).astype(object)
+    years[rng.random(rows) < 0.02] = "N/A"
+    data = {column: rng.random(rows).round(2) for column in OUTPUT_COLUMNS}
+    data.update({
+        "Name": make_titles(rows, seed),
+        "Release Year": years,
+        "Developer": rng.choice(["Studio A", "Studio B", "Studio C"], rows),
+        "Publisher": rng.choice(["Publisher A", "Publisher B"], rows),
+        "WCD Rating": rng.choice(["Recommended", "Informational", "Not Recommended"], rows),
+        "WCD Review": rng.choice(["Review text", "A longer review text about the game"], rows),
+    })
+    return pd.DataFrame(data, columns=OUTPUT_COLUMNS)
+
+
+def folder_size_mb(path: str) -> float:
+    """Adds up the size of the files in a folder, or of a single file."""
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1e6
+
+
+def benchmark_output_formats(rows: int = 200000, years: tuple = (2020, 2021, 2022),
+                             columns: tuple = ("Name", "WCD Rating")) -> pd.DataFrame:
+    """Compares saving combined data as a CSV (with its index) against partitioned Parquet files.
+
+    Each format is timed writing, reading everything, and reading only some years and columns.
+    """
+    combined = make_combined_data(rows)
+    columns = list(columns)
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_file = os.path.join(temp_dir, "combined.csv")
+        start = time.perf_counter()
+        combined.to_csv(csv_file, index=True)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        pd.read_csv(csv_file)
+        read_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        csv_data = pd.read_csv(csv_file, usecols=[*columns, "Release Year"])
+        csv_data = csv_data.loc[pd.to_numeric(csv_data["Release Year"], errors="coerce")
+                                .isin(years), columns]
+        results["csv"] = {"write_seconds": write_seconds, "size_mb": folder_size_mb(csv_file),
+                          "read_seconds": read_seconds,
+                          "pruned_read_seconds": time.perf_counter() - start}
+
+        output_dir = os.path.join(temp_dir, "combined")
+        start = time.perf_counter()
+        write_partitioned(combined, output_dir)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        read_partitioned(output_dir)
+        read_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        read_partitioned(output_dir, years=years, columns=columns)
+        results["partitioned"] = {"write_seconds": write_seconds,
+                                  "size_mb": folder_size_mb(output_dir),
+                                  "read_seconds": read_seconds,
+                                  "pruned_read_seconds": time.perf_counter() - start}
+
+    return pd.DataFrame(results).T
+
+
+if __name__ == "__main__":
+    logger_setup("benchmarks_log.log", "logs", loglevel=logging.WARNING)
+
+    print("Combined frame construction (10k WCD rows):")
+    print(benchmark_combined_frame())
+
+    print("LSH against exact matching (1k names against 20k targets):")
+    print(benchmark_lsh_matching())
+
+    print("Threads against processes (2k names against 20k targets):")
+    print(benchmark_thread_scaling())
+
+    print("Year and length window against exact matching (2k names against 20k targets):")
+    print(benchmark_year_index())
+
+    print("CSV against partitioned Parquet output (200k combined rows):")
+    print(benchmark_output_formats())
@@ -2,12 +2,19 @@
 
 import os
 import logging
+import argparse
+import numpy as np
 import pandas as pd
 
+from partitioned_store import OUTPUT_FORMATS, write_output
 from utils.logging_config import logger_setup
 
 LOGGER = logging.getLogger(__name__)
 
+EDITION_TAG_PATTERN = (r"(?:(?:\s+|\s*[-:(\[]\s*)(?:(?:game of the year|definitive|deluxe|complete|"
+                       r"special|enhanced|ultimate|anniversary|collector's|remastered) edition|"
+                       r"goty|remastered|remaster|director's cut)[)\]]?)+$")
+
 
 def load_data(csv_file: str) -> pd.DataFrame:
     """Loads data from specified CSV file."""
@@ -41,8 +48,62 @@ def validate_column_count(df: pd.DataFrame, expected_column_count: int) -> None:
                        expected_column_count, actual_column_count)
 
 
-def clean_woke_content_detector_data() -> pd.DataFrame:
-    """Cleans the Woke Content Detector data and saves it to a CSV."""
+def normalise_titles(titles: pd.Series, strip_editions: bool = True) -> pd.Series:
+    """Builds lowercase, punctuation-free title keys used to spot near-duplicate titles."""
+    keys = titles.fillna("").astype(str).str.lower()
+    if strip_editions:
+        keys = keys.str.replace(EDITION_TAG_PATTERN, "", regex=True)
+    keys = keys.str.replace(r"[^\w\s]", " ", regex=True)
+    return keys.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def drop_exact_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """Removes exact duplicate rows by comparing vectorised row hashes."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    return df[~row_hashes.duplicated().to_numpy()]
+
+
+def collapse_near_duplicates(df: pd.DataFrame, title_column: str,
+                             year_column: str = "Release Year") -> tuple:
+    """Keeps the first row of each normalised title (and release year) group.
+
+    Missing and punctuation-only titles have an empty key and are never collapsed.
+    Returns the collapsed DataFrame and a report of which rows were merged into which.
+    """
+    keys = normalise_titles(df[title_column]).to_frame("Title Key")
+    if year_column in df.columns:
+        keys[year_column] = df[year_column].astype(str)
+
+    key_codes, _ = pd.factorize(
+        pd.util.hash_pandas_object(keys, index=False))
+    _, first_positions = np.unique(key_codes, return_index=True)
+    is_duplicate = (pd.Series(key_codes).duplicated().to_numpy() &
+                    (keys["Title Key"] != "").to_numpy())
+    kept_positions = first_positions[key_codes[is_duplicate]]
+
+    report = pd.DataFrame({
+        "Kept Row": df.index[kept_positions],
+        "Kept Title": df[title_column].to_numpy()[kept_positions],
+        "Merged Row": df.index[is_duplicate],
+        "Merged Title": df[title_column].to_numpy()[is_duplicate],
+    })
+    return df[~is_duplicate], report
+
+
+def deduplicate(df: pd.DataFrame, title_column: str) -> pd.DataFrame:
+    """Removes exact and near-duplicate rows, logging the report of near-duplicates merged."""
+    df = drop_exact_duplicates(df)
+    df, report = collapse_near_duplicates(df, title_column)
+
+    if not report.empty:
+        LOGGER.info("Collapsed %s near-duplicate rows on %s:\n%s",
+                    len(report), title_column, report.to_string(index=False))
+
+    return df.reset_index(drop=True)
+
+
+def clean_woke_content_detector_data(output_format: str = "csv") -> pd.DataFrame:
+    """Cleans the Woke Content Detector data and saves it in the output format."""
     expected_column_count = 6
 
     try:
@@ -70,9 +131,9 @@ def clean_woke_content_detector_data() -> pd.DataFrame:
         woke_data = woke_data.replace("（", "(", regex=True)
         woke_data = woke_data.replace("）", ")", regex=True)
 
-        woke_data = woke_data.drop_duplicates().reset_index(drop=True)
+        woke_data = deduplicate(woke_data, "Game")
 
-        woke_data.to_csv("clean_woke_content_detector.csv", index=True)
+        write_output(woke_data, "clean_woke_content_detector.csv", output_format, index=True)
         LOGGER.info("Successfully cleaned and saved Woke Content Detector data")
         return woke_data
     except Exception as e:
@@ -80,8 +141,8 @@ def clean_woke_content_detector_data() -> pd.DataFrame:
         return None
 
 
-def clean_rawg_data() -> pd.DataFrame:
-    """Cleans the data from the RAWG API and saves it to a CSV."""
+def clean_rawg_data(output_format: str = "csv") -> pd.DataFrame:
+    """Cleans the data from the RAWG API and saves it in the output format."""
 
     expected_column_count = 4
     try:
@@ -92,9 +153,9 @@ def clean_rawg_data() -> pd.DataFrame:
 
         rawg_data = rawg_data.replace("’", "'", regex=True)
         rawg_data = rawg_data.replace("–", "-", regex=True)
-        rawg_data = rawg_data.drop_duplicates().reset_index(drop=True)
+        rawg_data = deduplicate(rawg_data, "Name")
 
-        rawg_data.to_csv("clean_rawg_video_games.csv", index=True)
+        write_output(rawg_data, "clean_rawg_video_games.csv", output_format, index=True)
         LOGGER.info("Successfully cleaned and saved RAWG data")
         return rawg_data
     except Exception as e:
@@ -103,10 +164,15 @@ def clean_rawg_data() -> pd.DataFrame:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", dest="output_format",
+                        help="save CSVs, or Parquet files partitioned by release year")
+    args = parser.parse_args()
+
     logger_setup("clean_data_full_log.log", "logs")
     LOGGER.info("Starting data cleaning process.")
 
-    clean_woke_content_detector_data()
-    clean_rawg_data()
+    clean_woke_content_detector_data(args.output_format)
+    clean_rawg_data(args.output_format)
 
     LOGGER.info("Data cleaning process completed.")
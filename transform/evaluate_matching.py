@@ -0,0 +1,184 @@
+"""A file to evaluate fuzzy matching quality and speed against a labelled sample of true matches."""
+import os
+import logging
+import time
+import numpy as np
+import pandas as pd
+from rapidfuzz import process, fuzz
+from fuzzy_matching import fuzzy_match
+from lsh_index import names_digest
+from partitioned_store import read_output
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+LABELLED_MATCHES_CSV = "labelled_matches.csv"
+SCORE_CACHE_FILE = "match_scores.npz"
+THRESHOLDS = np.arange(101)
+SCORE_SCALE = 100
+
+
+def load_labelled_matches(csv_file: str = LABELLED_MATCHES_CSV) -> pd.DataFrame:
+    """Loads labelled matches: a 'Game' column and its true 'Match' (blank if there is none)."""
+    try:
+        labelled = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+    except FileNotFoundError as e:
+        LOGGER.error("File not found: %s", e)
+        raise
+
+    if not {"Game", "Match"}.issubset(labelled.columns):
+        LOGGER.error("Labelled file must have Game and Match columns: %s", csv_file)
+        raise ValueError(
+            f"Labelled file must have Game and Match columns: {csv_file}")
+
+    labelled["Match"] = labelled["Match"].replace("", None)
+    return labelled
+
+
+def score_predictions(predicted: pd.Series, expected: pd.Series) -> dict:
+    """Calculates precision, recall and F1 of predicted matches against the expected ones."""
+    correct = predicted.notna() & (predicted == expected)
+    true_positives = int(correct.sum())
+    predicted_positives = int(predicted.notna().sum())
+    actual_positives = int(expected.notna().sum())
+
+    precision = true_positives / predicted_positives if predicted_positives else 0.0
+    recall = true_positives / actual_positives if actual_positives else 0.0
+    f1 = 2 * precision * recall / \
+        (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def evaluate_matcher(labelled: pd.DataFrame, target_names: list[str],
+                     min_score=80, multi_scorer=False) -> dict:
+    """Runs fuzzy_match over every labelled title and reports quality and time per title."""
+    start = time.perf_counter()
+    predicted = [fuzzy_match(game, target_names, min_score=min_score,
+                             multi_scorer=multi_scorer)[0]
+                 for game in labelled["Game"]]
+    elapsed = time.perf_counter() - start
+
+    results = score_predictions(pd.Series(predicted, index=labelled.index,
+                                          dtype=object), labelled["Match"])
+    results["seconds_per_title"] = elapsed / len(labelled) if len(labelled) else 0.0
+    return results
+
+
+def compare_matchers(labelled: pd.DataFrame, target_names: list[str], min_score=80) -> pd.DataFrame:
+    """Compares the single-scorer and multi-scorer matching modes on the same labelled sample."""
+    return pd.DataFrame({
+        "ratio": evaluate_matcher(labelled, target_names, min_score),
+        "multi_scorer": evaluate_matcher(labelled, target_names, min_score,
+                                         multi_scorer=True),
+    }).T
+
+
+def inputs_digest(source_titles: list[str], target_names: list[str]) -> str:
+    """Identifies the source titles and target names a score cache was built from."""
+    return f"{names_digest(source_titles)}:{names_digest(target_names)}"
+
+
+def build_score_cache(source_titles: list[str], target_names: list[str],
+                      cache_file: str = SCORE_CACHE_FILE) -> None:
+    """Scores every (source title, target name) pair once and saves the matrix of scores.
+
+    Scores are fuzz.ratio in hundredths, rounded down and stored as uint16. Rounding down keeps
+    a stored score at or above a whole threshold exactly when the pipeline's score is, so a
+    ratio of 79.55 is not counted as a match at 80. The cache records the digest of its inputs.
+    """
+    LOGGER.info("Scoring %s titles against %s targets",
+                len(source_titles), len(target_names))
+    scores = np.floor(process.cdist(source_titles, target_names, scorer=fuzz.ratio)
+                      .astype(np.float64) * SCORE_SCALE).astype(np.uint16)
+    np.savez(cache_file, scores=scores,
+             source_titles=np.array(source_titles, dtype=str),
+             target_names=np.array(target_names, dtype=str),
+             inputs_hash=np.array(inputs_digest(source_titles, target_names)))
+    LOGGER.info("Saved score cache to %s", cache_file)
+
+
+def load_score_cache(cache_file: str = SCORE_CACHE_FILE) -> tuple:
+    """Loads the score matrix, source titles and target names from a score cache."""
+    if not os.path.exists(cache_file):
+        LOGGER.error("Score cache not found: %s", cache_file)
+        raise FileNotFoundError(f"Score cache not found: {cache_file}")
+
+    with np.load(cache_file) as cache:
+        return (cache["scores"], cache["source_titles"].tolist(),
+                cache["target_names"].tolist())
+
+
+def load_or_build_score_cache(source_titles: list[str], target_names: list[str],
+                              cache_file: str = SCORE_CACHE_FILE) -> tuple:
+    """Loads the score cache if it was built from the same titles and names, else rebuilds it."""
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as cache:
+            cached_hash = str(cache["inputs_hash"])
+        if cached_hash == inputs_digest(source_titles, target_names):
+            LOGGER.info("Score cache %s is up to date", cache_file)
+            return load_score_cache(cache_file)
+        LOGGER.info("Score cache %s is out of date, rebuilding it", cache_file)
+
+    build_score_cache(source_titles, target_names, cache_file)
+    return load_score_cache(cache_file)
+
+
+def threshold_curves(scores: np.ndarray, source_titles: list[str], target_names: list[str],
+                     labelled: pd.DataFrame) -> pd.DataFrame:
+    """Calculates precision, recall and F1 of the best match for every threshold from 0 to 100.
+
+    scores are in hundredths, as saved by build_score_cache.
+    """
+    row_lookup = pd.Series(range(len(source_titles)), index=source_titles)
+    row_lookup = row_lookup[~row_lookup.index.duplicated()]
+    labelled = labelled[labelled["Game"].isin(row_lookup.index)]
+    rows = row_lookup.loc[labelled["Game"]].to_numpy()
+
+    best_index = scores[rows].argmax(axis=1)
+    best_score = scores[rows, best_index]
+    correct = (np.asarray(target_names, dtype=object)[best_index] ==
+               labelled["Match"].to_numpy())
+
+    # Predictions at threshold t are the rows whose best score is >= t
+    score_bins = 100 * SCORE_SCALE + 1
+    predicted = np.bincount(best_score, minlength=score_bins)[::-1].cumsum()[::-1]
+    true_positives = np.bincount(best_score[correct],
+                                 minlength=score_bins)[::-1].cumsum()[::-1]
+    predicted = predicted[THRESHOLDS * SCORE_SCALE]
+    true_positives = true_positives[THRESHOLDS * SCORE_SCALE]
+    actual_positives = labelled["Match"].notna().sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = (true_positives / actual_positives if actual_positives
+                  else np.zeros(len(THRESHOLDS)))
+        f1 = np.where(precision + recall > 0,
+                      2 * precision * recall / (precision + recall), 0.0)
+
+    return pd.DataFrame({"threshold": THRESHOLDS, "precision": precision,
+                         "recall": recall, "f1": f1})
+
+
+def best_threshold(curves: pd.DataFrame) -> int:
+    """Returns the lowest threshold with the highest F1 score."""
+    return int(curves.loc[curves["f1"].idxmax(), "threshold"])
+
+
+if __name__ == "__main__":
+    logger_setup("evaluate_matching_log.log", "logs")
+    LOGGER.info("Starting matching evaluation")
+
+    labelled_matches = load_labelled_matches()
+    rawg_names = read_output("clean_rawg_video_games.csv", columns=["Name"])[
+        "Name"].dropna().tolist()
+    wcd_titles = read_output("clean_woke_content_detector.csv", columns=["Game"])[
+        "Game"].dropna().tolist()
+
+    match_scores, wcd_titles, rawg_names = load_or_build_score_cache(wcd_titles, rawg_names)
+    threshold_results = threshold_curves(match_scores, wcd_titles, rawg_names,
+                                         labelled_matches)
+    print(threshold_results.to_string(index=False))
+    print(f"Best threshold: {best_threshold(threshold_results)}")
+    print(compare_matchers(labelled_matches, rawg_names))
+
+    LOGGER.info("Matching evaluation completed")
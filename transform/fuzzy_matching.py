@@ -1,19 +1,88 @@
 """A file to perform fuzzy matching."""
+import os
+import json
+import argparse
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+import numpy as np
 import pandas as pd
-from rapidfuzz import process, fuzz
+from rapidfuzz import process, fuzz, utils
+from lsh_index import LSHIndex, candidate_positions, load_or_build_lsh_index
+from partitioned_store import OUTPUT_FORMATS, read_output, write_output
+from year_index import (YearLengthIndex, build_year_index, parse_years, year_candidates,
+                        year_groups, name_lengths)
 from utils.logging_config import logger_setup
 
 LOGGER = logging.getLogger(__name__)
 
+SHORTLIST_SIZE = 10
+SUBTITLE_SEPARATORS = (":", " - ", ",", "(")
+
+WCD_COLUMNS = {
+    "Name": "Game",
+    "Release Year": "Release Year",
+    "Developer": "Developer",
+    "Publisher": "Publisher",
+    "WCD Rating": "Rating",
+    "WCD Review": "Review",
+}
+RAWG_COLUMNS = {
+    "RAWG Rating": "RAWG Rating",
+    "Metacritic Rating": "Metacritic Rating",
+}
+VG_SALES_COLUMNS = {
+    "North American Sales": "NA_Sales",
+    "European Sales": "EU_Sales",
+    "Japanese Sales": "JP_Sales",
+    "Other Sales": "Other_Sales",
+    "Global Sales": "Global_Sales",
+}
+OUTPUT_COLUMNS = [*WCD_COLUMNS, *RAWG_COLUMNS, *VG_SALES_COLUMNS]
+
+CHECKPOINT_BATCH_SIZE = 500
+SCORE_CHUNK_CELLS = 1 << 24
+
+
+class EnrichmentSource(NamedTuple):
+    """A catalogue of games that is matched to the WCD data to add columns to it.
+
+    fields maps each output column to the source column it is taken from, and match_config holds
+    keyword arguments for match_positions that override the defaults for this source. An "lsh"
+    entry in match_config, holding keyword arguments for load_or_build_lsh_index, matches the
+    source approximately through an LSH index instead of scoring every name. A "year_window"
+    entry such as {"year_column": "Release Year", "tolerance": 1} only scores the names released
+    within tolerance years of each WCD game.
+    """
+    name: str
+    csv_file: str
+    fields: dict
+    name_column: str = "Name"
+    match_config: dict = None
+
+
+ENRICHMENT_SOURCES = {}
+
+
+def register_source(source: EnrichmentSource) -> None:
+    """Adds a source to the sources matched by process_video_game_data, replacing any of the same name."""
+    ENRICHMENT_SOURCES[source.name] = source
+
+
+register_source(EnrichmentSource(
+    "RAWG", "clean_rawg_video_games.csv", RAWG_COLUMNS))
+register_source(EnrichmentSource(
+    "video game sales", "videogame_sales.csv", VG_SALES_COLUMNS))
+
 
 def load_video_game_data() -> tuple:
     """Loads video game data from CSV files."""
     try:
         LOGGER.info("Loading video game data from CSV files")
-        wcd_data = pd.read_csv("clean_woke_content_detector.csv")
+        wcd_data = read_output("clean_woke_content_detector.csv")
         vg_sales_data = pd.read_csv("videogame_sales.csv")
-        rawg_data = pd.read_csv("clean_rawg_video_games.csv")
+        rawg_data = read_output("clean_rawg_video_games.csv")
         LOGGER.info("Successfully loaded all data files")
         return wcd_data, vg_sales_data, rawg_data
     except FileNotFoundError as e:
@@ -21,10 +90,48 @@ def load_video_game_data() -> tuple:
         raise
 
 
-def fuzzy_match(source_name: str, target_names: list[str], limit=1, min_score=80) -> tuple:
+def select_scorers(source_name: str) -> list:
+    """Picks the expensive scorers suited to the shape of a source title."""
+    scorers = [fuzz.WRatio]
+    if len(source_name.split()) > 1:
+        scorers.append(fuzz.token_set_ratio)
+    if any(separator in source_name for separator in SUBTITLE_SEPARATORS):
+        scorers.append(fuzz.partial_ratio)
+    return scorers
+
+
+def multi_scorer_extract(source_name: str, target_names: list[str],
+                         limit=1, shortlist_size=SHORTLIST_SIZE) -> list[tuple]:
+    """Shortlists targets with a cheap scorer, then re-scores the shortlist with expensive scorers.
+
+    The combined score is the mean of the scorers chosen by select_scorers. A missing source
+    name has no matches.
+    """
+    if not isinstance(source_name, str):
+        return []
+    shortlist = process.extract(source_name, target_names, scorer=fuzz.ratio,
+                                processor=utils.default_process,
+                                limit=max(limit, shortlist_size))
+    scorers = select_scorers(source_name)
+
+    rescored = []
+    for name, _, index in shortlist:
+        scores = [scorer(source_name, name, processor=utils.default_process)
+                  for scorer in scorers]
+        rescored.append((name, sum(scores) / len(scores), index))
+
+    rescored.sort(key=lambda match: (-match[1], match[2]))
+    return rescored[:limit]
+
+
+def fuzzy_match(source_name: str, target_names: list[str], limit=1, min_score=80,
+                multi_scorer=False) -> tuple:
     """Finds the best fuzzy match for a source name from a list of target names."""
-    matches = process.extract(
-        source_name, target_names, scorer=fuzz.ratio, limit=limit)
+    if multi_scorer:
+        matches = multi_scorer_extract(source_name, target_names, limit=limit)
+    else:
+        matches = process.extract(
+            source_name, target_names, scorer=fuzz.ratio, limit=limit)
     best_match, score = matches[0][:2] if matches else (None, 0)
 
     if score < min_score:
@@ -37,20 +144,24 @@ def fuzzy_match(source_name: str, target_names: list[str], limit=1, min_score=80
     return best_match, score
 
 
-def get_matched_row(game_name: str, df: pd.DataFrame, match_threshold: int) -> dict:
+def get_matched_row(game_name: str, df: pd.DataFrame, match_threshold: int,
+                    multi_scorer=False) -> dict:
     """Get matching row from dataframe using fuzzy matching."""
-    best_match, match_score = fuzzy_match(game_name, df["Name"].tolist())
+    best_match, match_score = fuzzy_match(game_name, df["Name"].tolist(),
+                                          multi_scorer=multi_scorer)
     matches = df[df["Name"] == best_match]
     return matches.iloc[0].to_dict() if match_score >= match_threshold and not matches.empty else {}
 
 
-def match_row(row, vg_sales_data, rawg_data, match_threshold=80) -> pd.Series:
+def match_row(row, vg_sales_data, rawg_data, match_threshold=80, multi_scorer=False) -> pd.Series:
     """Fuzzy match a WCD row to video game sales and RAWG data."""
     game_name = row["Game"]
     LOGGER.info("Processing game: %s", game_name)
 
-    vg_match_row = get_matched_row(game_name, vg_sales_data, match_threshold)
-    rawg_match_row = get_matched_row(game_name, rawg_data, match_threshold)
+    vg_match_row = get_matched_row(
+        game_name, vg_sales_data, match_threshold, multi_scorer)
+    rawg_match_row = get_matched_row(
+        game_name, rawg_data, match_threshold, multi_scorer)
 
     return pd.Series({
         "Name": game_name,
@@ -69,22 +180,575 @@ def match_row(row, vg_sales_data, rawg_data, match_threshold=80) -> pd.Series:
     })
 
 
-def process_video_game_data(output_file: str = "combined_video_game_data.csv") -> pd.DataFrame:
-    """Process and combine video game data from multiple sources."""
+def lsh_match_positions(source_names: list[str], target_names: list[str], lsh_index: LSHIndex,
+                        match_threshold=80, multi_scorer=False) -> np.ndarray:
+    """Finds the best match for every source name among its LSH candidates only.
+
+    Matches the LSH index misses are not found, so this trades recall for speed on large targets.
+    """
+    positions = np.full(len(source_names), -1, dtype=np.int64)
+    candidates = candidate_positions(lsh_index, source_names)
+
+    for i, (source_name, candidate) in enumerate(zip(source_names, candidates)):
+        candidate_names = [target_names[position] for position in candidate]
+        if multi_scorer:
+            matches = multi_scorer_extract(source_name, candidate_names)
+            best_match = matches[0] if matches and matches[0][1] >= match_threshold else None
+        else:
+            best_match = process.extractOne(source_name, candidate_names, scorer=fuzz.ratio,
+                                            score_cutoff=match_threshold)
+        if best_match is not None:
+            positions[i] = candidate[best_match[2]]
+
+    LOGGER.info("Scored %s LSH candidates for %s names instead of %s pairs",
+                sum(map(len, candidates)), len(source_names),
+                len(source_names) * len(target_names))
+    return positions
+
+
+def unique_title_keys(source_names: list[str], source_years=None) -> tuple:
+    """Groups identical source names, and their release year if given.
+
+    Names are grouped on their exact text, so every name in a group gets the same match it
+    would get on its own. Returns the key code of every name and the position of the first
+    name with each key.
+    """
+    keys = pd.Series(source_names, dtype=object).fillna("").astype(str)
+    if source_years is not None:
+        keys = keys + "|" + parse_years(source_years).astype(str)
+    codes, _ = pd.factorize(keys)
+    _, first_positions = np.unique(codes, return_index=True)
+    return codes, first_positions
+
+
+def match_positions(source_names: list[str], target_names: list[str], match_threshold=80,
+                    multi_scorer=False, lsh_index: LSHIndex = None, threads: int = 1,
+                    year_index: YearLengthIndex = None, source_years=None) -> np.ndarray:
+    """Finds the position of the best match in target_names for every source name.
+
+    Source names without a match scoring at least match_threshold get position -1. Identical
+    names (with the same year, with a year_index) are scored once and share the match.
+    """
+    if year_index is not None:
+        source_years = (parse_years(source_years) if source_years is not None
+                        else parse_years([None] * len(source_names)))
+    codes, first_positions = unique_title_keys(
+        source_names, source_years if year_index is not None else None)
+    LOGGER.debug("Scoring %s unique titles for %s names, saving %s scoring calls",
+                len(first_positions), len(source_names),
+                len(source_names) - len(first_positions))
+
+    unique_names = [source_names[i] for i in first_positions]
+    if year_index is not None:
+        unique_positions = year_match_positions(unique_names, source_years[first_positions],
+                                                target_names, year_index, match_threshold,
+                                                multi_scorer, threads)
+    else:
+        unique_positions = score_positions(unique_names, target_names, match_threshold,
+                                           multi_scorer, lsh_index, threads)
+    return unique_positions[codes]
+
+
+def score_positions(source_names: list[str], target_names: list[str], match_threshold=80,
+                    multi_scorer=False, lsh_index: LSHIndex = None, threads: int = 1) -> np.ndarray:
+    """Scores every source name against target_names to find the position of its best match.
+
+    Source names without a match scoring at least match_threshold, and missing source names,
+    get position -1. If an LSH index of target_names is given, only its candidates are scored.
+    """
+    if lsh_index is not None:
+        return lsh_match_positions(source_names, target_names, lsh_index,
+                                   match_threshold, multi_scorer)
+    if not multi_scorer:
+        return ratio_match_positions(source_names, target_names, match_threshold, threads)
+
+    positions = np.full(len(source_names), -1, dtype=np.int64)
+
+    for i, source_name in enumerate(source_names):
+        if not isinstance(source_name, str):
+            continue
+        matches = multi_scorer_extract(source_name, target_names)
+        if matches and matches[0][1] >= match_threshold:
+            positions[i] = matches[0][2]
+
+    return positions
+
+
+def year_match_positions(source_names: list[str], source_years: np.ndarray,
+                         target_names: list[str], year_index: YearLengthIndex, match_threshold=80,
+                         multi_scorer=False, threads: int = 1) -> np.ndarray:
+    """Finds the best match for every source name among the targets its year and length allow.
+
+    Source names are scored a year at a time, against the targets released within the year
+    tolerance whose length could reach match_threshold. Source names without a year are scored
+    against every year. Matches released outside the tolerance are not found, so this trades
+    some recall for fewer comparisons. Missing source names are not matched.
+    """
+    positions = np.full(len(source_names), -1, dtype=np.int64)
+    lengths = name_lengths(source_names)
+    valid = np.flatnonzero([isinstance(name, str) for name in source_names])
+    comparisons = 0
+
+    for year, group in year_groups(source_years[valid]).items():
+        group = valid[group]
+        candidates = year_candidates(year_index, year, lengths[group].min(),
+                                     lengths[group].max(), match_threshold,
+                                     use_length=not multi_scorer)
+        comparisons += len(group) * len(candidates)
+        group_positions = score_positions([source_names[i] for i in group],
+                                          [target_names[i] for i in candidates],
+                                          match_threshold, multi_scorer, threads=threads)
+        matched = group_positions >= 0
+        positions[group[matched]] = candidates[group_positions[matched]]
+
+    full_comparisons = len(source_names) * len(target_names)
+    LOGGER.info("Scored %s of %s name pairs by year and length (%.1f%% fewer comparisons)",
+                comparisons, full_comparisons,
+                100 * (1 - comparisons / full_comparisons) if full_comparisons else 0.0)
+    return positions
+
+
+def ratio_match_positions(source_names: list[str], target_names: list[str], match_threshold=80,
+                          threads: int = 1) -> np.ndarray:
+    """Finds the best fuzz.ratio match for every source name with process.cdist.
+
+    Rows of the score matrix are computed in chunks of about SCORE_CHUNK_CELLS scores, on
+    threads worker threads that run outside the GIL (-1 uses every core). Ties go to the
+    first target name, as with process.extractOne. Missing names are never matched, as cdist
+    leaves their scores uninitialised.
+    """
+    positions = np.full(len(source_names), -1, dtype=np.int64)
+    source_valid = np.flatnonzero([isinstance(name, str) for name in source_names])
+    target_valid = np.flatnonzero([isinstance(name, str) for name in target_names])
+    if not len(source_valid) or not len(target_valid):
+        return positions
+    valid_targets = [target_names[i] for i in target_valid]
+
+    chunk_size = max(1, SCORE_CHUNK_CELLS // len(valid_targets))
+    for start in range(0, len(source_valid), chunk_size):
+        chunk = source_valid[start:start + chunk_size]
+        scores = process.cdist([source_names[i] for i in chunk], valid_targets,
+                               scorer=fuzz.ratio, score_cutoff=match_threshold,
+                               workers=threads)
+        best = scores.argmax(axis=1)
+        matched = scores[np.arange(len(best)), best] >= match_threshold
+        positions[chunk] = np.where(matched, target_valid[best], -1)
+
+    return positions
+
+
+def gather_matched_columns(target_df: pd.DataFrame, positions: np.ndarray,
+                           column_map: dict) -> pd.DataFrame:
+    """Takes the columns of the matched target rows for all source rows at once.
+
+    Rows with position -1 and target columns that do not exist are left empty.
+    """
+    matched = positions >= 0
+    safe_positions = np.where(matched, positions, 0)
+
+    gathered = {}
+    for output_column, target_column in column_map.items():
+        if target_column in target_df.columns and len(target_df):
+            column = target_df[target_column].take(safe_positions)
+            if pd.api.types.is_integer_dtype(column) or pd.api.types.is_bool_dtype(column):
+                # Unmatched rows are NaN, so always use floats to keep the dtype the same
+                # whether or not every row in a batch matched
+                column = column.astype("float64")
+            gathered[output_column] = column.where(matched).to_numpy()
+        else:
+            gathered[output_column] = np.full(len(positions), None, dtype=object)
+
+    return pd.DataFrame(gathered)
+
+
+def source_target_names(source: EnrichmentSource, source_data: pd.DataFrame) -> list[str]:
+    """Lists the names the games are matched against in a source's data."""
+    return (source_data[source.name_column].tolist()
+            if source.name_column in source_data.columns else [])
+
+
+def build_source_index(source: EnrichmentSource, source_data: pd.DataFrame) -> dict:
+    """Builds the indexes a source's match_config asks for, as match_positions arguments."""
+    match_config = source.match_config or {}
+    target_names = source_target_names(source, source_data)
+    source_index = {}
+    if "lsh" in match_config:
+        source_index["lsh_index"] = load_or_build_lsh_index(target_names, **match_config["lsh"])
+    if "year_window" in match_config:
+        year_window = match_config["year_window"]
+        year_column = year_window.get("year_column", "Release Year")
+        target_years = (source_data[year_column] if year_column in source_data.columns
+                        else [None] * len(target_names))
+        source_index["year_index"] = build_year_index(
+            target_names, target_years, year_window.get("tolerance", 1))
+    return source_index
+
+
+def build_source_indexes(sources_data: list[tuple]) -> dict:
+    """Builds the indexes of every source once, keyed by source name, to reuse across batches."""
+    return {source.name: build_source_index(source, source_data)
+            for source, source_data in sources_data}
+
+
+def match_source(game_names: list[str], source: EnrichmentSource, source_data: pd.DataFrame,
+                 match_threshold=80, multi_scorer=False, threads: int = 1,
+                 game_years=None, source_index: dict = None) -> pd.DataFrame:
+    """Matches every game name to one source and takes that source's fields for the matches.
+
+    game_years are the release years of the games, used if the source has a "year_window".
+    source_index holds the source's prebuilt indexes; they are built here if it is not given.
+    """
+    target_names = source_target_names(source, source_data)
+    match_config = {"match_threshold": match_threshold, "multi_scorer": multi_scorer,
+                    "threads": threads,
+                    **{setting: value for setting, value in (source.match_config or {}).items()
+                       if setting not in ("lsh", "year_window")}}
+    match_config.update(source_index if source_index is not None
+                        else build_source_index(source, source_data))
+    if "year_index" in match_config:
+        match_config["source_years"] = game_years
+
+    positions = match_positions(game_names, target_names, **match_config)
+    LOGGER.info("Matched %s of %s games to the %s data", int((positions >= 0).sum()),
+                len(positions), source.name)
+    return gather_matched_columns(source_data, positions, source.fields)
+
+
+def unique_wcd_titles(wcd_data: pd.DataFrame) -> tuple:
+    """Groups the WCD rows with the same game and release year, logging the scoring calls saved.
+
+    Returns the key code of every row and the position of the first row with each key.
+    """
+    codes, first_positions = unique_title_keys(
+        wcd_data["Game"].tolist(),
+        wcd_data["Release Year"].to_numpy() if "Release Year" in wcd_data.columns else None)
+    LOGGER.info("Matching %s unique titles for %s WCD rows, saving %s scoring calls per source",
+                len(first_positions), len(wcd_data), len(wcd_data) - len(first_positions))
+    return codes, first_positions
+
+
+def wcd_output_columns(wcd_data: pd.DataFrame) -> pd.DataFrame:
+    """Takes the WCD columns of the combined data, filling columns WCD does not have with N/A."""
+    return pd.DataFrame({
+        output_column: (wcd_data[wcd_column].to_numpy() if wcd_column in wcd_data.columns
+                        else "N/A")
+        for output_column, wcd_column in WCD_COLUMNS.items()
+    }, index=range(len(wcd_data)))
+
+
+def match_sources(wcd_data: pd.DataFrame, sources_data: list[tuple], match_threshold=80,
+                  multi_scorer=False, workers: int = None, threads: int = 1,
+                  source_indexes: dict = None) -> list[pd.DataFrame]:
+    """Matches every WCD row to each (source, source data) pair, returning each source's fields.
+
+    Sources are matched in parallel, one thread per source unless workers is given, and each
+    source is scored on threads threads.
+    """
+    game_names = wcd_data["Game"].tolist()
+    game_years = (wcd_data["Release Year"].to_numpy() if "Release Year" in wcd_data.columns
+                  else None)
+    with ThreadPoolExecutor(max_workers=workers or max(len(sources_data), 1)) as executor:
+        return list(executor.map(
+            lambda source_and_data: match_source(
+                game_names, *source_and_data, match_threshold, multi_scorer, threads, game_years,
+                source_indexes.get(source_and_data[0].name) if source_indexes else None),
+            sources_data))
+
+
+def enrich_wcd_data(wcd_data: pd.DataFrame, sources_data: list[tuple], match_threshold=80,
+                    multi_scorer=False, workers: int = None, threads: int = 1,
+                    source_indexes: dict = None) -> pd.DataFrame:
+    """Matches every WCD row to each (source, source data) pair and adds the sources' fields.
+
+    Rows with the same game and release year are matched once and share the match. Sources are
+    matched as in match_sources. source_indexes, from build_source_indexes, saves rebuilding
+    the sources' indexes on every call.
+    """
+    output_columns = [*WCD_COLUMNS, *(field for source, _ in sources_data
+                                      for field in source.fields)]
+    if "Game" not in wcd_data.columns:
+        return pd.DataFrame(columns=output_columns)
+
+    codes, first_positions = unique_wcd_titles(wcd_data)
+    matched_columns = match_sources(wcd_data.iloc[first_positions], sources_data,
+                                    match_threshold, multi_scorer, workers, threads,
+                                    source_indexes)
+    return pd.concat([wcd_output_columns(wcd_data),
+                      *(columns.iloc[codes].reset_index(drop=True)
+                        for columns in matched_columns)], axis=1)
+
+
+def build_combined_frame(wcd_data: pd.DataFrame, vg_sales_data: pd.DataFrame,
+                         rawg_data: pd.DataFrame, match_threshold=80,
+                         multi_scorer=False, threads: int = 1) -> pd.DataFrame:
+    """Fuzzy matches every WCD row to the sales and RAWG data and combines them column by column."""
+    return enrich_wcd_data(wcd_data, [(ENRICHMENT_SOURCES["RAWG"], rawg_data),
+                                      (ENRICHMENT_SOURCES["video game sales"], vg_sales_data)],
+                           match_threshold, multi_scorer, threads=threads)
+
+
+def load_sources_data(loaded_data: dict) -> list[tuple]:
+    """Pairs every registered source with its data, loading the sources that are not in loaded_data."""
+    sources_data = []
+    for source in ENRICHMENT_SOURCES.values():
+        if source.name not in loaded_data:
+            LOGGER.info("Loading %s data from %s", source.name, source.csv_file)
+        source_data = (loaded_data[source.name] if source.name in loaded_data
+                       else read_output(source.csv_file))
+        sources_data.append((source, source_data))
+    return sources_data
+
+
+def checkpoint_key(wcd_data: pd.DataFrame, sources_data: list[tuple], match_threshold: int,
+                   multi_scorer: bool) -> str:
+    """Identifies the WCD data, sources, source data and match settings of a checkpoint.
+
+    A checkpoint made before any of them changed is not resumed, so old and new matches are never
+    mixed.
+    """
+    digest = hashlib.sha256(
+        pd.util.hash_pandas_object(wcd_data, index=False).to_numpy().tobytes())
+    digest.update(f"{match_threshold}:{multi_scorer}".encode("utf-8"))
+    for source, source_data in sources_data:
+        digest.update(repr(source).encode("utf-8"))
+        digest.update(repr(list(source_data.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(source_data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def read_checkpoint_progress(progress_file: str) -> dict:
+    """Reads the progress marker of a checkpoint, returning an empty dict if there is none."""
+    if not os.path.exists(progress_file):
+        return {}
+    with open(progress_file, "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def write_checkpoint_progress(progress: dict, progress_file: str) -> None:
+    """Replaces the progress marker of a checkpoint in one step."""
+    with open(f"{progress_file}.tmp", "w", encoding="UTF-8") as f:
+        json.dump(progress, f)
+    os.replace(f"{progress_file}.tmp", progress_file)
+
+
+def run_checkpointed_matching(wcd_data: pd.DataFrame, sources_data: list[tuple],
+                              checkpoint_file: str,
+                              batch_size=CHECKPOINT_BATCH_SIZE, match_threshold=80,
+                              multi_scorer=False, threads: int = 1,
+                              source_indexes: dict = None) -> None:
+    """Matches the WCD rows in batches and saves the combined rows to checkpoint_file.
+
+    Rows with the same game and release year are matched once, before batching. Each batch of
+    unique titles has its matched fields appended to '<checkpoint_file>.matches.csv', and a
+    progress marker records the titles done and the size of that file, so a restarted run drops
+    anything written after the last marker and carries on from there. The sources' indexes are
+    built once (unless source_indexes are given) for every batch.
+    """
+    progress_file = f"{checkpoint_file}.progress.json"
+    matches_file = f"{checkpoint_file}.matches.csv"
+    key = checkpoint_key(wcd_data, sources_data, match_threshold, multi_scorer)
+    progress = read_checkpoint_progress(progress_file)
+    codes, first_positions = unique_wcd_titles(wcd_data)
+    unique_data = wcd_data.iloc[first_positions]
+
+    if progress.get("key") == key and os.path.exists(matches_file):
+        LOGGER.info("Resuming from checkpoint after %s of %s unique titles",
+                    progress["rows_done"], len(unique_data))
+        with open(matches_file, "r+b") as f:
+            f.truncate(progress["bytes"])
+    else:
+        progress = {"key": key, "rows_done": 0, "bytes": 0}
+        open(matches_file, "wb").close()
+
+    if source_indexes is None:
+        source_indexes = build_source_indexes(sources_data)
+
+    for start in range(progress["rows_done"], max(len(unique_data), 1), batch_size):
+        batch = pd.concat(match_sources(unique_data.iloc[start:start + batch_size], sources_data,
+                                        match_threshold, multi_scorer, threads=threads,
+                                        source_indexes=source_indexes), axis=1)
+        with open(matches_file, "a", encoding="UTF-8", newline="") as f:
+            batch.to_csv(f, header=start == 0, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+        progress["rows_done"] = min(start + batch_size, len(unique_data))
+        progress["bytes"] = os.path.getsize(matches_file)
+        write_checkpoint_progress(progress, progress_file)
+        LOGGER.info("Checkpointed %s of %s unique titles",
+                    progress["rows_done"], len(unique_data))
+
+    # Values are kept as text so the matched fields are written exactly as they were checkpointed
+    matched = pd.read_csv(matches_file, dtype=str, keep_default_na=False)
+    combined = pd.concat([wcd_output_columns(wcd_data),
+                          matched.iloc[codes].reset_index(drop=True)], axis=1)
+    combined.to_csv(f"{checkpoint_file}.tmp", index=False)
+    os.replace(f"{checkpoint_file}.tmp", checkpoint_file)
+
+
+def parse_shard(shard: str) -> tuple:
+    """Parses a shard given as "i/N" into (i, N), where i counts from 0."""
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError as e:
+        raise ValueError(f"Shard must look like i/N, not {shard}") from e
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be from 0 to {count - 1}, not {index}")
+    return index, count
+
+
+def shard_positions(wcd_data: pd.DataFrame, shard_index: int, shard_count: int) -> np.ndarray:
+    """Finds the WCD rows in a shard, partitioning the rows by the hash of their game title.
+
+    The hash does not depend on the machine or process, so every node agrees on the shards.
+    """
+    keys = wcd_data["Game"].fillna("").astype(str) if "Game" in wcd_data.columns else wcd_data
+    row_hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return np.flatnonzero(row_hashes % np.uint64(shard_count) == np.uint64(shard_index))
+
+
+def shard_file(file_path: str, shard_index: int, shard_count: int) -> str:
+    """Names the partial output of a shard after the full output file."""
+    root, extension = os.path.splitext(file_path)
+    return f"{root}.shard-{shard_index}-of-{shard_count}{extension}"
+
+
+def wcd_digest(wcd_data: pd.DataFrame) -> str:
+    """Identifies the WCD data, so shards matched from different data are not merged."""
+    return hashlib.sha256(
+        pd.util.hash_pandas_object(wcd_data, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def merge_shards(output_file: str, shard_count: int, output_format: str = "csv") -> pd.DataFrame:
+    """Combines the partial outputs of every shard into output_file, in the original row order.
+
+    The partial outputs are always CSVs; output_format only sets how the merged data is saved.
+
+    Raises FileNotFoundError if a shard has not finished, and ValueError if the shards do not
+    cover every WCD row exactly once or were matched from different WCD data.
+    """
+    partials = []
+    positions = []
+    manifests = []
+    for shard_index in range(shard_count):
+        partial_file = shard_file(output_file, shard_index, shard_count)
+        manifest_file = f"{partial_file}.manifest.json"
+        if not os.path.exists(manifest_file):
+            LOGGER.error("Shard %s of %s has not finished: %s",
+                         shard_index, shard_count, manifest_file)
+            raise FileNotFoundError(f"Shard manifest not found: {manifest_file}")
+
+        with open(manifest_file, "r", encoding="UTF-8") as f:
+            manifest = json.load(f)
+        # Values are kept as text so the merged file is written exactly as the shards wrote it
+        partial = pd.read_csv(partial_file, dtype=str, keep_default_na=False)
+        if len(partial) != len(manifest["positions"]):
+            LOGGER.error("Shard %s has %s rows but its manifest lists %s",
+                         shard_index, len(partial), len(manifest["positions"]))
+            raise ValueError(f"Shard {shard_index} does not match its manifest")
+
+        manifests.append(manifest)
+        partials.append(partial)
+        positions.extend(manifest["positions"])
+
+    if len({(manifest["wcd_digest"], manifest["wcd_rows"]) for manifest in manifests}) > 1:
+        LOGGER.error("Shards were matched from different WCD data")
+        raise ValueError("Shards were matched from different WCD data")
+    if sorted(positions) != list(range(manifests[0]["wcd_rows"])):
+        LOGGER.error("Shards do not cover each of the %s WCD rows once", manifests[0]["wcd_rows"])
+        raise ValueError("Shards do not cover each WCD row exactly once")
+
+    merged = pd.concat(partials, ignore_index=True).iloc[np.argsort(positions, kind="stable")]
+    if output_format != "csv":
+        write_output(merged.reset_index(drop=True), output_file, output_format)
+        LOGGER.info("Merged %s shards into %s", shard_count, output_file)
+        return read_output(output_file)
+
+    temp_path = f"{output_file}.tmp"
+    merged.to_csv(temp_path, index=False)
+    os.replace(temp_path, output_file)
+    LOGGER.info("Merged %s shards into %s", shard_count, output_file)
+    return pd.read_csv(output_file)
+
+
+def process_video_game_data(output_file: str = "combined_video_game_data.csv",
+                            multi_scorer: bool = False, checkpoint_file: str = None,
+                            batch_size: int = CHECKPOINT_BATCH_SIZE,
+                            threads: int = 1, shard: tuple = None,
+                            output_format: str = "csv") -> pd.DataFrame:
+    """Process and combine video game data from multiple sources.
+
+    With a checkpoint_file, matched rows are saved in batches so an interrupted run can be resumed.
+    threads sets the number of threads each source is scored on. With a shard (i, N), only the
+    WCD rows in shard i of N are matched, into a partial output file that merge_shards combines.
+    output_format "partitioned" saves the output partitioned by release year instead of as a CSV;
+    partial outputs are always CSVs.
+    """
+    if shard:
+        output_format = "csv"
     LOGGER.info("Starting video game data processing")
     wcd_data, vg_sales_data, rawg_data = load_video_game_data()
 
+    if shard:
+        shard_manifest = {"shard": shard[0], "shard_count": shard[1],
+                          "wcd_rows": len(wcd_data), "wcd_digest": wcd_digest(wcd_data),
+                          "positions": shard_positions(wcd_data, *shard).tolist()}
+        wcd_data = wcd_data.iloc[shard_manifest["positions"]]
+        output_file = shard_file(output_file, *shard)
+        checkpoint_file = checkpoint_file and shard_file(checkpoint_file, *shard)
+        LOGGER.info("Matching shard %s of %s (%s of %s rows)", shard[0], shard[1],
+                    len(wcd_data), shard_manifest["wcd_rows"])
+
+    sources_data = load_sources_data({"RAWG": rawg_data,
+                                      "video game sales": vg_sales_data})
+    source_indexes = build_source_indexes(sources_data)
+
     LOGGER.info("Matching and combining datasets")
-    combined_df = wcd_data.apply(
-        match_row, axis=1, args=(vg_sales_data, rawg_data))
+    if checkpoint_file:
+        run_checkpointed_matching(wcd_data, sources_data, checkpoint_file,
+                                  batch_size, multi_scorer=multi_scorer, threads=threads,
+                                  source_indexes=source_indexes)
+        LOGGER.info("Saving combined data to %s", output_file)
+        if output_format == "csv":
+            os.replace(checkpoint_file, output_file)
+            combined_df = pd.read_csv(output_file)
+        else:
+            combined_df = pd.read_csv(checkpoint_file)
+            write_output(combined_df, output_file, output_format)
+            os.remove(checkpoint_file)
+        os.remove(f"{checkpoint_file}.matches.csv")
+        os.remove(f"{checkpoint_file}.progress.json")
+    else:
+        combined_df = enrich_wcd_data(wcd_data, sources_data, multi_scorer=multi_scorer,
+                                      threads=threads, source_indexes=source_indexes)
+
+        LOGGER.info("Saving combined data to %s", output_file)
+        write_output(combined_df, output_file, output_format)
 
-    LOGGER.info("Saving combined data to %s", output_file)
-    combined_df.to_csv(output_file, index=False)
+    if shard:
+        # The manifest is written after the partial output, so it marks the shard as finished
+        with open(f"{output_file}.manifest.json.tmp", "w", encoding="UTF-8") as f:
+            json.dump(shard_manifest, f)
+        os.replace(f"{output_file}.manifest.json.tmp", f"{output_file}.manifest.json")
     return combined_df
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="match only shard i of N (counting from 0) into a partial file")
+    parser.add_argument("--merge", type=int, metavar="N",
+                        help="combine the partial files of N shards into the output file")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", dest="output_format",
+                        help="save a CSV, or Parquet files partitioned by release year")
+    args = parser.parse_args()
+
     logger_setup("fuzzy_matching_log.log", "logs")
     LOGGER.info("Starting fuzzy matching process")
-    process_video_game_data()
+    if args.merge:
+        merge_shards("combined_video_game_data.csv", args.merge, args.output_format)
+    else:
+        process_video_game_data(
+            checkpoint_file="combined_video_game_data.checkpoint.csv", threads=os.cpu_count(),
+            shard=args.shard, output_format=args.output_format)
     LOGGER.info("Fuzzy matching process completed")
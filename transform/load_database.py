@@ -0,0 +1,200 @@
+"""A file to bulk load the cleaned and combined video game data into a local SQLite database."""
+import logging
+import sqlite3
+from contextlib import closing
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from partitioned_store import output_exists, read_output
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+DATABASE_FILE = "video_games.db"
+INSERT_BATCH_SIZE = 10000
+ROW_KEY_COLUMN = "row_key"
+
+
+class TableSpec(NamedTuple):
+    """A table loaded from a CSV. Rows with the same key_columns values are the same row."""
+    table: str
+    csv_file: str
+    key_columns: list
+    index_columns: list
+
+
+TABLES = [
+    TableSpec("wcd", "clean_woke_content_detector.csv", ["Game", "Release Year"],
+              ["Game", "Rating", "Release Year"]),
+    TableSpec("rawg", "clean_rawg_video_games.csv", ["Name", "Release Year"],
+              ["Name", "Release Year"]),
+    TableSpec("vg_sales", "videogame_sales.csv", ["Name", "Platform", "Year"],
+              ["Name", "Year"]),
+    TableSpec("combined", "combined_video_game_data.csv", ["Name", "Release Year"],
+              ["Name", "WCD Rating", "Release Year"]),
+]
+
+
+def quote(identifier: str) -> str:
+    """Quotes a table or column name for SQL, as many column names contain spaces."""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def sql_type(dtype) -> str:
+    """Chooses the SQLite column type for a pandas dtype."""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def connect(database_file: str = DATABASE_FILE) -> sqlite3.Connection:
+    """Opens the database with settings suited to bulk loading."""
+    connection = sqlite3.connect(database_file)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def key_text(column: pd.Series) -> pd.Series:
+    """Writes key values as text, with whole numbers written without decimals."""
+    numbers = pd.to_numeric(column, errors="coerce")
+    whole = (numbers % 1 == 0).to_numpy()
+    text = column.astype(str).to_numpy(dtype=object)
+    text[whole] = numbers[whole].astype(np.int64).astype(str).to_numpy()
+    text[column.isna().to_numpy()] = ""
+    return pd.Series(text, index=column.index)
+
+
+def prepare_rows(df: pd.DataFrame, key_columns: list) -> pd.DataFrame:
+    """Drops saved index columns and adds a row key hashed from the key columns.
+
+    Missing key columns raise a ValueError. Rows with the same key keep the last of them, and
+    the number of rows dropped is logged as a warning.
+    """
+    df = df.loc[:, ~df.columns.astype(str).str.startswith("Unnamed: ")]
+    missing = [column for column in key_columns if column not in df.columns]
+    if missing:
+        LOGGER.error("Missing key columns: %s", missing)
+        raise ValueError(f"Missing key columns: {missing}")
+
+    # Keys are hashed from their text so missing values (which never conflict in SQLite keys)
+    # and years read as 2011.0 or 2011 still give the same key
+    row_keys = pd.util.hash_pandas_object(df[key_columns].apply(key_text),
+                                          index=False).astype(str)
+    df = df.assign(**{ROW_KEY_COLUMN: row_keys.to_numpy()})
+    duplicated = df.duplicated(ROW_KEY_COLUMN, keep="last")
+    if duplicated.any():
+        LOGGER.warning("Dropped %s rows with the same %s as a later row, e.g. %s",
+                       int(duplicated.sum()), key_columns,
+                       df.loc[duplicated, key_columns].head(3).to_dict("records"))
+    return df[~duplicated]
+
+
+def ensure_table(connection: sqlite3.Connection, table: str, df: pd.DataFrame,
+                 index_columns: list) -> None:
+    """Creates the table and its indexes if needed, adding any columns it does not have yet."""
+    columns = [f"{quote(column)} {sql_type(dtype)}" for column, dtype in df.dtypes.items()
+               if column != ROW_KEY_COLUMN]
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {quote(table)} "
+                       f"({quote(ROW_KEY_COLUMN)} TEXT PRIMARY KEY, {', '.join(columns)})")
+
+    existing = {row[1] for row in connection.execute(f"PRAGMA table_info({quote(table)})")}
+    for column, dtype in df.dtypes.items():
+        if column not in existing:
+            LOGGER.info("Adding column %s to %s", column, table)
+            connection.execute(f"ALTER TABLE {quote(table)} "
+                               f"ADD COLUMN {quote(column)} {sql_type(dtype)}")
+
+    for column in index_columns:
+        if column in df.columns:
+            index_name = f"idx_{table}_{column}".lower().replace(" ", "_")
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name)} "
+                               f"ON {quote(table)} ({quote(column)})")
+
+
+def upsert_rows(connection: sqlite3.Connection, table: str, df: pd.DataFrame,
+                batch_size: int = INSERT_BATCH_SIZE) -> None:
+    """Inserts rows in batches, updating the rows whose key already exists."""
+    columns = list(df.columns)
+    updates = ", ".join(f"{quote(column)} = excluded.{quote(column)}"
+                        for column in columns if column != ROW_KEY_COLUMN)
+    statement = (f"INSERT INTO {quote(table)} ({', '.join(map(quote, columns))}) "
+                 f"VALUES ({', '.join('?' * len(columns))}) "
+                 f"ON CONFLICT({quote(ROW_KEY_COLUMN)}) DO UPDATE SET {updates}")
+
+    values = df.astype(object).where(df.notna(), None)
+    for start in range(0, len(values), batch_size):
+        connection.executemany(statement,
+                               values.iloc[start:start + batch_size].itertuples(index=False,
+                                                                                  name=None))
+
+
+def delete_missing_rows(connection: sqlite3.Connection, table: str, row_keys: pd.Series) -> int:
+    """Deletes the rows of a table whose key is not in row_keys. Returns the number deleted."""
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS loaded_keys (row_key TEXT PRIMARY KEY)")
+    connection.execute("DELETE FROM loaded_keys")
+    connection.executemany("INSERT INTO loaded_keys VALUES (?)",
+                           ((row_key,) for row_key in row_keys))
+    deleted = connection.execute(
+        f"DELETE FROM {quote(table)} WHERE {quote(ROW_KEY_COLUMN)} "
+        "NOT IN (SELECT row_key FROM loaded_keys)").rowcount
+    connection.execute("DELETE FROM loaded_keys")
+    return deleted
+
+
+def load_table(connection: sqlite3.Connection, spec: TableSpec, df: pd.DataFrame,
+               delete_missing: bool = True) -> int:
+    """Upserts a DataFrame into its table in one transaction. Returns the number of rows loaded.
+
+    With delete_missing, rows that are no longer in the data are removed, so the table matches it.
+    """
+    rows = prepare_rows(df, spec.key_columns)
+    with connection:
+        connection.execute("BEGIN")
+        ensure_table(connection, spec.table, rows, spec.index_columns)
+        upsert_rows(connection, spec.table, rows)
+        deleted = delete_missing_rows(connection, spec.table,
+                                      rows[ROW_KEY_COLUMN]) if delete_missing else 0
+    LOGGER.info("Loaded %s rows into %s and deleted %s stale rows",
+                len(rows), spec.table, deleted)
+    return len(rows)
+
+
+def load_database(database_file: str = DATABASE_FILE, tables: list[TableSpec] = None) -> dict:
+    """Loads every table's data into the database, skipping data that does not exist yet.
+
+    Each table is read from its CSV or, if saved more recently, its partitioned version.
+    """
+    loaded = {}
+    connection = connect(database_file)
+    try:
+        for spec in tables or TABLES:
+            if not output_exists(spec.csv_file):
+                LOGGER.warning("Skipping %s, file not found: %s", spec.table, spec.csv_file)
+                continue
+            loaded[spec.table] = load_table(connection, spec, read_output(spec.csv_file))
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    return loaded
+
+
+def query_database(sql: str, params: tuple = (), database_file: str = DATABASE_FILE) -> pd.DataFrame:
+    """Runs a query against the database and returns the result as a DataFrame."""
+    with closing(sqlite3.connect(database_file)) as connection:
+        return pd.read_sql_query(sql, connection, params=params)
+
+
+if __name__ == "__main__":
+    logger_setup("load_database_log.log", "logs")
+    LOGGER.info("Starting database load")
+
+    load_database()
+    print(query_database(
+        'SELECT "WCD Rating", COUNT(*) AS Games, AVG("Global Sales") AS "Mean Global Sales", '
+        'AVG("Metacritic Rating") AS "Mean Metacritic Rating" FROM combined '
+        'GROUP BY "WCD Rating" ORDER BY Games DESC'))
+
+    LOGGER.info("Database load completed")
@@ -0,0 +1,76 @@
+"""A file to load test the lookup service and report its latency percentiles."""
+import json
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+import numpy as np
+from partitioned_store import read_output
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+BASE_URL = "http://127.0.0.1:8000"
+REQUEST_COUNT = 1000
+CONCURRENCY = 8
+BATCH_SIZE = 50
+
+
+def timed_request(request: Request) -> float:
+    """Sends a request and returns how long the full response took in milliseconds."""
+    start = time.perf_counter()
+    with urlopen(request, timeout=30) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def single_request(base_url: str, title: str) -> Request:
+    """Builds a GET request looking up one title."""
+    return Request(f"{base_url}/match?title={quote(title)}")
+
+
+def batch_request(base_url: str, titles: list[str]) -> Request:
+    """Builds a POST request looking up a batch of titles."""
+    return Request(f"{base_url}/match", data=json.dumps({"titles": titles}).encode("utf-8"),
+                   headers={"Content-Type": "application/json"}, method="POST")
+
+
+def run_load_test(base_url: str, titles: list[str], request_count: int = REQUEST_COUNT,
+                  concurrency: int = CONCURRENCY, batch_size: int = None,
+                  seed: int = 0) -> dict:
+    """Sends request_count lookups of random titles from concurrency threads.
+
+    With a batch_size, each request is a POST of that many titles. Returns the p50/p99/max
+    latency in milliseconds and the requests per second.
+    """
+    rng = random.Random(seed)
+    if batch_size:
+        requests = [batch_request(base_url, rng.choices(titles, k=batch_size))
+                    for _ in range(request_count)]
+    else:
+        requests = [single_request(base_url, rng.choice(titles)) for _ in range(request_count)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(timed_request, requests)))
+    elapsed = time.perf_counter() - start
+
+    return {"requests": request_count,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "max_ms": float(latencies.max()),
+            "requests_per_second": request_count / elapsed}
+
+
+if __name__ == "__main__":
+    logger_setup("load_test_lookup_log.log", "logs")
+    LOGGER.info("Starting lookup service load test")
+
+    wcd_titles = read_output("clean_woke_content_detector.csv", columns=["Game"])["Game"].dropna().tolist()
+    print("Single lookups:", run_load_test(BASE_URL, wcd_titles))
+    print(f"Batches of {BATCH_SIZE}:",
+          run_load_test(BASE_URL, wcd_titles, REQUEST_COUNT // 10, batch_size=BATCH_SIZE))
+
+    LOGGER.info("Lookup service load test completed")
@@ -0,0 +1,178 @@
+"""A file to serve fuzzy title lookups over HTTP from datasets kept in memory.
+
+GET /match?title=<title> looks up one title and POST /match with {"titles": [...]} looks up many.
+Each source's CSV is reloaded when it changes on disk.
+"""
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+from fuzzy_matching import EnrichmentSource, ENRICHMENT_SOURCES, WCD_COLUMNS, fuzzy_match
+from partitioned_store import output_mtime, read_output
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"
+PORT = 8000
+RELOAD_INTERVAL_SECONDS = 5
+WCD_SOURCE = EnrichmentSource("WCD", "clean_woke_content_detector.csv", WCD_COLUMNS,
+                              name_column="Game")
+
+
+class SourceIndex:
+    """The names and fields of one source, loaded once from its CSV."""
+
+    def __init__(self, source: EnrichmentSource):
+        self.source = source
+        self.mtime = output_mtime(source.csv_file)
+        data = read_output(source.csv_file)
+        self.names = data[source.name_column].fillna("").astype(str).tolist()
+        self.first_rows = {}
+        for position, name in enumerate(self.names):
+            self.first_rows.setdefault(name, position)
+
+        columns = {output_column: data[source_column] if source_column in data.columns
+                   else pd.Series(None, index=data.index, dtype=object)
+                   for output_column, source_column in source.fields.items()}
+        # Missing values become None so the records can be written straight to JSON
+        fields = pd.DataFrame(columns).astype(object)
+        self.records = fields.where(fields.notna(), None).to_dict("records")
+
+    def lookup(self, title: str, min_score: int) -> dict:
+        """Finds the best match for a title, returning its name, score and fields, or None."""
+        best_match, score = fuzzy_match(title, self.names, min_score=min_score)
+        if best_match is None:
+            return None
+        return {"match": best_match, "score": score,
+                **self.records[self.first_rows[best_match]]}
+
+
+class LookupService:
+    """Keeps a SourceIndex per source in memory and reloads any whose CSV has changed."""
+
+    def __init__(self, sources: list[EnrichmentSource] = None, min_score: int = 80):
+        self.sources = sources or [WCD_SOURCE, *ENRICHMENT_SOURCES.values()]
+        self.min_score = min_score
+        self.indexes = {source.name: SourceIndex(source) for source in self.sources}
+        self.reload_lock = threading.Lock()
+        LOGGER.info("Loaded %s sources", len(self.indexes))
+
+    def reload_if_changed(self) -> list[str]:
+        """Reloads the sources whose CSV changed since they were loaded. Returns their names."""
+        reloaded = []
+        with self.reload_lock:
+            for source in self.sources:
+                try:
+                    changed = (output_mtime(source.csv_file) !=
+                               self.indexes[source.name].mtime)
+                    if changed:
+                        # The new index is built before it replaces the old one, so lookups
+                        # running meanwhile keep using the old data
+                        self.indexes[source.name] = SourceIndex(source)
+                        reloaded.append(source.name)
+                except (OSError, KeyError, ValueError) as e:
+                    LOGGER.error("Could not reload %s, keeping the loaded data: %s",
+                                 source.csv_file, e)
+        if reloaded:
+            LOGGER.info("Reloaded %s", ", ".join(reloaded))
+        return reloaded
+
+    def lookup(self, title: str) -> dict:
+        """Matches a title against every source."""
+        indexes = dict(self.indexes)
+        return {"title": title,
+                "matches": {name: index.lookup(title, self.min_score)
+                            for name, index in indexes.items()}}
+
+    def lookup_many(self, titles: list[str]) -> list[dict]:
+        """Matches each of a batch of titles against every source."""
+        return [self.lookup(title) for title in titles]
+
+
+def watch_for_changes(service: LookupService, stop: threading.Event,
+                      interval: float = RELOAD_INTERVAL_SECONDS) -> threading.Thread:
+    """Starts a thread that reloads changed sources every interval seconds until stop is set."""
+    def watch():
+        while not stop.wait(interval):
+            service.reload_if_changed()
+
+    thread = threading.Thread(target=watch, daemon=True)
+    thread.start()
+    return thread
+
+
+class LookupRequestHandler(BaseHTTPRequestHandler):
+    """Answers lookup requests with JSON using the server's LookupService."""
+
+    def send_json(self, status: int, body) -> None:
+        """Sends a JSON response."""
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Looks up the title in the query string of /match, or reports health on /health."""
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self.send_json(200, {"status": "ok",
+                                 "sources": list(self.server.service.indexes)})
+            return
+        if url.path != "/match":
+            self.send_json(404, {"error": f"Not found: {url.path}"})
+            return
+
+        titles = parse_qs(url.query).get("title")
+        if not titles:
+            self.send_json(400, {"error": "Missing title parameter"})
+            return
+        self.send_json(200, self.server.service.lookup(titles[0]))
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Looks up every title in a JSON body of the form {"titles": [...]}."""
+        if urlparse(self.path).path != "/match":
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            titles = json.loads(self.rfile.read(length))["titles"]
+            if not isinstance(titles, list):
+                raise TypeError("titles must be a list")
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": f"Invalid request body: {e}"})
+            return
+        self.send_json(200, self.server.service.lookup_many([str(title) for title in titles]))
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service: LookupService, host: str = HOST, port: int = PORT) -> ThreadingHTTPServer:
+    """Creates a threaded HTTP server answering lookups with the given service."""
+    server = ThreadingHTTPServer((host, port), LookupRequestHandler)
+    server.service = service
+    return server
+
+
+if __name__ == "__main__":
+    logger_setup("lookup_service_log.log", "logs", loglevel=logging.WARNING)
+
+    lookup_service = LookupService()
+    stop_watching = threading.Event()
+    watch_for_changes(lookup_service, stop_watching)
+
+    http_server = create_server(lookup_service)
+    print(f"Serving lookups on http://{HOST}:{PORT}/match?title=...")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_watching.set()
+        http_server.server_close()
@@ -0,0 +1,177 @@
+"""A file to find likely matches among millions of target names with MinHash and locality-sensitive hashing.
+
+Every name is reduced to a MinHash signature of its character shingles. Signatures are split into
+bands, and two names become candidates for each other when all the values of any band are equal.
+More bands with fewer values each find more candidates (higher recall, slower), fewer bands with
+more values each find fewer (lower recall, faster).
+"""
+import os
+import zlib
+import hashlib
+import logging
+from typing import NamedTuple
+import numpy as np
+from rapidfuzz import utils
+
+LOGGER = logging.getLogger(__name__)
+
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+BAND_HASH_MULTIPLIER = np.uint64(1099511628211)
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 32
+SIGNATURE_CHUNK_SIZE = 2000
+
+
+class LSHIndex(NamedTuple):
+    """A MinHash LSH index of target names.
+
+    Row i of sorted_band_hashes holds the hashes of band i for every target name in sorted order,
+    and row i of band_order holds the positions of the target names in the same order.
+    """
+    a: np.ndarray
+    b: np.ndarray
+    sorted_band_hashes: np.ndarray
+    band_order: np.ndarray
+    names_hash: str
+
+
+def shingle_hashes(name: str, shingle_size: int = SHINGLE_SIZE) -> list[int]:
+    """Hashes the distinct character shingles of a processed name with CRC-32.
+
+    A missing name is hashed as an empty name.
+    """
+    text = f" {utils.default_process(name) if isinstance(name, str) else ''} "
+    shingles = {text[i:i + shingle_size]
+                for i in range(max(len(text) - shingle_size + 1, 1))}
+    return [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+
+
+def minhash_signatures(names: list[str], a: np.ndarray, b: np.ndarray,
+                       chunk_size: int = SIGNATURE_CHUNK_SIZE) -> np.ndarray:
+    """Calculates a MinHash signature with one value per (a, b) hash function for every name."""
+    signatures = np.empty((len(names), len(a)), dtype=np.uint32)
+
+    for start in range(0, len(names), chunk_size):
+        chunk_hashes = [shingle_hashes(name) for name in names[start:start + chunk_size]]
+        counts = np.fromiter(map(len, chunk_hashes), dtype=np.int64, count=len(chunk_hashes))
+        hashes = np.fromiter((value for name_hashes in chunk_hashes for value in name_hashes),
+                             dtype=np.uint64, count=int(counts.sum()))
+
+        # Each row applies one hash function to every shingle of the chunk, then the
+        # minimum is taken over the shingles of each name
+        values = (a[:, None] * hashes[None, :] + b[:, None]) % MERSENNE_PRIME
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        signatures[start:start + len(chunk_hashes)] = np.minimum.reduceat(
+            values, starts, axis=1).T
+
+    return signatures
+
+
+def band_hashes(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """Combines the values of each band of every signature into one hash, shaped (bands, names)."""
+    rows = signatures.shape[1] // bands
+    banded = signatures[:, :bands * rows].reshape(len(signatures), bands, rows).astype(np.uint64)
+
+    hashes = np.zeros((len(signatures), bands), dtype=np.uint64)
+    for row in range(rows):
+        hashes = hashes * BAND_HASH_MULTIPLIER + banded[:, :, row]
+    return hashes.T
+
+
+def names_digest(names: list[str]) -> str:
+    """Identifies a list of names, so an index is not reused for different names."""
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(str(name).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_lsh_index(target_names: list[str], num_perm: int = NUM_PERM, bands: int = BANDS,
+                    seed: int = 0) -> LSHIndex:
+    """Builds an LSH index of target names with num_perm hash functions split into bands.
+
+    Missing names are left out, so they are never candidates.
+    """
+    if bands < 1 or num_perm < bands:
+        LOGGER.error("Invalid LSH settings: %s hash functions in %s bands", num_perm, bands)
+        raise ValueError(f"num_perm ({num_perm}) must be at least bands ({bands}), "
+                         "and bands must be at least 1")
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(MERSENNE_PRIME), num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(MERSENNE_PRIME), num_perm, dtype=np.uint64)
+
+    LOGGER.info("Building LSH index of %s names with %s bands of %s hash functions",
+                len(target_names), bands, num_perm // bands)
+    valid = np.flatnonzero([isinstance(name, str) for name in target_names]).astype(np.int32)
+    hashes = band_hashes(minhash_signatures([target_names[i] for i in valid], a, b), bands)
+    sorted_positions = np.argsort(hashes, axis=1, kind="stable")
+    return LSHIndex(a, b, np.take_along_axis(hashes, sorted_positions, axis=1),
+                    valid[sorted_positions], names_digest(target_names))
+
+
+def save_lsh_index(index: LSHIndex, index_file: str) -> None:
+    """Saves an LSH index, replacing any previous index only once it is fully written."""
+    temp_path = f"{index_file}.tmp.npz"
+    np.savez(temp_path, a=index.a, b=index.b, sorted_band_hashes=index.sorted_band_hashes,
+             band_order=index.band_order, names_hash=np.array(index.names_hash))
+    os.replace(temp_path, index_file)
+    LOGGER.info("Saved LSH index to %s", index_file)
+
+
+def load_lsh_index(index_file: str) -> LSHIndex:
+    """Loads an LSH index saved by save_lsh_index."""
+    if not os.path.exists(index_file):
+        LOGGER.error("LSH index not found: %s", index_file)
+        raise FileNotFoundError(f"LSH index not found: {index_file}")
+
+    with np.load(index_file) as saved:
+        return LSHIndex(saved["a"], saved["b"], saved["sorted_band_hashes"],
+                        saved["band_order"], str(saved["names_hash"]))
+
+
+def load_or_build_lsh_index(target_names: list[str], index_file: str = None,
+                            num_perm: int = NUM_PERM, bands: int = BANDS) -> LSHIndex:
+    """Loads the LSH index in index_file if it was built from the same names and settings.
+
+    Otherwise the index is built and, if an index_file is given, saved there.
+    """
+    if index_file and os.path.exists(index_file):
+        index = load_lsh_index(index_file)
+        if (index.names_hash == names_digest(target_names) and len(index.a) == num_perm
+                and len(index.sorted_band_hashes) == bands):
+            LOGGER.info("LSH index %s is up to date", index_file)
+            return index
+        LOGGER.info("LSH index %s is out of date, rebuilding it", index_file)
+
+    index = build_lsh_index(target_names, num_perm, bands)
+    if index_file:
+        save_lsh_index(index, index_file)
+    return index
+
+
+def candidate_positions(index: LSHIndex, source_names: list[str]) -> list[np.ndarray]:
+    """Finds the sorted positions of the target names sharing a band with each source name.
+
+    Missing source names have no candidates.
+    """
+    hashes = band_hashes(minhash_signatures(source_names, index.a, index.b),
+                         len(index.sorted_band_hashes))
+
+    ranges = [(np.searchsorted(sorted_hashes, band, side="left"),
+               np.searchsorted(sorted_hashes, band, side="right"))
+              for sorted_hashes, band in zip(index.sorted_band_hashes, hashes)]
+
+    candidates = []
+    for i, source_name in enumerate(source_names):
+        if not isinstance(source_name, str):
+            candidates.append(np.empty(0, dtype=np.int32))
+            continue
+        positions = [order[start[i]:end[i]]
+                     for order, (start, end) in zip(index.band_order, ranges)
+                     if end[i] > start[i]]
+        candidates.append(np.unique(np.concatenate(positions)) if positions
+                          else np.empty(0, dtype=np.int32))
+    return candidates
@@ -0,0 +1,227 @@
+"""A file to build a memory-mapped store of target names that worker processes can share.
+
+pool_match_positions matches names in a process pool whose workers attach to the store instead
+of being sent a pickled copy of the target names, and store_match_positions matches them with
+the same length pruning on threads. fuzzy_matching does not use either; benchmarks.py compares
+them to see whether a process pool is worth adding to the pipeline.
+"""
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from clean_csvs import normalise_titles
+from fuzzy_matching import ratio_match_positions
+from partitioned_store import output_files, read_output
+from year_index import length_bounds, name_lengths
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+STORE_ARRAYS = ("offsets", "blob", "lengths", "normalised_offsets",
+                "normalised_blob", "normalised_lengths", "length_order", "sorted_lengths")
+CHUNKS_PER_PROCESS = 4
+
+
+class NameStore(NamedTuple):
+    """Memory-mapped arrays of a name store.
+
+    Names are UTF-8 encoded back to back in a blob, with name i stored at
+    blob[offsets[i]:offsets[i + 1]]. The normalised names are stored the same way.
+    length_order lists the positions sorted by name length, and sorted_lengths their lengths.
+    Missing names are stored as empty names but left out of length_order, so they are never
+    candidates.
+    """
+    offsets: np.ndarray
+    blob: np.ndarray
+    lengths: np.ndarray
+    normalised_offsets: np.ndarray
+    normalised_blob: np.ndarray
+    normalised_lengths: np.ndarray
+    length_order: np.ndarray
+    sorted_lengths: np.ndarray
+
+
+def file_hash(file_path: str) -> str:
+    """Calculates the SHA-256 hash of a file in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_strings(strings: pd.Series) -> tuple:
+    """Encodes strings into an offsets array and a UTF-8 blob."""
+    encoded = strings.str.encode("utf-8")
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(encoded.str.len().to_numpy(dtype=np.int64), out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+def write_name_store(names: pd.Series, store_dir: str, source_hash: str = "") -> None:
+    """Writes names, their normalised forms and lengths as .npy files plus a manifest."""
+    os.makedirs(store_dir, exist_ok=True)
+    valid = np.flatnonzero([isinstance(name, str) for name in names]).astype(np.int64)
+    names = names.fillna("").astype(str).reset_index(drop=True)
+    normalised = normalise_titles(names, strip_editions=False)
+
+    offsets, blob = encode_strings(names)
+    normalised_offsets, normalised_blob = encode_strings(normalised)
+    lengths = names.str.len().to_numpy(dtype=np.int32)
+    length_order = valid[np.argsort(lengths[valid], kind="stable")]
+    arrays = {
+        "offsets": offsets,
+        "blob": blob,
+        "lengths": lengths,
+        "normalised_offsets": normalised_offsets,
+        "normalised_blob": normalised_blob,
+        "normalised_lengths": normalised.str.len().to_numpy(dtype=np.int32),
+        "length_order": length_order,
+        "sorted_lengths": lengths[length_order],
+    }
+
+    for array_name, array in arrays.items():
+        temp_path = os.path.join(store_dir, f"{array_name}.tmp.npy")
+        np.save(temp_path, array)
+        os.replace(temp_path, os.path.join(store_dir, f"{array_name}.npy"))
+
+    # The manifest is written last so a half-written store is never treated as current
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump({"source_hash": source_hash, "count": len(names)}, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    LOGGER.info("Wrote name store of %s names to %s", len(names), store_dir)
+
+
+def read_manifest(store_dir: str) -> dict:
+    """Reads the manifest of a name store, returning an empty dict if there is none."""
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def build_name_store(source_csv: str, store_dir: str, name_column: str = "Name") -> bool:
+    """Builds a name store from a CSV (or its partitioned version), unless it is unchanged.
+
+    Returns whether the store was rebuilt.
+    """
+    source_hash = "".join(file_hash(file_path) for file_path in output_files(source_csv))
+    if read_manifest(store_dir).get("source_hash") == source_hash:
+        LOGGER.info("Name store %s is up to date", store_dir)
+        return False
+
+    names = read_output(source_csv, columns=[name_column])[name_column]
+    write_name_store(names, store_dir, source_hash)
+    return True
+
+
+def load_name_store(store_dir: str) -> NameStore:
+    """Attaches to a name store without copying it into memory."""
+    if not read_manifest(store_dir):
+        LOGGER.error("Name store not found: %s", store_dir)
+        raise FileNotFoundError(f"Name store not found: {store_dir}")
+
+    return NameStore(*(np.load(os.path.join(store_dir, f"{array_name}.npy"), mmap_mode="r")
+                       for array_name in STORE_ARRAYS))
+
+
+def get_name(store: NameStore, position: int) -> str:
+    """Decodes the name at a position in the store."""
+    start, end = store.offsets[position], store.offsets[position + 1]
+    return store.blob[start:end].tobytes().decode("utf-8")
+
+
+def get_normalised_name(store: NameStore, position: int) -> str:
+    """Decodes the normalised name at a position in the store."""
+    start, end = store.normalised_offsets[position], store.normalised_offsets[position + 1]
+    return store.normalised_blob[start:end].tobytes().decode("utf-8")
+
+
+def get_names(store: NameStore, positions=None) -> list[str]:
+    """Decodes the names at the given positions, or every name if no positions are given."""
+    if positions is None:
+        positions = range(len(store.lengths))
+    return [get_name(store, position) for position in positions]
+
+
+def positions_in_length_range(store: NameStore, min_length: int, max_length: int) -> np.ndarray:
+    """Finds the positions of every name whose length is between min_length and max_length."""
+    start = np.searchsorted(store.sorted_lengths, min_length, side="left")
+    end = np.searchsorted(store.sorted_lengths, max_length, side="right")
+    return np.sort(store.length_order[start:end])
+
+
+def match_chunk(source_names: list[str], store_dir: str, match_threshold=80,
+                threads: int = 1) -> np.ndarray:
+    """Matches source names to the names of a store, attaching to the store in this process.
+
+    Only the names whose length could reach match_threshold against one of the source names
+    are decoded and scored, on threads threads. Returns the store position of each match, or -1.
+    """
+    store = load_name_store(store_dir)
+    lengths = name_lengths(source_names)
+    if not len(lengths):
+        return np.empty(0, dtype=np.int64)
+    candidates = positions_in_length_range(store, length_bounds(lengths.min(), match_threshold)[0],
+                                           length_bounds(lengths.max(), match_threshold)[1])
+    if not len(candidates):
+        return np.full(len(source_names), -1, dtype=np.int64)
+    positions = ratio_match_positions(source_names, get_names(store, candidates),
+                                      match_threshold, threads)
+    return np.where(positions >= 0, candidates[np.maximum(positions, 0)], -1)
+
+
+def length_chunks(source_names: list[str], chunk_count: int) -> list[np.ndarray]:
+    """Splits the positions of the source names into chunks of names of similar length."""
+    order = np.argsort(name_lengths(source_names), kind="stable")
+    return [chunk for chunk in np.array_split(order, chunk_count) if len(chunk)]
+
+
+def store_match_positions(source_names: list[str], store_dir: str, threads: int = 1,
+                          match_threshold=80, chunk_count: int = CHUNKS_PER_PROCESS) -> np.ndarray:
+    """Finds the best fuzz.ratio match in a name store for every source name on threads threads.
+
+    Source names are matched in chunk_count chunks of similar length, pruned by length as in
+    pool_match_positions, so the two differ only in using threads or processes.
+    """
+    positions = np.full(len(source_names), -1, dtype=np.int64)
+    for chunk in length_chunks(source_names, chunk_count):
+        positions[chunk] = match_chunk([source_names[i] for i in chunk], store_dir,
+                                       match_threshold, threads)
+    return positions
+
+
+def pool_match_positions(source_names: list[str], store_dir: str, processes: int,
+                         match_threshold=80) -> np.ndarray:
+    """Finds the best fuzz.ratio match in a name store for every source name in a process pool.
+
+    Source names are split into chunks of similar length, so each worker only scores the
+    targets of a narrow length range. Workers attach to the store rather than receiving the
+    target names. Returns the same positions as ratio_match_positions over the store's names.
+    """
+    chunks = length_chunks(source_names, processes * CHUNKS_PER_PROCESS)
+    positions = np.full(len(source_names), -1, dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(match_chunk, [[source_names[i] for i in chunk] for chunk in chunks],
+                               [store_dir] * len(chunks), [match_threshold] * len(chunks))
+        for chunk, chunk_positions in zip(chunks, results):
+            positions[chunk] = chunk_positions
+    return positions
+
+
+if __name__ == "__main__":
+    logger_setup("name_store_log.log", "logs")
+    LOGGER.info("Building name stores")
+
+    build_name_store("videogame_sales.csv", "name_stores/vg_sales")
+    build_name_store("clean_rawg_video_games.csv", "name_stores/rawg")
+
+    LOGGER.info("Name stores built")
@@ -0,0 +1,168 @@
+"""A file to save datasets as compressed Parquet files partitioned by release year, with a manifest.
+
+Each release year is written to its own file in a folder named after the CSV it replaces, and
+manifest.json lists the columns and the partitions with their row counts. Readers load only the
+partitions of the years they ask for, and only the columns they ask for from those.
+"""
+import os
+import json
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from year_index import UNKNOWN_YEAR, parse_years
+
+LOGGER = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ("csv", "partitioned")
+PARTITION_COLUMN = "Release Year"
+COMPRESSION = "zstd"
+MANIFEST_FILE = "manifest.json"
+
+
+def partition_dir(csv_file: str) -> str:
+    """Names the folder that holds the partitioned version of a CSV file."""
+    return os.path.splitext(csv_file)[0]
+
+
+def partition_file(year: int) -> str:
+    """Names the file of a release year's partition."""
+    return "year=unknown.parquet" if year == UNKNOWN_YEAR else f"year={year}.parquet"
+
+
+def arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Writes object columns that mix text with other values as text, which Parquet requires."""
+    columns = {}
+    for column in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[column], skipna=True) not in ("string", "empty"):
+            columns[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df.assign(**columns) if columns else df
+
+
+def read_manifest(output_dir: str) -> dict:
+    """Reads the manifest of a partitioned dataset. Raises FileNotFoundError if there is none."""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        LOGGER.error("Partition manifest not found: %s", manifest_path)
+        raise FileNotFoundError(f"Partition manifest not found: {manifest_path}")
+    with open(manifest_path, "r", encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def write_partitioned(df: pd.DataFrame, output_dir: str, partition_column: str = PARTITION_COLUMN,
+                      compression: str = COMPRESSION) -> dict:
+    """Writes a DataFrame to one compressed Parquet file per release year. Returns the manifest.
+
+    Rows without a valid year go to an "unknown" partition. Each file is written to a temporary
+    file and renamed, and the manifest is written last, so readers never see a partial dataset.
+    Partitions of years that are no longer in the data are removed afterwards.
+    """
+    if partition_column not in df.columns:
+        LOGGER.error("Missing partition column: %s", partition_column)
+        raise ValueError(f"Missing partition column: {partition_column}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    previous_files = set()
+    if os.path.exists(os.path.join(output_dir, MANIFEST_FILE)):
+        previous_files = {partition["file"]
+                          for partition in read_manifest(output_dir)["partitions"]}
+
+    df = arrow_safe(df.loc[:, ~df.columns.astype(str).str.startswith("Unnamed: ")])
+    years = parse_years(df[partition_column])
+    partitions = []
+    for year in sorted(set(years.tolist()), key=lambda year: (year == UNKNOWN_YEAR, year)):
+        rows = df[years == year]
+        file_name = partition_file(year)
+        temp_path = os.path.join(output_dir, f"{file_name}.tmp")
+        pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), temp_path,
+                       compression=compression)
+        os.replace(temp_path, os.path.join(output_dir, file_name))
+        partitions.append({"year": None if year == UNKNOWN_YEAR else year,
+                           "file": file_name, "rows": len(rows)})
+
+    manifest = {"partition_column": partition_column, "compression": compression,
+                "columns": [str(column) for column in df.columns], "rows": len(df),
+                "partitions": partitions}
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    for stale_file in previous_files - {partition["file"] for partition in partitions}:
+        os.remove(os.path.join(output_dir, stale_file))
+
+    LOGGER.info("Wrote %s rows in %s partitions to %s", len(df), len(partitions), output_dir)
+    return manifest
+
+
+def read_partitioned(output_dir: str, years=None, columns: list = None,
+                     include_unknown: bool = False) -> pd.DataFrame:
+    """Reads the given columns of the partitions of the given release years.
+
+    Rows are grouped by year, in their original order within each year. years=None reads every
+    partition, otherwise rows without a valid year are only read with include_unknown. Unknown
+    columns raise a ValueError.
+    """
+    manifest = read_manifest(output_dir)
+    if columns is not None:
+        missing = [column for column in columns if column not in manifest["columns"]]
+        if missing:
+            LOGGER.error("Columns not in %s: %s", output_dir, missing)
+            raise ValueError(f"Columns not in {output_dir}: {missing}")
+
+    wanted = None if years is None else {int(year) for year in years}
+    frames = [pq.read_table(os.path.join(output_dir, partition["file"]), columns=columns)
+              .to_pandas()
+              for partition in manifest["partitions"]
+              if wanted is None or (partition["year"] in wanted if partition["year"] is not None
+                                    else include_unknown)]
+    if not frames:
+        return pd.DataFrame(columns=columns or manifest["columns"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_output(df: pd.DataFrame, csv_file: str, output_format: str = "csv",
+                 index: bool = False) -> None:
+    """Saves a dataset as csv_file, or partitioned into the folder named after csv_file."""
+    if output_format == "partitioned":
+        write_partitioned(df, partition_dir(csv_file))
+    elif output_format == "csv":
+        df.to_csv(csv_file, index=index)
+    else:
+        LOGGER.error("Unknown output format: %s", output_format)
+        raise ValueError(f"Unknown output format: {output_format}")
+
+
+def partitioned_is_latest(csv_file: str) -> bool:
+    """Checks whether a dataset's partitioned version exists and was saved after its CSV."""
+    manifest_path = os.path.join(partition_dir(csv_file), MANIFEST_FILE)
+    return os.path.exists(manifest_path) and (not os.path.exists(csv_file) or
+                                              os.path.getmtime(manifest_path) >=
+                                              os.path.getmtime(csv_file))
+
+
+def output_exists(csv_file: str) -> bool:
+    """Checks whether a dataset was saved in either format."""
+    return partitioned_is_latest(csv_file) or os.path.exists(csv_file)
+
+
+def output_files(csv_file: str) -> list[str]:
+    """Lists the files read_output reads for a dataset: its manifest and partitions, or its CSV."""
+    if not partitioned_is_latest(csv_file):
+        return [csv_file]
+    output_dir = partition_dir(csv_file)
+    return [os.path.join(output_dir, MANIFEST_FILE),
+            *(os.path.join(output_dir, partition["file"])
+              for partition in read_manifest(output_dir)["partitions"])]
+
+
+def output_mtime(csv_file: str) -> float:
+    """Gets the time a dataset was last saved, in whichever format read_output reads."""
+    return max(os.path.getmtime(file_path) for file_path in output_files(csv_file))
+
+
+def read_output(csv_file: str, columns: list = None) -> pd.DataFrame:
+    """Loads a dataset saved by write_output, from whichever of its versions was saved last."""
+    if partitioned_is_latest(csv_file):
+        return read_partitioned(partition_dir(csv_file), columns=columns)
+    return pd.read_csv(csv_file, usecols=columns)
@@ -0,0 +1,159 @@
+"""A file to turn the WCD reviews into a document-term matrix and find the terms linked to each Rating."""
+import os
+import re
+import json
+import logging
+from collections import Counter
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from partitioned_store import read_output
+from utils.logging_config import logger_setup
+
+LOGGER = logging.getLogger(__name__)
+
+REVIEW_MATRIX_FILE = "review_terms.npz"
+REVIEW_STATE_FILE = "review_terms.json"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+PRIOR = 0.5
+
+
+def tokenize(review: str) -> list[str]:
+    """Splits a review into lowercase word tokens. Missing reviews have none."""
+    if not isinstance(review, str):
+        return []
+    return TOKEN_PATTERN.findall(review.lower().replace("’", "'"))
+
+
+def review_keys(wcd_data: pd.DataFrame) -> list[str]:
+    """Identifies every review by the hash of its game, rating and text, plus its occurrence."""
+    row_hashes = pd.util.hash_pandas_object(
+        wcd_data[["Game", "Rating", "Review"]].fillna("").astype(str), index=False)
+    occurrences = row_hashes.groupby(row_hashes.to_numpy()).cumcount()
+    return [f"{row_hash}:{occurrence}"
+            for row_hash, occurrence in zip(row_hashes.to_numpy(), occurrences.to_numpy())]
+
+
+def count_terms(reviews: list[str], vocabulary: dict) -> sparse.csr_matrix:
+    """Counts the terms of each review, adding new terms to the end of the vocabulary."""
+    indptr = [0]
+    indices = []
+    counts = []
+    for review in reviews:
+        term_counts = Counter(tokenize(review))
+        indices.extend(vocabulary.setdefault(term, len(vocabulary)) for term in term_counts)
+        counts.extend(term_counts.values())
+        indptr.append(len(indices))
+
+    return sparse.csr_matrix((np.array(counts, dtype=np.int32),
+                              np.array(indices, dtype=np.int32), np.array(indptr)),
+                             shape=(len(reviews), len(vocabulary)))
+
+
+def load_review_matrix(matrix_file: str = REVIEW_MATRIX_FILE,
+                       state_file: str = REVIEW_STATE_FILE) -> tuple:
+    """Loads the cached matrix, vocabulary and review keys, or empty ones if there is no cache."""
+    if not (os.path.exists(matrix_file) and os.path.exists(state_file)):
+        return sparse.csr_matrix((0, 0), dtype=np.int32), {}, []
+
+    with open(state_file, "r", encoding="UTF-8") as f:
+        state = json.load(f)
+    matrix = sparse.load_npz(matrix_file).tocsr()
+    if matrix.shape[0] != len(state["keys"]):
+        LOGGER.warning("Cached review matrix does not match its keys, rebuilding it")
+        return sparse.csr_matrix((0, 0), dtype=np.int32), {}, []
+
+    vocabulary = {term: i for i, term in enumerate(state["vocabulary"])}
+    return matrix, vocabulary, state["keys"]
+
+
+def save_review_matrix(matrix: sparse.csr_matrix, vocabulary: dict, keys: list[str],
+                       matrix_file: str = REVIEW_MATRIX_FILE,
+                       state_file: str = REVIEW_STATE_FILE) -> None:
+    """Saves the matrix and its vocabulary and review keys, each replaced once fully written."""
+    temp_matrix = f"{matrix_file}.tmp.npz"
+    sparse.save_npz(temp_matrix, matrix)
+    os.replace(temp_matrix, matrix_file)
+
+    with open(f"{state_file}.tmp", "w", encoding="UTF-8") as f:
+        json.dump({"vocabulary": list(vocabulary), "keys": keys}, f)
+    os.replace(f"{state_file}.tmp", state_file)
+
+
+def update_review_matrix(wcd_data: pd.DataFrame, matrix_file: str = REVIEW_MATRIX_FILE,
+                         state_file: str = REVIEW_STATE_FILE) -> tuple:
+    """Builds the document-term matrix of the WCD reviews, only tokenizing reviews not seen before.
+
+    Returns the matrix, with one row per WCD row in order, and the vocabulary mapping terms to
+    columns.
+    """
+    matrix, vocabulary, cached_keys = load_review_matrix(matrix_file, state_file)
+    keys = review_keys(wcd_data)
+    cached_rows = {key: row for row, key in enumerate(cached_keys)}
+
+    new_rows = [i for i, key in enumerate(keys) if key not in cached_rows]
+    LOGGER.info("Tokenizing %s new of %s reviews", len(new_rows), len(keys))
+    new_matrix = count_terms(wcd_data["Review"].iloc[new_rows].tolist(), vocabulary)
+
+    # Cached rows are kept by key, so reviews that were removed are dropped, and new rows are
+    # appended before everything is put back in the order of wcd_data
+    matrix.resize((matrix.shape[0], len(vocabulary)))
+    combined = sparse.vstack([matrix, new_matrix], format="csr")
+    new_positions = dict(zip(new_rows, range(matrix.shape[0], combined.shape[0])))
+    order = [cached_rows[key] if key in cached_rows else new_positions[i]
+             for i, key in enumerate(keys)]
+    matrix = combined[order]
+
+    save_review_matrix(matrix, vocabulary, keys, matrix_file, state_file)
+    return matrix, vocabulary
+
+
+def term_frequencies(matrix: sparse.csr_matrix, vocabulary: dict) -> pd.DataFrame:
+    """Counts how often each term is used, and in how many reviews, most used first."""
+    frequencies = pd.DataFrame({
+        "Count": np.asarray(matrix.sum(axis=0)).ravel(),
+        "Reviews": np.diff(matrix.tocsc().indptr),
+    }, index=pd.Index(list(vocabulary), name="Term"))
+    return frequencies[frequencies["Count"] > 0].sort_values(["Count", "Reviews"],
+                                                             ascending=False)
+
+
+def rating_association(matrix: sparse.csr_matrix, vocabulary: dict, ratings: pd.Series,
+                       prior: float = PRIOR) -> pd.DataFrame:
+    """Scores how strongly each term is associated with each Rating compared with the others.
+
+    Scores are z-scores of the log-odds ratio of a term's use in reviews with that Rating against
+    all other reviews, smoothed with a uniform prior. Positive scores mean the term is more common
+    in that Rating's reviews.
+    """
+    codes, rating_names = pd.factorize(ratings.fillna("Unknown"))
+    indicator = sparse.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))),
+                                  shape=(len(rating_names), len(codes)))
+    counts = np.asarray((indicator @ matrix).todense(), dtype=np.float64)
+    rating_counts = counts + prior
+    rest_counts = counts.sum(axis=0) - counts + prior
+    rating_totals = rating_counts.sum(axis=1, keepdims=True)
+    rest_totals = rest_counts.sum(axis=1, keepdims=True)
+
+    with np.errstate(divide="ignore"):
+        log_odds = (np.log(rating_counts / (rating_totals - rating_counts)) -
+                    np.log(rest_counts / (rest_totals - rest_counts)))
+    z_scores = log_odds / np.sqrt(1 / rating_counts + 1 / rest_counts)
+    return pd.DataFrame(z_scores.T, index=pd.Index(list(vocabulary), name="Term"),
+                        columns=rating_names)
+
+
+if __name__ == "__main__":
+    logger_setup("review_analytics_log.log", "logs")
+    LOGGER.info("Starting review analytics")
+
+    woke_data = read_output("clean_woke_content_detector.csv")
+    review_matrix, review_vocabulary = update_review_matrix(woke_data)
+    print(term_frequencies(review_matrix, review_vocabulary).head(30))
+
+    associations = rating_association(review_matrix, review_vocabulary, woke_data["Rating"])
+    for rating in associations.columns:
+        print(f"Terms most associated with {rating}:")
+        print(associations[rating].nlargest(15))
+
+    LOGGER.info("Review analytics completed")
@@ -0,0 +1,120 @@
+"""Tests functions for analytics_cube.py."""
+# pylint: skip-file
+import pytest
+import numpy as np
+import pandas as pd
+from analytics_cube import (cube_rows, build_cube, refresh_cube, load_cube, query_cube,
+                            rollup, write_parquet, CUBE_MEASURES, UNKNOWN, UNKNOWN_YEAR)
+
+
+@pytest.fixture
+def combined_data():
+    return pd.DataFrame({
+        "Name": ["Game1", "Game2", "Game3", "Game4"],
+        "Release Year": [2020, 2020, 2021, None],
+        "Developer": ["Dev"] * 4,
+        "Publisher": ["Pub1", "Pub1", "Pub2", None],
+        "WCD Rating": ["Recommended", "Recommended", "Not Recommended", "Recommended"],
+        "WCD Review": ["Review"] * 4,
+        "RAWG Rating": [4.0, 3.0, None, 2.0],
+        "Metacritic Rating": [80.0, None, 70.0, None],
+        "North American Sales": [1.0, 2.0, 0.5, None],
+        "European Sales": [0.5, 1.0, 0.5, None],
+        "Japanese Sales": [0.1, 0.2, 0.0, None],
+        "Other Sales": [0.1, 0.1, 0.1, None],
+        "Global Sales": [1.7, 3.3, 1.1, None],
+    })
+
+
+def test_cube_rows_fills_unknown_dimensions(combined_data):
+    """Tests missing dimension values are grouped as unknown and rows are keyed by hash."""
+    rows = cube_rows(combined_data)
+
+    assert rows["Publisher"].tolist()[3] == UNKNOWN
+    assert rows["Release Year"].tolist() == [2020, 2020, 2021, UNKNOWN_YEAR]
+    assert rows.index.names == ["Row Hash", "Occurrence"]
+    assert cube_rows(combined_data).index.equals(rows.index)
+
+
+def test_build_cube(combined_data):
+    """Tests counts, sums and means are calculated per rating, year and publisher."""
+    cube = build_cube(combined_data)
+    cell = cube.loc[("Recommended", 2020, "Pub1")]
+
+    assert len(cube) == 3
+    assert cell["Games"] == 2
+    assert cell["North American Sales Sum"] == 3.0
+    assert cell["RAWG Rating Mean"] == 3.5
+    assert cell["Metacritic Rating Count"] == 1
+    assert cell["Metacritic Rating Mean"] == 80.0
+    assert np.isnan(cube.loc[("Recommended", UNKNOWN_YEAR, UNKNOWN), "Global Sales Mean"])
+
+
+def test_refresh_cube_matches_full_build(combined_data, tmp_path):
+    """Tests an incremental refresh gives the same cube as building it from scratch."""
+    cube_file = str(tmp_path / "cube.parquet")
+    rows_file = str(tmp_path / "rows.parquet")
+    refresh_cube(combined_data, cube_file, rows_file)
+
+    changed = combined_data.drop(index=0)
+    changed.loc[1, "RAWG Rating"] = 5.0
+    changed.loc[4] = changed.loc[2]
+    refreshed = refresh_cube(changed, cube_file, rows_file)
+
+    expected = build_cube(changed)
+    pd.testing.assert_frame_equal(refreshed[expected.columns], expected, check_dtype=False)
+    pd.testing.assert_frame_equal(load_cube(cube_file)[expected.columns], expected,
+                                  check_dtype=False)
+
+
+def test_refresh_cube_sums_do_not_drift(combined_data, tmp_path):
+    """Tests repeated refreshes leave the sums exactly as a full build calculates them."""
+    cube_file = str(tmp_path / "cube.parquet")
+    rows_file = str(tmp_path / "rows.parquet")
+    refresh_cube(combined_data, cube_file, rows_file)
+
+    for sales in [0.1, 0.2, 0.7, 0.3]:
+        changed = combined_data.copy()
+        changed.loc[1, "Global Sales"] = sales
+        refreshed = refresh_cube(changed, cube_file, rows_file)
+
+    expected = build_cube(changed)
+    assert (refreshed["Global Sales Sum"] == expected["Global Sales Sum"]).all()
+
+
+def test_refresh_cube_rebuilds_mismatched_files(combined_data, tmp_path, caplog):
+    """Tests a rows file that does not belong to the cube causes a full rebuild."""
+    cube_file = str(tmp_path / "cube.parquet")
+    rows_file = str(tmp_path / "rows.parquet")
+    refresh_cube(combined_data, cube_file, rows_file)
+    write_parquet(cube_rows(combined_data.iloc[:2]), rows_file)
+
+    with caplog.at_level("INFO"):
+        cube = refresh_cube(combined_data, cube_file, rows_file)
+
+    assert "Building cube from 4 rows" in caplog.text
+    assert cube["Games"].sum() == 4
+
+
+def test_load_cube_missing(tmp_path):
+    """Tests a missing cube raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        load_cube(str(tmp_path / "missing.parquet"))
+
+
+def test_query_cube(combined_data):
+    """Tests cells are selected by any combination of dimensions."""
+    cube = build_cube(combined_data)
+
+    assert len(query_cube(cube, rating="Recommended")) == 2
+    assert len(query_cube(cube, year=2021, publisher="Pub2")) == 1
+    assert query_cube(cube, rating="Missing").empty
+
+
+def test_rollup(combined_data):
+    """Tests cells are combined over the dimensions that are not kept."""
+    by_rating = rollup(build_cube(combined_data), ["WCD Rating"])
+
+    assert by_rating.loc["Recommended", "Games"] == 3
+    assert by_rating.loc["Recommended", "RAWG Rating Mean"] == 3.0
+    assert all(f"{measure} Mean" in by_rating.columns for measure in CUBE_MEASURES)
@@ -0,0 +1,71 @@
+"""Tests functions for benchmarks.py."""
+# pylint: skip-file
+from benchmarks import (make_titles, make_synthetic_data, measure, benchmark_combined_frame,
+                        benchmark_lsh_matching, benchmark_thread_scaling,
+                        benchmark_year_index, benchmark_output_formats)
+
+
+def test_make_titles_is_deterministic():
+    """Tests the same seed generates the same titles."""
+    assert make_titles(5, seed=1) == make_titles(5, seed=1)
+    assert len(make_titles(5)) == 5
+
+
+def test_make_synthetic_data_shapes():
+    """Tests the synthetic DataFrames have the requested sizes and columns."""
+    wcd_data, vg_sales_data, rawg_data = make_synthetic_data(20, 10)
+
+    assert len(wcd_data) == 20
+    assert len(vg_sales_data) == len(rawg_data) == 10
+    assert "Game" in wcd_data.columns
+    assert "Global_Sales" in vg_sales_data.columns
+    assert "Metacritic Rating" in rawg_data.columns
+
+
+def test_measure():
+    """Tests time and peak memory are reported."""
+    result = measure(sum, range(1000))
+
+    assert result["seconds"] >= 0
+    assert result["peak_mb"] >= 0
+
+
+def test_benchmark_combined_frame():
+    """Tests both ways of building the combined data are benchmarked."""
+    result = benchmark_combined_frame(wcd_rows=20, target_rows=10)
+
+    assert list(result.index) == ["apply(match_row)", "build_combined_frame"]
+
+
+def test_benchmark_lsh_matching():
+    """Tests exact matching and every LSH setting are benchmarked."""
+    result = benchmark_lsh_matching(source_rows=10, target_rows=50, settings=((16, 4),))
+
+    assert list(result.index) == ["exact", "lsh num_perm=16 bands=4"]
+    assert 0 <= result.loc["lsh num_perm=16 bands=4", "recall"] <= 1
+
+
+def test_benchmark_thread_scaling():
+    """Tests threads and processes are benchmarked for every worker count."""
+    result = benchmark_thread_scaling(source_rows=10, target_rows=50, worker_counts=(1, 2))
+
+    assert list(result.index) == ["threads=1", "processes=1", "threads=2", "processes=2"]
+
+
+def test_benchmark_year_index():
+    """Tests exact matching and every year tolerance are benchmarked with fewer comparisons."""
+    result = benchmark_year_index(source_rows=10, target_rows=50, tolerances=(0, 1))
+
+    assert list(result.index) == ["exact", "year tolerance=0", "year tolerance=1"]
+    assert (result["comparisons"].iloc[1:] <= result.loc["exact", "comparisons"]).all()
+    assert (0 <= result["recall"]).all() and (result["recall"] <= 1).all()
+
+
+def test_benchmark_output_formats():
+    """Tests both output formats are benchmarked."""
+    result = benchmark_output_formats(rows=200)
+
+    assert list(result.index) == ["csv", "partitioned"]
+    assert list(result.columns) == ["write_seconds", "size_mb", "read_seconds",
+                                    "pruned_read_seconds"]
+    assert (result["size_mb"] > 0).all()
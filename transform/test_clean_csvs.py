@@ -3,10 +3,13 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import os
+import numpy as np
 import pandas as pd
 from clean_csvs import (load_data,
                         clean_woke_content_detector_data,
-                        clean_rawg_data, validate_column_count)
+                        clean_rawg_data, validate_column_count,
+                        normalise_titles, drop_exact_duplicates,
+                        collapse_near_duplicates, deduplicate)
 
 
 @patch("clean_csvs.os.path.exists")
@@ -297,3 +300,82 @@ def test_validate_column_count_extra_columns(mock_logging):
     mock_logging.assert_called_with(
         "Extra columns detected. Expected: %s, Found: %s", 2, 3
     )
+
+
+##
+
+
+def test_normalise_titles_strips_case_punctuation_and_editions():
+    """Tests titles are reduced to comparable keys."""
+    titles = pd.Series(["The Witcher 3: Wild Hunt - Game of the Year Edition",
+                        "the witcher 3 wild hunt", "Skyrim (Remastered)",
+                        "Pokemon Gold", None])
+
+    result = normalise_titles(titles)
+
+    assert list(result) == ["the witcher 3 wild hunt", "the witcher 3 wild hunt",
+                            "skyrim", "pokemon gold", ""]
+
+
+def test_normalise_titles_keeps_editions():
+    """Tests edition tags are kept when stripping is disabled."""
+    result = normalise_titles(pd.Series(["Skyrim (Remastered)"]),
+                              strip_editions=False)
+
+    assert list(result) == ["skyrim remastered"]
+
+
+def test_drop_exact_duplicates():
+    """Tests only rows that are identical in every column are removed."""
+    df = pd.DataFrame({"Name": ["Game1", "Game1", "Game1"],
+                       "Release Year": ["2020", "2020", "2021"]})
+
+    result = drop_exact_duplicates(df)
+
+    assert list(result.index) == [0, 2]
+
+
+def test_collapse_near_duplicates_reports_merges():
+    """Tests near-duplicate titles from the same year are collapsed and reported."""
+    df = pd.DataFrame({
+        "Game": ["Portal 2", "portal 2!", "Doom", "DOOM"],
+        "Release Year": ["2011", "2011", "1993", "2016"]
+    })
+
+    result, report = collapse_near_duplicates(df, "Game")
+
+    assert list(result["Game"]) == ["Portal 2", "Doom", "DOOM"]
+    assert report.to_dict("records") == [{"Kept Row": 0, "Kept Title": "Portal 2",
+                                          "Merged Row": 1, "Merged Title": "portal 2!"}]
+
+
+@patch("clean_csvs.LOGGER.info")
+def test_deduplicate_logs_near_duplicates(mock_logging):
+    """Tests exact and near duplicates are removed and merges are logged."""
+    df = pd.DataFrame({
+        "Name": ["Game1", "Game1", "GAME1", "Game2"],
+        "Release Year": ["2023", "2023", "2023", "2020"]
+    })
+
+    result = deduplicate(df, "Name")
+
+    assert list(result["Name"]) == ["Game1", "Game2"]
+    assert list(result.index) == [0, 1]
+    message, count, column, report = mock_logging.call_args.args
+    assert (message, count, column) == ("Collapsed %s near-duplicate rows on %s:\n%s", 1, "Name")
+    assert "GAME1" in report
+
+
+def test_collapse_near_duplicates_keeps_empty_titles():
+    """Tests missing and punctuation-only titles are never collapsed together."""
+    df = pd.DataFrame({
+        "Game": [np.nan, np.nan, "!!!", "???", "Doom", "doom!"],
+        "Release Year": ["2020"] * 6,
+        "Rating": ["Recommended", "Not Recommended", "A", "B", "C", "D"]
+    })
+
+    result, report = collapse_near_duplicates(df, "Game")
+
+    assert list(result.index) == [0, 1, 2, 3, 4]
+    assert report[["Kept Row", "Merged Row"]].to_dict("records") == [
+        {"Kept Row": 4, "Merged Row": 5}]
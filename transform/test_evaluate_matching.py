@@ -0,0 +1,155 @@
+"""Tests functions for evaluate_matching.py."""
+# pylint: skip-file
+import pytest
+import pandas as pd
+from unittest.mock import patch
+import numpy as np
+from rapidfuzz import fuzz
+from evaluate_matching import (load_labelled_matches, score_predictions,
+                               evaluate_matcher, compare_matchers,
+                               build_score_cache, load_score_cache,
+                               load_or_build_score_cache,
+                               threshold_curves, best_threshold)
+
+
+@pytest.fixture
+def labelled():
+    """A small labelled sample of WCD titles and their true RAWG matches."""
+    return pd.DataFrame({
+        "Game": ["Witcher 3: Wild Hunt, The", "Assassin's Creed", "Unknown Game"],
+        "Match": ["The Witcher 3: Wild Hunt", "Assassin Creed", None]
+    })
+
+
+@pytest.fixture
+def target_names():
+    """Target names to match against."""
+    return ["The Witcher 3: Wild Hunt", "Assassin Creed", "Battlefield"]
+
+
+def test_load_labelled_matches_blank_is_no_match(tmp_path):
+    """Tests blank matches are loaded as missing values."""
+    csv_file = tmp_path / "labelled.csv"
+    csv_file.write_text("Game,Match\nGame1,Game One\nGame2,\n")
+
+    result = load_labelled_matches(str(csv_file))
+
+    assert result["Match"].tolist() == ["Game One", None]
+
+
+@patch("evaluate_matching.LOGGER.error")
+def test_load_labelled_matches_missing_columns(mock_logging, tmp_path):
+    """Tests a ValueError is raised when the labelled file lacks columns."""
+    csv_file = tmp_path / "labelled.csv"
+    csv_file.write_text("Game\nGame1\n")
+
+    with pytest.raises(ValueError):
+        load_labelled_matches(str(csv_file))
+
+
+def test_score_predictions():
+    """Tests precision, recall and F1 are calculated correctly."""
+    predicted = pd.Series(["A", "X", None, "D"], dtype=object)
+    expected = pd.Series(["A", "B", "C", None], dtype=object)
+
+    result = score_predictions(predicted, expected)
+
+    assert result["precision"] == pytest.approx(1 / 3)
+    assert result["recall"] == pytest.approx(1 / 3)
+    assert result["f1"] == pytest.approx(1 / 3)
+
+
+def test_evaluate_matcher_multi_scorer_finds_reordered_titles(labelled, target_names):
+    """Tests the multi-scorer mode matches reordered titles that fuzz.ratio misses."""
+    single = evaluate_matcher(labelled, target_names, min_score=90)
+    multi = evaluate_matcher(labelled, target_names, min_score=90,
+                             multi_scorer=True)
+
+    assert single["recall"] == pytest.approx(0.5)
+    assert multi["recall"] == 1.0
+    assert multi["precision"] == 1.0
+    assert multi["seconds_per_title"] > 0
+
+
+def test_compare_matchers(labelled, target_names):
+    """Tests both matching modes are reported."""
+    result = compare_matchers(labelled, target_names)
+
+    assert list(result.index) == ["ratio", "multi_scorer"]
+    assert list(result.columns) == ["precision", "recall", "f1",
+                                    "seconds_per_title"]
+
+
+def test_build_and_load_score_cache(tmp_path, labelled, target_names):
+    """Tests the score matrix round trips through the cache file."""
+    cache_file = str(tmp_path / "scores.npz")
+
+    build_score_cache(labelled["Game"].tolist(), target_names, cache_file)
+    scores, source_titles, cached_targets = load_score_cache(cache_file)
+
+    assert scores.dtype == np.uint16
+    assert scores.shape == (3, 3)
+    assert scores[1, 1] == int(fuzz.ratio(labelled["Game"][1], target_names[1]) * 100)
+    assert source_titles == labelled["Game"].tolist()
+    assert cached_targets == target_names
+
+
+def test_load_or_build_score_cache_rebuilds_for_new_inputs(tmp_path, labelled, target_names):
+    """Tests the cache is reused for the same inputs and rebuilt when they change."""
+    cache_file = str(tmp_path / "scores.npz")
+    titles = labelled["Game"].tolist()
+
+    with patch("evaluate_matching.build_score_cache", wraps=build_score_cache) as mock_build:
+        load_or_build_score_cache(titles, target_names, cache_file)
+        load_or_build_score_cache(titles, target_names, cache_file)
+        assert mock_build.call_count == 1
+
+        scores, _, cached_targets = load_or_build_score_cache(titles, target_names[:2],
+                                                              cache_file)
+        assert mock_build.call_count == 2
+
+    assert cached_targets == target_names[:2]
+    assert scores.shape == (3, 2)
+
+
+@patch("evaluate_matching.LOGGER.error")
+def test_load_score_cache_missing(mock_logging):
+    """Tests a FileNotFoundError is raised when there is no cache."""
+    with pytest.raises(FileNotFoundError):
+        load_score_cache("missing_scores.npz")
+
+
+def test_threshold_curves():
+    """Tests precision and recall are calculated for every threshold."""
+    scores = np.array([[9500, 1000], [1000, 8500], [7000, 2000]], dtype=np.uint16)
+    labelled = pd.DataFrame({"Game": ["A", "B", "C", "Not Cached"],
+                             "Match": ["Target A", "Target A", None, "Target B"]})
+
+    curves = threshold_curves(scores, ["A", "B", "C"],
+                              ["Target A", "Target B"], labelled)
+
+    assert len(curves) == 101
+    at_70 = curves.loc[70]
+    assert at_70["precision"] == pytest.approx(1 / 3)
+    assert at_70["recall"] == pytest.approx(1 / 2)
+    at_90 = curves.loc[90]
+    assert at_90["precision"] == 1.0
+    assert at_90["recall"] == pytest.approx(1 / 2)
+    assert curves.loc[100, "precision"] == 0.0
+    assert best_threshold(curves) == 86
+
+
+def test_cached_scores_agree_with_the_pipeline_threshold(tmp_path):
+    """Tests a ratio just under a threshold is not counted as a match at that threshold."""
+    source, target = "a" * 35 + "b" * 9, "a" * 35 + "c" * 9
+    assert 79.5 < fuzz.ratio(source, target) < 80
+    cache_file = str(tmp_path / "scores.npz")
+
+    build_score_cache([source], [target], cache_file)
+    scores, _, _ = load_score_cache(cache_file)
+    curves = threshold_curves(scores, [source], [target],
+                              pd.DataFrame({"Game": [source], "Match": [target]}))
+
+    assert scores[0, 0] == 7954
+    assert curves.loc[79, "recall"] == 1.0
+    assert curves.loc[80, "recall"] == 0.0
@@ -4,7 +4,24 @@ import pytest
 import pandas as pd
 from unittest.mock import patch
 from fuzzy_matching import (load_video_game_data, fuzzy_match, match_row,
-                            get_matched_row, process_video_game_data)
+                            get_matched_row, process_video_game_data,
+                            select_scorers, multi_scorer_extract,
+                            match_positions, gather_matched_columns, unique_title_keys,
+                            build_combined_frame, OUTPUT_COLUMNS,
+                            run_checkpointed_matching, read_checkpoint_progress,
+                            EnrichmentSource, ENRICHMENT_SOURCES, register_source,
+                            enrich_wcd_data, load_sources_data, parse_shard,
+                            shard_positions, merge_shards, ratio_match_positions,
+                            match_sources)
+import logging
+import os
+import subprocess
+import sys
+from rapidfuzz import fuzz, process
+import numpy as np
+from lsh_index import build_lsh_index
+from year_index import build_year_index
+from partitioned_store import read_partitioned
 
 
 @patch("fuzzy_matching.LOGGER.info")
@@ -68,6 +85,41 @@ def test_fuzzy_match_no_valid_matches(mock_logging):
         "No match found above threshold for: %s (score: %s)", source_name, 25.0)
 
 
+def test_select_scorers_single_word():
+    """Test only WRatio is used for single word titles."""
+    assert select_scorers("Starfield") == [fuzz.WRatio]
+
+
+def test_select_scorers_subtitle():
+    """Test subtitle-heavy titles also get token set and partial scorers."""
+    assert select_scorers("Witcher 3: Wild Hunt, The") == [
+        fuzz.WRatio, fuzz.token_set_ratio, fuzz.partial_ratio]
+
+
+def test_multi_scorer_extract_reordered_title():
+    """Test the multi-scorer ranks a reordered title first."""
+    target_names = ["The Witcher 2", "The Witcher 3: Wild Hunt", "Witchfire"]
+
+    result = multi_scorer_extract("Witcher 3: Wild Hunt, The", target_names)
+
+    assert len(result) == 1
+    assert result[0][0] == "The Witcher 3: Wild Hunt"
+    assert result[0][2] == 1
+    assert result[0][1] > 90
+
+
+def test_fuzzy_match_multi_scorer_valid():
+    """Test multi-scorer matching finds titles that fuzz.ratio scores below threshold."""
+    target_names = ["The Witcher 3: Wild Hunt", "Battlefield"]
+
+    assert fuzzy_match("Witcher 3: Wild Hunt, The",
+                       target_names, min_score=90) == (None, 0)
+    best_match, score = fuzzy_match("Witcher 3: Wild Hunt, The", target_names,
+                                    min_score=90, multi_scorer=True)
+    assert best_match == "The Witcher 3: Wild Hunt"
+    assert score > 90
+
+
 def test_get_matched_row_valid_match():
     """Test get_matched_row returns correct data for valid match."""
     df = pd.DataFrame({
@@ -135,14 +187,14 @@ def test_match_row_logs_processing(mock_logging):
 
 
 @patch("fuzzy_matching.LOGGER.info")
-def test_process_video_game_data_logs_completion(mock_logging):
+def test_process_video_game_data_logs_completion(mock_logging, tmp_path):
     """Test that process completion is logged."""
+    output_file = str(tmp_path / "combined_video_game_data.csv")
     with patch("fuzzy_matching.load_video_game_data") as mock_load:
         mock_load.return_value = (
             pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
-        process_video_game_data()
-        mock_logging.assert_called_with("Saving combined data to %s",
-                                        "combined_video_game_data.csv")
+        process_video_game_data(output_file)
+        mock_logging.assert_called_with("Saving combined data to %s", output_file)
 
 
 def test_match_row_no_matches():
@@ -244,3 +296,507 @@ def test_main_workflow(mock_load_video_game_data, mock_to_csv):
 
     mock_to_csv.assert_called_once_with(
         "combined_video_game_data.csv", index=False)
+
+
+def test_match_positions():
+    """Test the position of the best match is found for each source name."""
+    target_names = ["Battlefield", "Assassin Creed", "Assassin Creed"]
+
+    result = match_positions(["Assassin's Creed", "Unknown Game", "Battlefield"],
+                             target_names, match_threshold=80)
+
+    assert result.tolist() == [1, -1, 0]
+
+
+def test_match_positions_multi_scorer():
+    """Test the multi-scorer mode is used to find positions."""
+    result = match_positions(["Witcher 3: Wild Hunt, The"],
+                             ["Witchfire", "The Witcher 3: Wild Hunt"],
+                             match_threshold=90, multi_scorer=True)
+
+    assert result.tolist() == [1]
+
+
+def test_gather_matched_columns():
+    """Test matched columns are taken and unmatched rows and missing columns are empty."""
+    target_df = pd.DataFrame({"Name": ["Game1", "Game2"], "NA_Sales": [1.5, 2.0]})
+
+    result = gather_matched_columns(target_df, np.array([1, -1, 0]),
+                                    {"North American Sales": "NA_Sales",
+                                     "Global Sales": "Global_Sales"})
+
+    assert list(result.columns) == ["North American Sales", "Global Sales"]
+    assert result["North American Sales"].tolist()[::2] == [2.0, 1.5]
+    assert np.isnan(result["North American Sales"][1])
+    assert result["Global Sales"].isna().all()
+
+
+def test_build_combined_frame_matches_match_row():
+    """Test the columnar combined data is the same as applying match_row to every row."""
+    wcd_data = pd.DataFrame({
+        "Game": ["Assassin's Creed", "Unknown Game", "Call of Duty"],
+        "Release Year": ["2007", "2020", "2003"],
+        "Developer": ["Ubisoft", "Dev", "Infinity Ward"],
+        "Publisher": ["Ubisoft", "Pub", "Activision"],
+        "Rating": ["Recommended", "Informational", "Recommended"],
+        "Review": ["Review1", "Review2", "Review3"]
+    })
+    vg_sales_data = pd.DataFrame({
+        "Name": ["Assassin Creed", "Battlefield"],
+        "NA_Sales": [1.5, 2.0],
+        "EU_Sales": [1.0, 1.5],
+        "JP_Sales": [0.2, 0.3],
+        "Other_Sales": [0.5, 0.7],
+        "Global_Sales": [3.2, 4.5]
+    })
+    rawg_data = pd.DataFrame({
+        "Name": ["Assassin Creed", "Call of Duty"],
+        "RAWG Rating": [3.5, 4.0],
+        "Metacritic Rating": [85.0, 90.0]
+    })
+
+    result = build_combined_frame(wcd_data, vg_sales_data, rawg_data)
+    expected = wcd_data.apply(match_row, axis=1,
+                              args=(vg_sales_data, rawg_data))
+
+    assert list(result.columns) == OUTPUT_COLUMNS
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_build_combined_frame_missing_wcd_columns():
+    """Test missing WCD columns are filled with N/A."""
+    result = build_combined_frame(pd.DataFrame({"Game": ["Game1"]}),
+                                  pd.DataFrame({"Name": ["Game1"]}),
+                                  pd.DataFrame({"Name": ["Game2"]}))
+
+    assert result.loc[0, "Release Year"] == "N/A"
+    assert result.loc[0, "WCD Review"] == "N/A"
+    assert result["Global Sales"].isna().all()
+
+
+def test_build_combined_frame_empty():
+    """Test an empty WCD DataFrame gives an empty combined DataFrame."""
+    result = build_combined_frame(pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+
+    assert result.empty
+    assert list(result.columns) == OUTPUT_COLUMNS
+
+
+@pytest.fixture
+def matching_data():
+    """WCD, video game sales and RAWG data for checkpointed matching."""
+    wcd_data = pd.DataFrame({
+        "Game": [f"Game {i}" for i in range(7)],
+        "Release Year": [2000 + i for i in range(7)],
+        "Developer": "Dev",
+        "Publisher": "Pub",
+        "Rating": "Recommended",
+        "Review": "Review"
+    })
+    vg_sales_data = pd.DataFrame({"Name": ["Game 1", "Game 2", "Game 5"],
+                                  "NA_Sales": [1, 2, 5],
+                                  "Global_Sales": [1.5, 2.5, 5.5]})
+    rawg_data = pd.DataFrame({"Name": ["Game 1", "Game 3"],
+                              "RAWG Rating": [3.5, 4.0],
+                              "Metacritic Rating": [70, 80]})
+    return wcd_data, vg_sales_data, rawg_data
+
+
+def test_run_checkpointed_matching_resumes_after_crash(matching_data, tmp_path):
+    """Test an interrupted run resumes from its checkpoint and gives the same output."""
+    wcd_data, vg_sales_data, rawg_data = matching_data
+    checkpoint_file = str(tmp_path / "checkpoint.csv")
+    expected_file = str(tmp_path / "expected.csv")
+    build_combined_frame(wcd_data, vg_sales_data, rawg_data).to_csv(
+        expected_file, index=False)
+
+    batches = []
+
+    def crash_on_third_batch(*args, **kwargs):
+        if len(batches) == 2:
+            raise KeyboardInterrupt
+        batches.append(args[0])
+        return match_sources(*args, **kwargs)
+
+    sources_data = [(ENRICHMENT_SOURCES["RAWG"], rawg_data),
+                    (ENRICHMENT_SOURCES["video game sales"], vg_sales_data)]
+    with patch("fuzzy_matching.match_sources", side_effect=crash_on_third_batch):
+        with pytest.raises(KeyboardInterrupt):
+            run_checkpointed_matching(wcd_data, sources_data,
+                                      checkpoint_file, batch_size=2)
+    assert read_checkpoint_progress(
+        f"{checkpoint_file}.progress.json")["rows_done"] == 4
+
+    with open(f"{checkpoint_file}.matches.csv", "a", encoding="UTF-8") as f:
+        f.write("Half-written row")
+
+    with patch("fuzzy_matching.match_sources", wraps=match_sources) as mock_build:
+        run_checkpointed_matching(wcd_data, sources_data,
+                                  checkpoint_file, batch_size=2)
+    assert [len(call.args[0]) for call in mock_build.call_args_list] == [2, 1]
+
+    with open(checkpoint_file, encoding="UTF-8") as f, open(expected_file, encoding="UTF-8") as g:
+        assert f.read() == g.read()
+
+
+def test_run_checkpointed_matching_matches_duplicate_titles_once(matching_data, tmp_path, caplog):
+    """Test duplicate titles across batches are matched once and the savings logged once."""
+    wcd_data, vg_sales_data, rawg_data = matching_data
+    wcd_data = pd.concat([wcd_data, wcd_data.iloc[[1, 3, 1]].assign(Review="Again")],
+                         ignore_index=True)
+    checkpoint_file = str(tmp_path / "checkpoint.csv")
+    expected_file = str(tmp_path / "expected.csv")
+    build_combined_frame(wcd_data, vg_sales_data, rawg_data).to_csv(expected_file, index=False)
+    sources_data = [(ENRICHMENT_SOURCES["RAWG"], rawg_data),
+                    (ENRICHMENT_SOURCES["video game sales"], vg_sales_data)]
+
+    caplog.set_level(logging.INFO)
+    with patch("fuzzy_matching.match_sources", wraps=match_sources) as mock_match:
+        run_checkpointed_matching(wcd_data, sources_data, checkpoint_file, batch_size=3)
+
+    assert [len(call.args[0]) for call in mock_match.call_args_list] == [3, 3, 1]
+    assert caplog.text.count("saving 3 scoring calls per source") == 1
+    with open(checkpoint_file, encoding="UTF-8") as f, open(expected_file, encoding="UTF-8") as g:
+        assert f.read() == g.read()
+    assert pd.read_csv(checkpoint_file)["WCD Review"].tolist()[-3:] == ["Again"] * 3
+
+
+def test_run_checkpointed_matching_restarts_for_new_source_data(matching_data, tmp_path):
+    """Test a checkpoint made from different source data is not resumed."""
+    wcd_data, _, rawg_data = matching_data
+    checkpoint_file = str(tmp_path / "checkpoint.csv")
+    run_checkpointed_matching(wcd_data, [(ENRICHMENT_SOURCES["RAWG"], rawg_data)],
+                              checkpoint_file, batch_size=2)
+    progress = read_checkpoint_progress(f"{checkpoint_file}.progress.json")
+
+    new_rawg_data = rawg_data.assign(**{"RAWG Rating": rawg_data["RAWG Rating"] + 1})
+    run_checkpointed_matching(wcd_data, [(ENRICHMENT_SOURCES["RAWG"], new_rawg_data)],
+                              checkpoint_file, batch_size=2)
+
+    new_progress = read_checkpoint_progress(f"{checkpoint_file}.progress.json")
+    assert new_progress["key"] != progress["key"]
+    result = pd.read_csv(checkpoint_file)
+    matched = result["RAWG Rating"].notna()
+    assert matched.any()
+    assert set(result.loc[matched, "RAWG Rating"]) <= set(new_rawg_data["RAWG Rating"])
+
+
+def test_run_checkpointed_matching_restarts_for_new_data(matching_data, tmp_path):
+    """Test a checkpoint made from different WCD data is not resumed."""
+    wcd_data, vg_sales_data, rawg_data = matching_data
+    checkpoint_file = str(tmp_path / "checkpoint.csv")
+    sources_data = [(ENRICHMENT_SOURCES["RAWG"], rawg_data)]
+    run_checkpointed_matching(wcd_data.iloc[:3], sources_data,
+                              checkpoint_file, batch_size=2)
+
+    run_checkpointed_matching(wcd_data, sources_data,
+                              checkpoint_file, batch_size=2)
+
+    assert pd.read_csv(checkpoint_file)["Name"].tolist() == list(wcd_data["Game"])
+
+
+@patch("fuzzy_matching.load_video_game_data")
+def test_process_video_game_data_with_checkpoint(mock_load, matching_data, tmp_path):
+    """Test the checkpoint becomes the output file once matching finishes."""
+    mock_load.return_value = matching_data
+    output_file = str(tmp_path / "combined.csv")
+    checkpoint_file = str(tmp_path / "checkpoint.csv")
+
+    result = process_video_game_data(output_file, checkpoint_file=checkpoint_file,
+                                     batch_size=3)
+
+    assert len(result) == 7
+    assert result["North American Sales"].tolist()[1:3] == [1.0, 2.0]
+    assert not os.path.exists(checkpoint_file)
+    assert not os.path.exists(f"{checkpoint_file}.progress.json")
+
+
+@patch("fuzzy_matching.load_video_game_data")
+def test_process_video_game_data_partitioned_output(mock_load, matching_data, tmp_path):
+    """Test the output can be saved partitioned by release year instead of as a CSV."""
+    mock_load.return_value = matching_data
+    output_file = str(tmp_path / "combined.csv")
+    checkpoint_file = str(tmp_path / "checkpoint.csv")
+
+    result = process_video_game_data(output_file, checkpoint_file=checkpoint_file,
+                                     batch_size=3, output_format="partitioned")
+
+    assert not os.path.exists(output_file)
+    assert not os.path.exists(checkpoint_file)
+    saved = read_partitioned(str(tmp_path / "combined"))
+    assert sorted(saved["Name"]) == sorted(result["Name"])
+    assert len(saved) == 7
+
+
+def test_enrich_wcd_data_with_extra_source():
+    """Test a new source only needs its name column, fields and match settings."""
+    wcd_data = pd.DataFrame({"Game": ["Portal 2", "Doom"], "Rating": ["R1", "R2"]})
+    hltb_source = EnrichmentSource("HowLongToBeat", "hltb.csv",
+                                   {"Main Story Hours": "main_story"},
+                                   name_column="title", match_config={"match_threshold": 95})
+    hltb_data = pd.DataFrame({"title": ["Portal 2", "Doom 2"], "main_story": [8.5, 10.0]})
+    rawg_data = pd.DataFrame({"Name": ["Doom"], "RAWG Rating": [4.0],
+                              "Metacritic Rating": [85.0]})
+
+    result = enrich_wcd_data(wcd_data, [(ENRICHMENT_SOURCES["RAWG"], rawg_data),
+                                        (hltb_source, hltb_data)])
+
+    assert list(result.columns) == [*OUTPUT_COLUMNS[:8], "Main Story Hours"]
+    assert result["Main Story Hours"].tolist()[0] == 8.5
+    assert np.isnan(result["Main Story Hours"][1])
+    assert result["RAWG Rating"].tolist()[1] == 4.0
+
+
+@patch("fuzzy_matching.read_output")
+def test_load_sources_data_loads_registered_sources(mock_read_output):
+    """Test registered sources that were not already loaded are read from their saved output."""
+    steam_data = pd.DataFrame({"Name": ["Game1"], "Owners": [100]})
+    mock_read_output.return_value = steam_data
+    register_source(EnrichmentSource("Steam", "steam.csv", {"Steam Owners": "Owners"}))
+    try:
+        result = load_sources_data({"RAWG": pd.DataFrame(),
+                                    "video game sales": pd.DataFrame()})
+    finally:
+        del ENRICHMENT_SOURCES["Steam"]
+
+    assert [source.name for source, _ in result] == ["RAWG", "video game sales", "Steam"]
+    mock_read_output.assert_called_once_with("steam.csv")
+    assert result[2][1] is steam_data
+
+
+def test_match_positions_with_lsh_index():
+    """Test LSH matching finds the same matches as exact matching on clear matches."""
+    target_names = ["Dark Souls", "Portal 2", "Hollow Knight", "Celeste"]
+    source_names = ["Hollow Knight", "Portal 2!", "Unrelated Game"]
+
+    positions = match_positions(source_names, target_names,
+                                lsh_index=build_lsh_index(target_names))
+
+    assert positions.tolist() == match_positions(source_names, target_names).tolist()
+    assert positions.tolist() == [2, 1, -1]
+
+
+def test_enrich_wcd_data_with_lsh_source(tmp_path):
+    """Test a source with an lsh match_config is matched through a saved LSH index."""
+    wcd_data = pd.DataFrame({"Game": ["Portal 2", "Doom"]})
+    index_file = str(tmp_path / "index.npz")
+    source = EnrichmentSource("Big", "big.csv", {"Score": "score"},
+                              match_config={"lsh": {"index_file": index_file}})
+    source_data = pd.DataFrame({"Name": ["Doom", "Portal 2"], "score": [1.0, 2.0]})
+
+    result = enrich_wcd_data(wcd_data, [(source, source_data)])
+
+    assert result["Score"].tolist() == [2.0, 1.0]
+    assert os.path.exists(index_file)
+
+
+def test_unique_title_keys():
+    """Test identical names are grouped, keeping the first of each group."""
+    codes, first_positions = unique_title_keys(["Doom", "Portal 2", "DOOM", "Doom"])
+
+    assert codes.tolist() == [0, 1, 2, 0]
+    assert first_positions.tolist() == [0, 1, 2]
+
+
+def test_match_positions_does_not_depend_on_name_order():
+    """Test each name gets the match it would get on its own, whatever name comes first."""
+    target_names = ["Doom", "Quake"]
+
+    assert match_positions(["Doom", "DOOM"], target_names).tolist() == [0, -1]
+    assert match_positions(["DOOM", "Doom"], target_names).tolist() == [-1, 0]
+
+
+def test_match_positions_scores_duplicate_titles_once(caplog):
+    """Test duplicate titles are scored once and every row gets the shared match."""
+    caplog.set_level(logging.DEBUG)
+    with patch("fuzzy_matching.score_positions",
+               return_value=np.array([1, -1])) as mock_score:
+        positions = match_positions(["Portal 2", "Unknown", "Portal 2", "Portal 2"],
+                                    ["Doom", "Portal 2"])
+
+    assert positions.tolist() == [1, -1, 1, 1]
+    assert mock_score.call_args.args[0] == ["Portal 2", "Unknown"]
+    assert "saving 2 scoring calls" in caplog.text
+
+
+def test_match_positions_threads_match_extract_one():
+    """Test threaded cdist matching finds the same positions as extractOne, ties included."""
+    target_names = ["Doom", "Doom", "Portal 2", "Portal", "Celeste"]
+    source_names = ["Doom", "Portal 3", "Celest", "Hades", "Portal"]
+    expected = []
+    for name in source_names:
+        match = process.extractOne(name, target_names, scorer=fuzz.ratio, score_cutoff=80)
+        expected.append(match[2] if match else -1)
+
+    with patch("fuzzy_matching.SCORE_CHUNK_CELLS", 10):
+        positions = match_positions(source_names, target_names, threads=2)
+
+    assert positions.tolist() == expected
+    assert match_positions(source_names, [], threads=2).tolist() == [-1] * 5
+
+
+def test_ratio_match_positions_never_matches_missing_names():
+    """Test missing source and target names are never matched, on every run."""
+    for _ in range(50):
+        assert ratio_match_positions([np.nan, "abc", None], ["abc", "x"]).tolist() == [-1, 0, -1]
+        assert ratio_match_positions(["abc"], [np.nan, "x", "abc"]).tolist() == [2]
+
+
+@pytest.mark.parametrize("multi_scorer", [False, True])
+def test_enrich_wcd_data_leaves_missing_games_unmatched(multi_scorer):
+    """Test a WCD row without a game name gets no source fields."""
+    wcd_data = pd.DataFrame({"Game": [np.nan, "Doom"]})
+    rawg_data = pd.DataFrame({"Name": ["Doom", "Quake"], "RAWG Rating": [4.0, 3.0],
+                              "Metacritic Rating": [85.0, 80.0]})
+
+    result = enrich_wcd_data(wcd_data, [(ENRICHMENT_SOURCES["RAWG"], rawg_data)],
+                             multi_scorer=multi_scorer)
+
+    assert np.isnan(result["RAWG Rating"][0])
+    assert result["RAWG Rating"][1] == 4.0
+
+
+def test_multi_scorer_never_matches_missing_names():
+    """Test the multi-scorer paths give a missing title no match instead of failing."""
+    target_names = ["Doom", "Portal 2"]
+
+    assert multi_scorer_extract(np.nan, target_names) == []
+    assert match_positions([np.nan, "Doom"], target_names,
+                           multi_scorer=True).tolist() == [-1, 0]
+    assert match_positions([np.nan, "Doom"], target_names, multi_scorer=True,
+                           lsh_index=build_lsh_index(target_names)).tolist() == [-1, 0]
+
+
+def test_parse_shard():
+    """Test shards are parsed from i/N and invalid shards are rejected."""
+    assert parse_shard("1/4") == (1, 4)
+    for shard in ("4/4", "-1/2", "1", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(shard)
+
+
+def test_shard_positions_partition_rows(matching_data):
+    """Test every WCD row is in exactly one shard, and the same one every time."""
+    wcd_data = matching_data[0]
+    shards = [shard_positions(wcd_data, i, 3) for i in range(3)]
+
+    assert sorted(np.concatenate(shards).tolist()) == list(range(len(wcd_data)))
+    assert shard_positions(wcd_data.copy(), 1, 3).tolist() == shards[1].tolist()
+
+
+@patch("fuzzy_matching.load_video_game_data")
+def test_merge_shards_matches_full_run(mock_load, matching_data, tmp_path):
+    """Test merging the shards gives the same file as matching every row at once."""
+    mock_load.return_value = matching_data
+    full_file = str(tmp_path / "full.csv")
+    output_file = str(tmp_path / "combined.csv")
+    process_video_game_data(full_file)
+    for i in range(3):
+        process_video_game_data(output_file, shard=(i, 3),
+                                checkpoint_file=str(tmp_path / "checkpoint.csv"))
+
+    merge_shards(output_file, 3)
+
+    with open(full_file, encoding="UTF-8") as full, open(output_file, encoding="UTF-8") as merged:
+        assert merged.read() == full.read()
+
+
+@patch("fuzzy_matching.load_video_game_data")
+def test_merge_shards_validates_partials(mock_load, matching_data, tmp_path):
+    """Test missing shards and shards from different WCD data are rejected."""
+    mock_load.return_value = matching_data
+    output_file = str(tmp_path / "combined.csv")
+    process_video_game_data(output_file, shard=(0, 2))
+    with pytest.raises(FileNotFoundError):
+        merge_shards(output_file, 2)
+
+    wcd_data = matching_data[0].assign(Rating="Changed")
+    mock_load.return_value = (wcd_data, *matching_data[1:])
+    process_video_game_data(output_file, shard=(1, 2))
+    with pytest.raises(ValueError):
+        merge_shards(output_file, 2)
+
+
+def test_shards_run_as_separate_processes(matching_data, tmp_path):
+    """Test N processes sharing only a folder can match their shards and merge them."""
+    wcd_data, vg_sales_data, rawg_data = matching_data
+    wcd_data.to_csv(tmp_path / "clean_woke_content_detector.csv", index=False)
+    vg_sales_data.to_csv(tmp_path / "videogame_sales.csv", index=False)
+    rawg_data.to_csv(tmp_path / "clean_rawg_video_games.csv", index=False)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fuzzy_matching.py")
+
+    shards = [subprocess.Popen([sys.executable, script, "--shard", f"{i}/2"], cwd=tmp_path)
+              for i in range(2)]
+    assert [shard.wait(timeout=60) for shard in shards] == [0, 0]
+    subprocess.run([sys.executable, script, "--merge", "2"], cwd=tmp_path, check=True,
+                   timeout=60)
+
+    combined = pd.read_csv(tmp_path / "combined_video_game_data.csv")
+    assert combined["Name"].tolist() == wcd_data["Game"].tolist()
+    assert combined["RAWG Rating"].tolist()[1] == 3.5
+
+
+def test_match_positions_with_year_index():
+    """Test names are only matched to targets released within the year tolerance."""
+    target_names = ["Doom", "Doom", "Portal 2"]
+    year_index = build_year_index(target_names, [1993, 2016, 2011], tolerance=1)
+
+    result = match_positions(["Doom", "Doom", "Doom", "Portal 2", "Portal 2"], target_names,
+                             year_index=year_index,
+                             source_years=[1993, 2017, None, "2011", 2020])
+
+    assert result.tolist() == [0, 1, 0, 2, -1]
+
+
+def test_enrich_wcd_data_with_year_window_source():
+    """Test a source with a year_window match_config matches each game to its release year."""
+    wcd_data = pd.DataFrame({"Game": ["Doom", "Doom"], "Release Year": ["1993", "2016"]})
+    source = EnrichmentSource("Dated", "dated.csv", {"Score": "score"},
+                              match_config={"year_window": {"year_column": "Year"}})
+    source_data = pd.DataFrame({"Name": ["Doom", "Doom"], "Year": [2016, 1993],
+                                "score": [2.0, 1.0]})
+
+    result = enrich_wcd_data(wcd_data, [(source, source_data)])
+
+    assert result["Score"].tolist() == [1.0, 2.0]
+
+
+def test_run_checkpointed_matching_builds_source_indexes_once(matching_data, tmp_path):
+    """Test a source's LSH and year indexes are built once, not once per batch."""
+    wcd_data, _, rawg_data = matching_data
+    source = EnrichmentSource("Indexed", "indexed.csv", {"Score": "RAWG Rating"},
+                              match_config={"lsh": {"index_file": str(tmp_path / "index.npz")},
+                                            "year_window": {}})
+
+    with patch("fuzzy_matching.load_or_build_lsh_index",
+               side_effect=lambda names, **_: build_lsh_index(names)) as mock_lsh, \
+            patch("fuzzy_matching.build_year_index",
+                  side_effect=build_year_index) as mock_year:
+        run_checkpointed_matching(wcd_data, [(source, rawg_data)],
+                                  str(tmp_path / "checkpoint.csv"), batch_size=2)
+
+    assert len(wcd_data) > 2
+    assert mock_lsh.call_count == 1
+    assert mock_year.call_count == 1
+
+
+def test_match_positions_with_year_index_and_missing_names():
+    """Test missing source and target names are left unmatched by the year index."""
+    target_names = ["Halo", np.nan, "Doom"]
+    year_index = build_year_index(target_names, [2001, 2001, None])
+
+    for multi_scorer in (False, True):
+        result = match_positions(["Halo", np.nan, "Doom"], target_names,
+                                 multi_scorer=multi_scorer, year_index=year_index,
+                                 source_years=[2001, 2001, 1990])
+        assert result.tolist() == [0, -1, 2]
+
+
+def test_match_positions_with_lsh_index_and_missing_names():
+    """Test missing source and target names are left unmatched by the LSH index."""
+    target_names = ["Halo", np.nan, "Doom"]
+
+    result = match_positions(["Halo", np.nan, "Doom"], target_names,
+                             lsh_index=build_lsh_index(target_names))
+
+    assert result.tolist() == [0, -1, 2]
@@ -0,0 +1,138 @@
+"""Tests functions for load_database.py."""
+# pylint: skip-file
+import sqlite3
+from unittest.mock import patch
+import pytest
+import numpy as np
+import pandas as pd
+from partitioned_store import write_output
+from load_database import (TableSpec, quote, sql_type, key_text, prepare_rows, connect,
+                           load_table, load_database, query_database, ROW_KEY_COLUMN)
+
+
+@pytest.fixture
+def spec(tmp_path):
+    return TableSpec("combined", str(tmp_path / "combined.csv"), ["Name", "Release Year"],
+                     ["Name", "WCD Rating", "Release Year"])
+
+
+@pytest.fixture
+def combined_data():
+    return pd.DataFrame({"Name": ["Portal 2", "Doom", "Celeste"],
+                         "Release Year": [2011.0, np.nan, 2018.0],
+                         "WCD Rating": ["Recommended", "Recommended", None],
+                         "Global Sales": [4.5, np.nan, 1.0]})
+
+
+def test_quote():
+    """Tests names with spaces and quotes are quoted."""
+    assert quote('WCD "Rating"') == '"WCD ""Rating"""'
+
+
+def test_sql_type():
+    """Tests pandas dtypes map to SQLite types."""
+    assert sql_type(np.dtype("int64")) == "INTEGER"
+    assert sql_type(np.dtype("float64")) == "REAL"
+    assert sql_type(np.dtype("O")) == "TEXT"
+
+
+def test_key_text():
+    """Tests whole numbers are written the same whether read as floats or integers."""
+    assert key_text(pd.Series([2011.0, np.nan, 1.5])).tolist() == ["2011", "", "1.5"]
+    assert key_text(pd.Series([2011])).tolist() == ["2011"]
+    assert key_text(pd.Series(["Doom", None])).tolist() == ["Doom", ""]
+
+
+@patch("load_database.LOGGER.warning")
+def test_prepare_rows_logs_dropped_rows(mock_logging, combined_data):
+    """Tests the number of rows dropped for sharing a key is logged."""
+    df = pd.concat([combined_data, combined_data.iloc[[0, 2]]])
+
+    prepare_rows(df, ["Name", "Release Year"])
+    mock_logging.assert_called_once()
+    assert mock_logging.call_args.args[1] == 2
+
+    mock_logging.reset_mock()
+    prepare_rows(combined_data, ["Name", "Release Year"])
+    mock_logging.assert_not_called()
+
+
+def test_prepare_rows(combined_data):
+    """Tests saved index columns are dropped and duplicate keys keep the last row."""
+    df = pd.concat([combined_data, combined_data.iloc[[0]].assign(**{"Global Sales": 9.0})])
+    df.insert(0, "Unnamed: 0", range(len(df)))
+
+    rows = prepare_rows(df, ["Name", "Release Year"])
+
+    assert "Unnamed: 0" not in rows.columns
+    assert len(rows) == 3
+    assert rows.loc[rows["Name"] == "Portal 2", "Global Sales"].tolist() == [9.0]
+
+    with pytest.raises(ValueError):
+        prepare_rows(combined_data, ["Title"])
+
+
+def test_load_table_upserts_and_deletes(spec, combined_data, tmp_path):
+    """Tests a refresh updates changed rows, adds new ones and deletes missing ones."""
+    database_file = str(tmp_path / "test.db")
+    connection = connect(database_file)
+    load_table(connection, spec, combined_data)
+
+    refreshed = combined_data.drop(index=2)
+    refreshed.loc[0, "Global Sales"] = 5.0
+    refreshed.loc[3] = ["Hades", 2020.0, "Recommended", 2.0]
+    refreshed["Developer"] = "Dev"
+    load_table(connection, spec, refreshed)
+    connection.close()
+
+    result = query_database('SELECT Name, "Release Year", "Global Sales", Developer '
+                            'FROM combined ORDER BY Name', database_file=database_file)
+    assert result["Name"].tolist() == ["Doom", "Hades", "Portal 2"]
+    assert result["Global Sales"].tolist()[1:] == [2.0, 5.0]
+    assert result["Developer"].tolist() == ["Dev"] * 3
+    assert pd.isna(result["Release Year"][0])
+
+
+def test_load_table_creates_indexes(spec, combined_data, tmp_path):
+    """Tests the title, rating and year columns are indexed."""
+    connection = connect(str(tmp_path / "test.db"))
+    load_table(connection, spec, combined_data)
+
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(combined)")}
+    connection.close()
+    assert {"idx_combined_name", "idx_combined_wcd_rating",
+            "idx_combined_release_year"} <= indexes
+
+
+def test_load_table_rolls_back_on_error(spec, combined_data, tmp_path):
+    """Tests a failed load leaves the previous table unchanged."""
+    connection = connect(str(tmp_path / "test.db"))
+    load_table(connection, spec, combined_data)
+
+    bad = combined_data.assign(**{"Global Sales": [object(), 1.0, 2.0]})
+    with pytest.raises(sqlite3.Error):
+        load_table(connection, spec, bad)
+
+    assert connection.execute("SELECT COUNT(*) FROM combined").fetchone()[0] == 3
+    connection.close()
+
+
+def test_load_database_skips_missing_files(spec, combined_data, tmp_path):
+    """Tests existing CSVs are loaded and missing ones skipped."""
+    combined_data.to_csv(spec.csv_file, index=False)
+    missing = TableSpec("rawg", str(tmp_path / "missing.csv"), ["Name"], ["Name"])
+
+    loaded = load_database(str(tmp_path / "test.db"), [spec, missing])
+
+    assert loaded == {"combined": 3}
+    assert query_database("SELECT COUNT(*) AS n FROM combined",
+                          database_file=str(tmp_path / "test.db"))["n"][0] == 3
+
+
+def test_load_database_reads_partitioned_output(spec, combined_data, tmp_path):
+    """Tests a table saved only in the partitioned format is loaded."""
+    write_output(combined_data, spec.csv_file, "partitioned")
+
+    loaded = load_database(str(tmp_path / "test.db"), [spec])
+
+    assert loaded == {"combined": 3}
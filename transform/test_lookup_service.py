@@ -0,0 +1,133 @@
+"""Tests functions for lookup_service.py and load_test_lookup.py."""
+# pylint: skip-file
+import os
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+import pytest
+import pandas as pd
+from fuzzy_matching import EnrichmentSource, RAWG_COLUMNS
+from partitioned_store import write_output
+from lookup_service import LookupService, SourceIndex, create_server, watch_for_changes
+from load_test_lookup import run_load_test, single_request, batch_request
+
+
+@pytest.fixture
+def sources(tmp_path):
+    wcd_csv = tmp_path / "wcd.csv"
+    rawg_csv = tmp_path / "rawg.csv"
+    pd.DataFrame({"Game": ["Portal 2", "Doom"], "Rating": ["Recommended", None],
+                  "Review": ["Great", "Fine"]}).to_csv(wcd_csv, index=False)
+    pd.DataFrame({"Name": ["Portal 2", "Portal 2", "Celeste"], "Release Year": [2011, 2012, 2018],
+                  "RAWG Rating": [4.5, 1.0, 4.4],
+                  "Metacritic Rating": [95.0, None, 92.0]}).to_csv(rawg_csv, index=False)
+    return [EnrichmentSource("WCD", str(wcd_csv), {"Name": "Game", "WCD Rating": "Rating"},
+                             name_column="Game"),
+            EnrichmentSource("RAWG", str(rawg_csv), RAWG_COLUMNS)]
+
+
+@pytest.fixture
+def server(sources):
+    http_server = create_server(LookupService(sources), port=0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{http_server.server_address[1]}"
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def test_source_index_lookup(sources):
+    """Tests a match returns the first row with the matched name and null missing values."""
+    index = SourceIndex(sources[1])
+
+    result = index.lookup("Portal 2", 80)
+
+    assert result == {"match": "Portal 2", "score": 100.0, "RAWG Rating": 4.5,
+                      "Metacritic Rating": 95.0}
+    assert index.lookup("Unknown Game", 80) is None
+    assert SourceIndex(sources[0]).lookup("Doom", 80)["WCD Rating"] is None
+
+
+def test_lookup_service_lookup_many(sources):
+    """Tests every title is matched against every source."""
+    results = LookupService(sources).lookup_many(["Portal 2", "Celeste"])
+
+    assert [result["title"] for result in results] == ["Portal 2", "Celeste"]
+    assert results[0]["matches"]["WCD"]["WCD Rating"] == "Recommended"
+    assert results[1]["matches"]["WCD"] is None
+    assert results[1]["matches"]["RAWG"]["RAWG Rating"] == 4.4
+
+
+def test_reload_if_changed(sources):
+    """Tests only changed sources are reloaded, and failed reloads keep the loaded data."""
+    service = LookupService(sources)
+    assert service.reload_if_changed() == []
+
+    pd.DataFrame({"Game": ["Hades"], "Rating": ["Recommended"]}).to_csv(
+        sources[0].csv_file, index=False)
+    os.utime(sources[0].csv_file, (0, 12345))
+    assert service.reload_if_changed() == ["WCD"]
+    assert service.lookup("Hades")["matches"]["WCD"]["match"] == "Hades"
+
+    os.remove(sources[1].csv_file)
+    assert service.reload_if_changed() == []
+    assert service.lookup("Celeste")["matches"]["RAWG"]["match"] == "Celeste"
+
+
+def test_watch_for_changes_stops(sources):
+    """Tests the watcher thread exits once stop is set."""
+    stop = threading.Event()
+    thread = watch_for_changes(LookupService(sources), stop, interval=0.01)
+    stop.set()
+    thread.join(timeout=1)
+
+    assert not thread.is_alive()
+
+
+def test_server_get_and_post(server):
+    """Tests single lookups by GET and batched lookups by POST."""
+    with urlopen(single_request(server, "Portal 2")) as response:
+        single = json.loads(response.read())
+    with urlopen(batch_request(server, ["Doom", "Celeste"])) as response:
+        batch = json.loads(response.read())
+
+    assert single["matches"]["RAWG"]["match"] == "Portal 2"
+    assert [result["title"] for result in batch] == ["Doom", "Celeste"]
+
+
+def test_server_rejects_bad_requests(server):
+    """Tests missing titles, bad bodies and unknown paths are rejected."""
+    for url in (f"{server}/match", f"{server}/unknown"):
+        with pytest.raises(HTTPError) as error:
+            urlopen(url)
+        assert error.value.code in (400, 404)
+
+    request = batch_request(server, [])
+    request.data = b"not json"
+    with pytest.raises(HTTPError) as error:
+        urlopen(request)
+    assert error.value.code == 400
+
+
+def test_run_load_test(server):
+    """Tests latency percentiles are reported for single and batched lookups."""
+    single = run_load_test(server, ["Portal 2", "Doom"], request_count=20, concurrency=2)
+    batched = run_load_test(server, ["Portal 2", "Doom"], request_count=5, batch_size=3)
+
+    assert single["requests"] == 20
+    assert 0 < single["p50_ms"] <= single["p99_ms"] <= single["max_ms"]
+    assert batched["requests_per_second"] > 0
+
+
+def test_reload_if_changed_reads_partitioned_output(sources):
+    """Tests a source saved again in the partitioned format is reloaded from it."""
+    service = LookupService(sources)
+    os.utime(sources[1].csv_file, (0, 12345))
+    service.reload_if_changed()
+
+    write_output(pd.DataFrame({"Name": ["Hades"], "Release Year": [2020], "RAWG Rating": [4.6],
+                               "Metacritic Rating": [93.0]}), sources[1].csv_file, "partitioned")
+
+    assert service.reload_if_changed() == ["RAWG"]
+    assert service.lookup("Hades")["matches"]["RAWG"]["match"] == "Hades"
@@ -0,0 +1,100 @@
+"""Tests functions for lsh_index.py."""
+# pylint: skip-file
+import pytest
+import numpy as np
+from lsh_index import (shingle_hashes, minhash_signatures, band_hashes, build_lsh_index,
+                       save_lsh_index, load_lsh_index, load_or_build_lsh_index,
+                       candidate_positions)
+
+TARGET_NAMES = ["The Witcher 3: Wild Hunt", "Dark Souls", "Dark Souls II", "Portal 2",
+                "Hollow Knight", "Stardew Valley", "Celeste", "Hades"]
+
+
+def test_shingle_hashes_ignore_case_and_punctuation():
+    """Tests names that only differ in case and punctuation have the same shingles."""
+    assert sorted(shingle_hashes("Dark Souls!")) == sorted(shingle_hashes("dark souls"))
+    assert len(shingle_hashes("")) == 1
+
+
+def test_minhash_signatures_estimate_similarity():
+    """Tests similar names agree on more signature values than different names."""
+    index = build_lsh_index(TARGET_NAMES)
+    signatures = minhash_signatures(["Dark Souls", "Dark Souls II", "Celeste"],
+                                    index.a, index.b, chunk_size=2)
+
+    assert signatures.shape == (3, 128)
+    assert (signatures[0] == signatures[1]).mean() > (signatures[0] == signatures[2]).mean()
+
+
+def test_band_hashes_shape():
+    """Tests there is one hash per band and name, equal for equal bands."""
+    signatures = np.array([[1, 2, 3, 4], [1, 2, 5, 6]], dtype=np.uint32)
+
+    hashes = band_hashes(signatures, 2)
+
+    assert hashes.shape == (2, 2)
+    assert hashes[0, 0] == hashes[0, 1]
+    assert hashes[1, 0] != hashes[1, 1]
+
+
+def test_build_lsh_index_invalid_settings():
+    """Tests more bands than hash functions are rejected."""
+    with pytest.raises(ValueError):
+        build_lsh_index(TARGET_NAMES, num_perm=8, bands=16)
+
+
+def test_candidate_positions():
+    """Tests exact and near-exact names find themselves and unrelated names find nothing."""
+    index = build_lsh_index(TARGET_NAMES)
+
+    candidates = candidate_positions(index, ["Dark Souls", "Hollow Knight:", "Zzyzx Qwop"])
+
+    assert 1 in candidates[0]
+    assert 4 in candidates[1]
+    assert len(candidates[2]) == 0
+    assert list(candidates[0]) == sorted(candidates[0])
+
+
+def test_save_and_load_lsh_index(tmp_path):
+    """Tests a saved index finds the same candidates once loaded."""
+    index_file = str(tmp_path / "index.npz")
+    index = build_lsh_index(TARGET_NAMES)
+
+    save_lsh_index(index, index_file)
+    loaded = load_lsh_index(index_file)
+
+    assert loaded.names_hash == index.names_hash
+    assert [list(c) for c in candidate_positions(loaded, ["Portal 2"])] == \
+        [list(c) for c in candidate_positions(index, ["Portal 2"])]
+
+
+def test_load_lsh_index_missing(tmp_path):
+    """Tests a missing index raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        load_lsh_index(str(tmp_path / "missing.npz"))
+
+
+def test_load_or_build_lsh_index_rebuilds_when_stale(tmp_path):
+    """Tests an index is reused for the same names and settings, and rebuilt otherwise."""
+    index_file = str(tmp_path / "index.npz")
+    load_or_build_lsh_index(TARGET_NAMES, index_file)
+    modified = (tmp_path / "index.npz").stat().st_mtime_ns
+
+    load_or_build_lsh_index(TARGET_NAMES, index_file)
+    assert (tmp_path / "index.npz").stat().st_mtime_ns == modified
+
+    rebuilt = load_or_build_lsh_index(TARGET_NAMES, index_file, num_perm=64, bands=16)
+    assert len(rebuilt.a) == 64
+    assert len(load_lsh_index(index_file).a) == 64
+
+
+def test_missing_names_are_never_candidates():
+    """Tests missing target names are left out of the index and missing sources get no candidates."""
+    index = build_lsh_index(["Dark Souls", np.nan, "Celeste", None])
+
+    candidates = candidate_positions(index, ["Dark Souls", np.nan, "Celeste"])
+
+    assert candidates[0].tolist() == [0]
+    assert candidates[1].tolist() == []
+    assert candidates[2].tolist() == [2]
+    assert shingle_hashes(np.nan) == shingle_hashes("")
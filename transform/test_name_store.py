@@ -0,0 +1,116 @@
+"""Tests functions for name_store.py."""
+# pylint: skip-file
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from fuzzy_matching import ratio_match_positions
+from name_store import (encode_strings, build_name_store, write_name_store, load_name_store,
+                        get_name, get_normalised_name, get_names,
+                        positions_in_length_range, match_chunk, pool_match_positions,
+                        store_match_positions)
+
+
+@pytest.fixture
+def source_csv(tmp_path):
+    """A target CSV with a Name column."""
+    csv_file = tmp_path / "targets.csv"
+    pd.DataFrame({
+        "Name": ["Pokémon Red", "DOOM", "The Witcher 3: Wild Hunt"],
+        "Global_Sales": [31.4, 2.0, 10.0]
+    }).to_csv(csv_file, index=False)
+    return str(csv_file)
+
+
+def test_encode_strings():
+    """Tests strings are encoded into offsets and a UTF-8 blob."""
+    offsets, blob = encode_strings(pd.Series(["ab", "é", ""]))
+
+    assert offsets.tolist() == [0, 2, 4, 4]
+    assert blob.tobytes() == "abé".encode("utf-8")
+
+
+def test_build_and_load_name_store(source_csv, tmp_path):
+    """Tests names, normalised names and lengths are read back from the store."""
+    store_dir = str(tmp_path / "store")
+
+    assert build_name_store(source_csv, store_dir)
+    store = load_name_store(store_dir)
+
+    assert isinstance(store.blob, np.memmap)
+    assert get_name(store, 0) == "Pokémon Red"
+    assert get_normalised_name(store, 2) == "the witcher 3 wild hunt"
+    assert get_names(store) == ["Pokémon Red", "DOOM",
+                                "The Witcher 3: Wild Hunt"]
+    assert store.lengths.tolist() == [11, 4, 24]
+    assert isinstance(store.sorted_lengths, np.memmap)
+    assert store.sorted_lengths.tolist() == [4, 11, 24]
+
+
+def test_build_name_store_skips_unchanged_source(source_csv, tmp_path):
+    """Tests the store is only rebuilt when the source file changes."""
+    store_dir = str(tmp_path / "store")
+    build_name_store(source_csv, store_dir)
+
+    assert not build_name_store(source_csv, store_dir)
+
+    with open(source_csv, "a", encoding="UTF-8") as f:
+        f.write("Starfield,1.0\n")
+    assert build_name_store(source_csv, store_dir)
+    assert get_names(load_name_store(store_dir))[-1] == "Starfield"
+
+
+@patch("name_store.LOGGER.error")
+def test_load_name_store_missing(mock_logging, tmp_path):
+    """Tests a FileNotFoundError is raised when the store has not been built."""
+    with pytest.raises(FileNotFoundError):
+        load_name_store(str(tmp_path / "missing"))
+
+
+def test_positions_in_length_range(source_csv, tmp_path):
+    """Tests names can be pruned by length."""
+    store_dir = str(tmp_path / "store")
+    build_name_store(source_csv, store_dir)
+    store = load_name_store(store_dir)
+
+    assert positions_in_length_range(store, 4, 11).tolist() == [0, 1]
+    assert positions_in_length_range(store, 12, 30).tolist() == [2]
+    assert positions_in_length_range(store, 40, 50).tolist() == []
+
+
+def test_match_chunk(source_csv, tmp_path):
+    """Tests names are matched to store positions, scoring only names of a reachable length."""
+    store_dir = str(tmp_path / "store")
+    build_name_store(source_csv, store_dir)
+
+    assert match_chunk(["Doom", "Pokemon Red", "Halo"], store_dir).tolist() == [-1, 0, -1]
+    assert match_chunk(["DOOM", "The Witcher 3 Wild Hunt"], store_dir).tolist() == [1, 2]
+    assert match_chunk([], store_dir).tolist() == []
+
+
+def test_pool_match_positions_matches_ratio_match_positions(tmp_path):
+    """Tests the process pool finds the same matches as scoring every name in one process."""
+    target_names = ["Doom", "Doom II", "Portal 2", "Portal", "Celeste", "Hollow Knight",
+                    "Dark Souls", "Dark Souls III"]
+    source_names = ["Doom 2", "Portal 3", "Celest", "Hades", "Portal", "Dark Soul",
+                    "Hollow Knight Silksong", np.nan]
+    store_dir = str(tmp_path / "store")
+    write_name_store(pd.Series(target_names), store_dir)
+
+    positions = pool_match_positions(source_names, store_dir, processes=2)
+
+    assert positions.tolist() == ratio_match_positions(source_names, target_names).tolist()
+    assert (store_match_positions(source_names, store_dir, threads=2).tolist() ==
+            positions.tolist())
+
+
+def test_missing_names_are_never_candidates(tmp_path):
+    """Tests missing target names are stored in place but never scored or matched."""
+    store_dir = str(tmp_path / "store")
+    write_name_store(pd.Series(["Doom", np.nan, "Hades", None], dtype=object), store_dir)
+    store = load_name_store(store_dir)
+
+    assert get_names(store) == ["Doom", "", "Hades", ""]
+    assert store.length_order.tolist() == [0, 2]
+    assert positions_in_length_range(store, 0, 10).tolist() == [0, 2]
+    assert match_chunk(["", "Hades"], store_dir).tolist() == [-1, 2]
@@ -0,0 +1,137 @@
+"""Tests functions for partitioned_store.py."""
+# pylint: skip-file
+import os
+import time
+import pytest
+import pandas as pd
+from partitioned_store import (MANIFEST_FILE, partition_dir, arrow_safe, read_manifest,
+                               write_partitioned, read_partitioned, write_output, read_output,
+                               output_exists, output_files, output_mtime)
+
+
+@pytest.fixture
+def games():
+    return pd.DataFrame({
+        "Unnamed: 0": [0, 1, 2, 3],
+        "Name": ["Doom", "Portal 2", "Hades", "Doom Eternal"],
+        "Release Year": ["2016", "2011", "N/A", "2016"],
+        "Score": [1.0, 2.0, None, 4.0],
+    })
+
+
+def test_partition_dir():
+    """Tests a CSV's partitioned version is the folder of the same name."""
+    assert partition_dir("clean_rawg_video_games.csv") == "clean_rawg_video_games"
+
+
+def test_arrow_safe_writes_mixed_columns_as_text():
+    """Tests object columns mixing numbers and text become text, keeping missing values."""
+    df = arrow_safe(pd.DataFrame({"Year": [2011, "N/A", None], "Name": ["a", "b", None]}))
+
+    assert df["Year"].tolist() == ["2011", "N/A", None]
+    assert df["Name"].tolist() == ["a", "b", None]
+
+
+def test_write_partitioned_writes_one_file_per_year(games, tmp_path):
+    """Tests each year gets its own file, listed in the manifest without the index column."""
+    output_dir = str(tmp_path / "games")
+    manifest = write_partitioned(games, output_dir)
+
+    assert [partition["year"] for partition in manifest["partitions"]] == [2011, 2016, None]
+    assert [partition["rows"] for partition in manifest["partitions"]] == [1, 2, 1]
+    assert manifest["columns"] == ["Name", "Release Year", "Score"]
+    assert read_manifest(output_dir) == manifest
+    assert sorted(os.listdir(output_dir)) == [MANIFEST_FILE, "year=2011.parquet",
+                                              "year=2016.parquet", "year=unknown.parquet"]
+
+
+def test_write_partitioned_removes_stale_partitions(games, tmp_path):
+    """Tests rewriting the data removes the files of years that are no longer in it."""
+    output_dir = str(tmp_path / "games")
+    write_partitioned(games, output_dir)
+    write_partitioned(games[games["Release Year"] == "2016"], output_dir)
+
+    assert sorted(os.listdir(output_dir)) == [MANIFEST_FILE, "year=2016.parquet"]
+
+
+def test_write_partitioned_missing_partition_column(tmp_path):
+    """Tests data without the partition column raises a ValueError."""
+    with pytest.raises(ValueError):
+        write_partitioned(pd.DataFrame({"Name": ["Doom"]}), str(tmp_path / "games"))
+
+
+def test_read_partitioned_round_trip(games, tmp_path):
+    """Tests every row is read back, grouped by year in the original order."""
+    output_dir = str(tmp_path / "games")
+    write_partitioned(games, output_dir)
+
+    result = read_partitioned(output_dir)
+
+    assert result["Name"].tolist() == ["Portal 2", "Doom", "Doom Eternal", "Hades"]
+    assert result["Release Year"].tolist() == ["2011", "2016", "2016", "N/A"]
+
+
+def test_read_partitioned_prunes_years_and_columns(games, tmp_path):
+    """Tests only the requested years and columns are read."""
+    output_dir = str(tmp_path / "games")
+    write_partitioned(games, output_dir)
+
+    result = read_partitioned(output_dir, years=[2016], columns=["Name"])
+    with_unknown = read_partitioned(output_dir, years=[2016], columns=["Name"],
+                                    include_unknown=True)
+
+    assert list(result.columns) == ["Name"]
+    assert result["Name"].tolist() == ["Doom", "Doom Eternal"]
+    assert with_unknown["Name"].tolist() == ["Doom", "Doom Eternal", "Hades"]
+    assert read_partitioned(output_dir, years=[1990], columns=["Name"]).empty
+
+
+def test_read_partitioned_unknown_column(games, tmp_path):
+    """Tests asking for a column that was not saved raises a ValueError."""
+    output_dir = str(tmp_path / "games")
+    write_partitioned(games, output_dir)
+
+    with pytest.raises(ValueError):
+        read_partitioned(output_dir, columns=["Missing"])
+
+
+def test_read_manifest_missing(tmp_path):
+    """Tests a folder without a manifest raises a FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        read_manifest(str(tmp_path))
+
+
+def test_write_output_unknown_format(games, tmp_path):
+    """Tests an unknown output format raises a ValueError."""
+    with pytest.raises(ValueError):
+        write_output(games, str(tmp_path / "games.csv"), "xlsx")
+
+
+def test_read_output_reads_latest_version(games, tmp_path):
+    """Tests read_output reads whichever of the CSV and partitioned versions was saved last."""
+    csv_file = str(tmp_path / "games.csv")
+    write_output(games, csv_file, "partitioned")
+    assert not os.path.exists(csv_file)
+    assert len(read_output(csv_file, columns=["Name"])) == 4
+
+    time.sleep(0.01)
+    write_output(games.head(1), csv_file, "csv")
+    assert read_output(csv_file)["Name"].tolist() == ["Doom"]
+
+
+def test_output_files_follow_latest_version(games, tmp_path):
+    """Tests the files, existence and save time match the version read_output reads."""
+    csv_file = str(tmp_path / "games.csv")
+    assert not output_exists(csv_file)
+
+    write_output(games, csv_file, "partitioned")
+    files = output_files(csv_file)
+    assert output_exists(csv_file)
+    assert files[0] == os.path.join(partition_dir(csv_file), MANIFEST_FILE)
+    assert len(files) == 4
+    assert output_mtime(csv_file) == max(os.path.getmtime(file_path) for file_path in files)
+
+    time.sleep(0.01)
+    write_output(games, csv_file, "csv")
+    assert output_files(csv_file) == [csv_file]
+    assert output_mtime(csv_file) == os.path.getmtime(csv_file)
@@ -0,0 +1,90 @@
+"""Tests functions for review_analytics.py."""
+# pylint: skip-file
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from review_analytics import (tokenize, review_keys, count_terms, update_review_matrix,
+                              load_review_matrix, term_frequencies, rating_association)
+import review_analytics
+
+
+@pytest.fixture
+def wcd_data():
+    return pd.DataFrame({
+        "Game": ["Game1", "Game2", "Game3"],
+        "Rating": ["Recommended", "Not Recommended", "Not Recommended"],
+        "Review": ["Great story, great combat.", "Forced agenda.", "Agenda everywhere, forced."],
+    })
+
+
+def test_tokenize():
+    """Tests reviews are split into lowercase words, keeping apostrophes inside words."""
+    assert tokenize("It’s GREAT, isn't it?") == ["it's", "great", "isn't", "it"]
+    assert tokenize(np.nan) == []
+
+
+def test_review_keys_distinguish_duplicates(wcd_data):
+    """Tests identical rows get different keys by occurrence."""
+    keys = review_keys(pd.concat([wcd_data, wcd_data.iloc[[0]]]))
+
+    assert len(set(keys)) == 4
+    assert keys[0].split(":")[0] == keys[3].split(":")[0]
+
+
+def test_count_terms_extends_vocabulary():
+    """Tests terms are counted per review and new terms are added to the vocabulary."""
+    vocabulary = {"great": 0}
+    matrix = count_terms(["great great game", "new game"], vocabulary)
+
+    assert vocabulary == {"great": 0, "game": 1, "new": 2}
+    assert matrix.toarray().tolist() == [[2, 1, 0], [0, 1, 1]]
+
+
+def test_update_review_matrix_is_incremental(wcd_data, tmp_path):
+    """Tests only new reviews are tokenized and rows follow the order of the data."""
+    matrix_file = str(tmp_path / "terms.npz")
+    state_file = str(tmp_path / "terms.json")
+    update_review_matrix(wcd_data, matrix_file, state_file)
+
+    changed = pd.concat([wcd_data.iloc[[2, 0]], pd.DataFrame({
+        "Game": ["Game4"], "Rating": ["Recommended"], "Review": ["Great fun"]})])
+    with patch("review_analytics.count_terms", wraps=review_analytics.count_terms) as mock_count:
+        matrix, vocabulary = update_review_matrix(changed, matrix_file, state_file)
+
+    assert mock_count.call_args.args[0] == ["Great fun"]
+    expected = count_terms(changed["Review"].tolist(), dict(vocabulary))
+    assert (matrix != expected).nnz == 0
+    assert load_review_matrix(matrix_file, state_file)[0].shape == matrix.shape
+
+
+def test_load_review_matrix_without_cache(tmp_path):
+    """Tests a missing cache gives an empty matrix and vocabulary."""
+    matrix, vocabulary, keys = load_review_matrix(str(tmp_path / "a.npz"), str(tmp_path / "a.json"))
+
+    assert matrix.shape == (0, 0)
+    assert vocabulary == {} and keys == []
+
+
+def test_term_frequencies(wcd_data, tmp_path):
+    """Tests term counts and review counts, most used first."""
+    matrix, vocabulary = update_review_matrix(wcd_data, str(tmp_path / "t.npz"),
+                                              str(tmp_path / "t.json"))
+    frequencies = term_frequencies(matrix, vocabulary)
+
+    assert frequencies.loc["great", "Count"] == 2
+    assert frequencies.loc["great", "Reviews"] == 1
+    assert frequencies.loc["forced", "Reviews"] == 2
+    assert frequencies.index[0] in ("forced", "agenda", "great")
+
+
+def test_rating_association(wcd_data, tmp_path):
+    """Tests terms used only in one Rating's reviews score positively for it."""
+    matrix, vocabulary = update_review_matrix(wcd_data, str(tmp_path / "t.npz"),
+                                              str(tmp_path / "t.json"))
+    scores = rating_association(matrix, vocabulary, wcd_data["Rating"])
+
+    assert list(scores.columns) == ["Recommended", "Not Recommended"]
+    assert scores.loc["agenda", "Not Recommended"] > 0 > scores.loc["agenda", "Recommended"]
+    assert scores.loc["great", "Recommended"] > scores.loc["story", "Recommended"] > 0
+    assert np.isfinite(scores.to_numpy()).all()
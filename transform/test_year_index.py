@@ -0,0 +1,77 @@
+"""Tests functions for year_index.py."""
+# pylint: skip-file
+import numpy as np
+from rapidfuzz import fuzz
+from year_index import (UNKNOWN_YEAR, parse_years, name_lengths, build_year_index,
+                        length_bounds, year_groups, year_candidates)
+
+TARGET_NAMES = ["Doom", "Doom", "Portal 2", "Hollow Knight", "Hades", "Celeste"]
+TARGET_YEARS = [1993, "2016", 2011, "2017.0", None, "N/A"]
+
+
+def test_parse_years():
+    """Tests years are read from numbers and text, with UNKNOWN_YEAR for anything else."""
+    assert parse_years(TARGET_YEARS).tolist() == [1993, 2016, 2011, 2017, UNKNOWN_YEAR,
+                                                  UNKNOWN_YEAR]
+
+
+def test_build_year_index_buckets_by_year_sorted_by_length():
+    """Tests every target is in its year's bucket, sorted by name length."""
+    index = build_year_index(["Celeste", "Doom", "Hades"], [2018, 2018, 2018])
+
+    positions, lengths = index.buckets[2018]
+    assert positions.tolist() == [1, 2, 0]
+    assert lengths.tolist() == [4, 5, 7]
+
+
+def test_length_bounds_contain_every_reachable_length():
+    """Tests every name outside the bounds scores below the threshold."""
+    shortest, longest = length_bounds(10, 80)
+
+    assert (shortest, longest) == (7, 15)
+    for length in range(1, 30):
+        best_score = fuzz.ratio("a" * 10, "a" * length)
+        assert (best_score >= 80) == (shortest <= length <= longest)
+
+
+def test_year_groups():
+    """Tests titles are grouped by year."""
+    groups = year_groups(np.array([2011, UNKNOWN_YEAR, 2011]))
+
+    assert {year: group.tolist() for year, group in groups.items()} == {UNKNOWN_YEAR: [1],
+                                                                        2011: [0, 2]}
+
+
+def test_year_candidates_within_tolerance():
+    """Tests only targets within the year tolerance, or without a year, are candidates."""
+    index = build_year_index(TARGET_NAMES, TARGET_YEARS, tolerance=1)
+
+    assert year_candidates(index, 2016, 5, 8, 0).tolist() == [1, 3, 4, 5]
+    assert year_candidates(index, 1990, 5, 8, 0).tolist() == [4, 5]
+
+
+def test_year_candidates_filter_by_length():
+    """Tests names too short or long to reach the threshold are left out, unless use_length is off."""
+    index = build_year_index(TARGET_NAMES, TARGET_YEARS, tolerance=1)
+
+    assert year_candidates(index, 2016, 4, 4, 80).tolist() == [1, 4]
+    assert year_candidates(index, 2016, 4, 4, 80, use_length=False).tolist() == [1, 3, 4, 5]
+
+
+def test_year_candidates_without_year_checks_every_year():
+    """Tests a title without a year can match a target of any year."""
+    index = build_year_index(TARGET_NAMES, TARGET_YEARS)
+
+    assert year_candidates(index, UNKNOWN_YEAR, 1, 50, 0).tolist() == list(range(6))
+
+
+def test_name_lengths_count_missing_names_as_zero():
+    """Tests missing names have length 0 instead of raising."""
+    assert name_lengths(["Halo", np.nan, None]).tolist() == [4, 0, 0]
+
+
+def test_build_year_index_leaves_out_missing_names():
+    """Tests missing target names are never candidates."""
+    index = build_year_index(["Halo", np.nan, "Doom"], [2001, 2001, None])
+
+    assert year_candidates(index, UNKNOWN_YEAR, 0, 50, 0).tolist() == [0, 2]
@@ -0,0 +1,99 @@
+"""A file to narrow down the target names a title could match by release year and name length.
+
+Target names are bucketed by release year and sorted by length within each bucket. A title is only
+scored against the buckets within the year tolerance of its own release year (plus targets without
+a year), and only against names whose length could reach the match threshold: fuzz.ratio of strings
+of lengths L and l is at most 200 * min(L, l) / (L + l), so only lengths from L * t / (200 - t) to
+L * (200 - t) / t can score t or more.
+"""
+import math
+import logging
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+UNKNOWN_YEAR = -1
+YEAR_TOLERANCE = 1
+
+
+class YearLengthIndex(NamedTuple):
+    """Target positions bucketed by release year, each bucket as (positions, lengths) sorted by length."""
+    buckets: dict
+    tolerance: int
+
+
+def parse_years(years) -> np.ndarray:
+    """Converts release years to integers, with UNKNOWN_YEAR for missing or invalid years."""
+    return (pd.to_numeric(pd.Series(years, dtype=object), errors="coerce")
+            .fillna(UNKNOWN_YEAR).astype(np.int64).to_numpy())
+
+
+def name_lengths(names: list) -> np.ndarray:
+    """Measures the length of every name, counting missing names as 0."""
+    return np.fromiter((len(name) if isinstance(name, str) else 0 for name in names),
+                       dtype=np.int64, count=len(names))
+
+
+def build_year_index(target_names: list[str], target_years, tolerance: int = YEAR_TOLERANCE
+                     ) -> YearLengthIndex:
+    """Buckets target names by release year and sorts each bucket by name length.
+
+    Missing names are left out, so they are never candidates.
+    """
+    years = parse_years(target_years)
+    lengths = name_lengths(target_names)
+    valid = np.array([isinstance(name, str) for name in target_names], dtype=bool)
+
+    buckets = {}
+    for year in np.unique(years[valid]):
+        positions = np.flatnonzero((years == year) & valid)
+        order = np.argsort(lengths[positions], kind="stable")
+        buckets[int(year)] = (positions[order], lengths[positions][order])
+    return YearLengthIndex(buckets, tolerance)
+
+
+def length_bounds(length: int, match_threshold: float) -> tuple:
+    """Finds the shortest and longest names that could reach match_threshold against a name."""
+    if match_threshold <= 0:
+        return 0, math.inf
+    # A little slack keeps names right on the bound despite floating point rounding
+    shortest = math.ceil(length * match_threshold / (200 - match_threshold) - 1e-9)
+    longest = math.floor(length * (200 - match_threshold) / match_threshold + 1e-9)
+    return shortest, longest
+
+
+def year_groups(years: np.ndarray) -> dict:
+    """Groups the positions of titles by their release year."""
+    return {int(year): np.flatnonzero(years == year) for year in np.unique(years)}
+
+
+def year_candidates(index: YearLengthIndex, year: int, min_length: int, max_length: int,
+                    match_threshold: float, use_length: bool = True) -> np.ndarray:
+    """Finds the sorted positions of the targets titles of a year and length range could match.
+
+    Titles without a year are checked against every year. With use_length off, every name length
+    is kept, for scorers that do not compare whole strings.
+    """
+    if year == UNKNOWN_YEAR:
+        years = list(index.buckets)
+    else:
+        years = dict.fromkeys([*range(year - index.tolerance, year + index.tolerance + 1),
+                               UNKNOWN_YEAR])
+
+    if use_length:
+        shortest = length_bounds(min_length, match_threshold)[0]
+        longest = length_bounds(max_length, match_threshold)[1]
+    else:
+        shortest, longest = 0, math.inf
+    positions = []
+    for bucket_year in years:
+        if bucket_year not in index.buckets:
+            continue
+        bucket_positions, bucket_lengths = index.buckets[bucket_year]
+        start = np.searchsorted(bucket_lengths, shortest, side="left")
+        end = np.searchsorted(bucket_lengths, longest, side="right")
+        positions.append(bucket_positions[start:end])
+
+    return np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64)